@@ -28,6 +28,8 @@ exporting-exported-media-file =
         [one] Exported { $count } media file
        *[other] Exported { $count } media files
     }
+# Shown below the number of exported media files, eg "12.5 MB/s, 40 files/s".
+exporting-media-throughput = { $megabytes } MB/s, { $files } files/s
 exporting-note-exported =
     { $count ->
         [one] { $count } note exported.
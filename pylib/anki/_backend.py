@@ -18,7 +18,13 @@ from anki import _rsbridge, backend_pb2, i18n_pb2
 from anki._backend_generated import RustBackendGenerated
 from anki._fluent import GeneratedTranslations
 from anki.dbproxy import Row as DBRow
-from anki.dbproxy import ValueForDB
+from anki.dbproxy import (
+    ValueForDB,
+    ValueFromDB,
+    decode_binary_columns,
+    decode_binary_rows,
+    is_binary_rows,
+)
 from anki.utils import from_json_bytes, to_json_bytes
 
 if TYPE_CHECKING:
@@ -93,15 +99,73 @@ class RustBackend(RustBackendGenerated):
         _rsbridge.syncserver()
 
     def db_query(
-        self, sql: str, args: Sequence[ValueForDB], first_row_only: bool
+        self,
+        sql: str,
+        args: Sequence[ValueForDB],
+        first_row_only: bool,
+        allow_binary: bool = True,
+        ids: str | None = None,
     ) -> list[DBRow]:
         return self._db_command(
-            dict(kind="query", sql=sql, args=args, first_row_only=first_row_only)
+            dict(
+                kind="query",
+                sql=sql,
+                args=args,
+                first_row_only=first_row_only,
+                allow_binary=allow_binary,
+                ids=ids,
+            )
         )
 
     def db_execute_many(self, sql: str, args: list[list[ValueForDB]]) -> list[DBRow]:
         return self._db_command(dict(kind="executemany", sql=sql, args=args))
 
+    def db_columns(
+        self, sql: str, args: Sequence[ValueForDB], ids: str | None = None
+    ) -> list[Sequence[ValueFromDB]]:
+        return decode_binary_columns(
+            self._db_command_bytes(dict(kind="columns", sql=sql, args=args, ids=ids))
+        )
+
+    def db_prepare(self, sql: str) -> int:
+        return self._db_command(dict(kind="prepare", sql=sql))
+
+    def db_run(
+        self, statement: int, args: Sequence[ValueForDB], first_row_only: bool
+    ) -> list[DBRow]:
+        return self._db_command(
+            dict(
+                kind="run",
+                statement=statement,
+                args=args,
+                first_row_only=first_row_only,
+            )
+        )
+
+    def db_finalize(self, statement: int) -> None:
+        return self._db_command(dict(kind="finalize", statement=statement))
+
+    def db_iterate(
+        self,
+        sql: str,
+        args: Sequence[ValueForDB],
+        batch_size: int,
+        ids: str | None = None,
+    ) -> tuple[int | None, list[DBRow]]:
+        return self._db_batch(
+            dict(kind="iterate", sql=sql, args=args, batch_size=batch_size, ids=ids)
+        )
+
+    def db_fetch(self, cursor: int) -> tuple[int | None, list[DBRow]]:
+        return self._db_batch(dict(kind="fetch", cursor=cursor))
+
+    def db_close(self, cursor: int) -> None:
+        return self._db_command(dict(kind="close", cursor=cursor))
+
+    def _db_batch(self, input: dict[str, Any]) -> tuple[int | None, list[DBRow]]:
+        batch = self._db_command(input)
+        return batch["cursor"], batch["rows"]
+
     def db_begin(self) -> None:
         return self._db_command(dict(kind="begin"))
 
@@ -112,9 +176,15 @@ class RustBackend(RustBackendGenerated):
         return self._db_command(dict(kind="rollback"))
 
     def _db_command(self, input: dict[str, Any]) -> Any:
+        output = self._db_command_bytes(input)
+        if is_binary_rows(output):
+            return decode_binary_rows(output)
+        return from_json_bytes(output)
+
+    def _db_command_bytes(self, input: dict[str, Any]) -> bytes:
         bytes_input = to_json_bytes(input)
         try:
-            return from_json_bytes(self._backend.db_command(bytes_input))
+            return self._backend.db_command(bytes_input)
         except Exception as error:
             err_bytes = bytes(error.args[0])
         err = backend_pb2.BackendError()
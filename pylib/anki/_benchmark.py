@@ -0,0 +1,49 @@
+# Copyright: Ankitects Pty Ltd and contributors
+# License: GNU AGPL, version 3 or later; http://www.gnu.org/licenses/agpl.html
+
+"""Scaffolding for the ad-hoc benchmarks in pylib/tests and qt/tests.
+
+benchmark = BenchmarkSet()
+
+@benchmark
+def something() -> None:
+    timed("label", lambda: ...)
+
+if __name__ == "__main__":
+    benchmark.main(sys.argv[1:])
+"""
+
+from __future__ import annotations
+
+import time
+from collections.abc import Callable
+
+
+class BenchmarkSet:
+    "A decorator that records benchmarks by name, so they can be run by main()."
+
+    def __init__(self) -> None:
+        self.benchmarks: dict[str, Callable[[], None]] = {}
+
+    def __call__(self, func: Callable[[], None]) -> Callable[[], None]:
+        self.benchmarks[func.__name__] = func
+        return func
+
+    def main(self, names: list[str]) -> None:
+        "Run the named benchmarks, or all of them if no names are given."
+        for name in names or list(self.benchmarks):
+            print(f"# {name}")
+            self.benchmarks[name]()
+
+
+def timed(label: str, func: Callable[[], object], repeat: int = 3) -> float:
+    "Print and return the best of `repeat` runs, in seconds."
+    best = min(_time_once(func) for _ in range(repeat))
+    print(f"{label:<40} {best * 1000:>10.1f}ms")
+    return best
+
+
+def _time_once(func: Callable[[], object]) -> float:
+    start = time.perf_counter()
+    func()
+    return time.perf_counter() - start
@@ -3,8 +3,8 @@
 
 from __future__ import annotations
 
-from collections.abc import Generator, Iterable, Sequence
-from typing import Any, Literal, Union, cast
+from collections.abc import Callable, Generator, Iterable, Sequence
+from typing import Any, Literal, TypeVar, Union, cast, overload
 
 from anki import (
     ankiweb_pb2,
@@ -67,6 +67,7 @@ import weakref
 from dataclasses import dataclass
 
 import anki.latex
+import anki.template
 from anki import hooks
 from anki._backend import RustBackend, Translations
 from anki.browser import BrowserConfig, BrowserDefaults
@@ -86,10 +87,7 @@ from anki.sync import SyncAuth, SyncOutput, SyncStatus
 from anki.tags import TagManager
 from anki.utils import (
     from_json_bytes,
-    ids2str,
     int_time,
-    split_fields,
-    strip_html_media,
     to_json_bytes,
 )
 
@@ -98,6 +96,8 @@ anki.latex.setup_hook()
 
 SearchJoiner = Literal["AND", "OR"]
 
+_T = TypeVar("_T")
+
 
 @dataclass
 class DeckIdLimit:
@@ -281,6 +281,7 @@ class Collection(DeprecatedNamesMixin):
 
     def _clear_caches(self) -> None:
         self.models._clear_cache()
+        anki.template.clear_field_filter_cache()
 
     def reopen(self, after_full_sync: bool = False) -> None:
         if self.db:
@@ -496,10 +497,56 @@ class Collection(DeprecatedNamesMixin):
     def get_note(self, id: NoteId) -> Note:
         return Note(self, id=id)
 
+    def get_cards(self, ids: Sequence[CardId]) -> Sequence[Card]:
+        """Fetch multiple cards with a single backend call.
+
+        Card objects are only built when they are first accessed. Raises
+        NotFoundError if any of the cards does not exist."""
+        return _LazySequence(
+            self._backend.get_cards(ids),
+            lambda card: Card(self, backend_card=card),
+        )
+
+    def get_notes(self, ids: Sequence[NoteId]) -> Sequence[Note]:
+        """Fetch multiple notes with a single backend call.
+
+        Note objects are only built when they are first accessed. Raises
+        NotFoundError if any of the notes does not exist."""
+        return _LazySequence(
+            self._backend.get_notes(ids),
+            lambda note: Note(self, backend_note=note),
+        )
+
+    def iter_cards(
+        self, ids: Sequence[CardId], batch_size: int = 500
+    ) -> Generator[Card, None, None]:
+        """Yield the cards with the provided ids, fetching them in batches."""
+        for start in range(0, len(ids), batch_size):
+            yield from self.get_cards(ids[start : start + batch_size])
+
+    def iter_notes(
+        self, ids: Sequence[NoteId], batch_size: int = 500
+    ) -> Generator[Note, None, None]:
+        """Yield the notes with the provided ids, fetching them in batches."""
+        for start in range(0, len(ids), batch_size):
+            yield from self.get_notes(ids[start : start + batch_size])
+
+    def render_cards(
+        self, ids: Sequence[CardId], browser: bool = False, batch_size: int = 500
+    ) -> Generator[anki.template.TemplateRenderOutput, None, None]:
+        """Yield the rendered question and answer of each card, in order.
+
+        Each batch of cards is rendered with a single backend call, and the
+        output matches what card.render_output() would return, with
+        card_did_render being called for each card unless browser is true.
+        Cards that no longer exist are rendered as '(deleted)'."""
+        return anki.template.render_existing_cards(self, ids, browser, batch_size)
+
     def update_notes(
         self, notes: Sequence[Note], skip_undo_entry: bool = False
     ) -> OpChanges:
         """Save note changes to database."""
+        anki.template.clear_field_filter_cache()
         return self._backend.update_notes(
             notes=[n._to_backend_note() for n in notes], skip_undo_entry=skip_undo_entry
         )
@@ -557,7 +604,7 @@ class Collection(DeprecatedNamesMixin):
     def remove_notes_by_card(self, card_ids: list[CardId]) -> None:
         if hooks.notes_will_be_deleted.count():
             nids = self.db.list(
-                f"select nid from cards where id in {ids2str(card_ids)}"
+                "select nid from cards where id in bound_ids", ids=card_ids
             )
             hooks.notes_will_be_deleted(self, nids)
         self._backend.remove_notes(note_ids=[], card_ids=card_ids)
@@ -736,39 +783,11 @@ class Collection(DeprecatedNamesMixin):
 
     # returns array of ("dupestr", [nids])
     def find_dupes(self, field_name: str, search: str = "") -> list[tuple[str, list]]:
-        nids = self.find_notes(
-            self.build_search_string(search, SearchNode(field_name=field_name))
-        )
-        # go through notes
-        vals: dict[str, list[int]] = {}
-        dupes = []
-        fields: dict[int, int] = {}
-
-        def ord_for_mid(mid: NotetypeId) -> int:
-            if mid not in fields:
-                model = self.models.get(mid)
-                for idx, field in enumerate(model["flds"]):
-                    if field["name"].lower() == field_name.lower():
-                        fields[mid] = idx
-                        break
-            return fields[mid]
-
-        for nid, mid, flds in self.db.all(
-            f"select id, mid, flds from notes where id in {ids2str(nids)}"
-        ):
-            flds = split_fields(flds)
-            ord = ord_for_mid(mid)
-            if ord is None:
-                continue
-            val = flds[ord]
-            val = strip_html_media(val)
-            # empty does not count as duplicate
-            if not val:
-                continue
-            vals.setdefault(val, []).append(nid)
-            if len(vals[val]) == 2:
-                dupes.append((val, vals[val]))
-        return dupes
+        """Group notes matching search by the HTML-stripped content of field_name.
+        Only groups with more than one note are returned, and empty fields are
+        ignored."""
+        groups = self._backend.find_duplicates(field_name=field_name, search=search)
+        return [(group.text, list(group.note_ids)) for group in groups]
 
     # Search Strings
     ##########################################################################
@@ -880,6 +899,17 @@ class Collection(DeprecatedNamesMixin):
             row.font_size,
         )
 
+    def browser_rows_for_ids(
+        self, ids: Sequence[int]
+    ) -> tuple[dict[int, BrowserRow], list[int]]:
+        """Fetch the rows of many ids in a single backend call.
+
+        Returns the rows keyed by id, and the ids whose row could not be built
+        (eg because they have been deleted). browser_row_for_id() can be used
+        to get the error for one of the latter."""
+        out = self._backend.browser_rows_for_ids(ids)
+        return dict(zip(out.ids, out.rows)), list(out.failed_ids)
+
     def load_browser_card_columns(self) -> list[str]:
         """Return the stored card column names and ensure the backend columns are set and in sync."""
         columns = self.get_config(
@@ -1061,6 +1091,8 @@ class Collection(DeprecatedNamesMixin):
         out = self._backend.undo()
         if out.changes.notetype:
             self.models._clear_cache()
+        if out.changes.note_text:
+            anki.template.clear_field_filter_cache()
         return out
 
     def redo(self) -> OpChangesAfterUndo:
@@ -1068,6 +1100,8 @@ class Collection(DeprecatedNamesMixin):
         out = self._backend.redo()
         if out.changes.notetype:
             self.models._clear_cache()
+        if out.changes.note_text:
+            anki.template.clear_field_filter_cache()
         return out
 
     def op_made_changes(self, changes: OpChanges) -> bool:
@@ -1308,6 +1342,32 @@ Collection.register_deprecated_aliases(
 _Collection = Collection
 
 
+class _LazySequence(Sequence[_T]):
+    """Wraps backend messages, converting each one on first access."""
+
+    def __init__(self, messages: Sequence[Any], convert: Callable[[Any], _T]) -> None:
+        self._messages = messages
+        self._convert = convert
+        self._items: list[_T | None] = [None] * len(messages)
+
+    def __len__(self) -> int:
+        return len(self._messages)
+
+    @overload
+    def __getitem__(self, index: int) -> _T: ...
+
+    @overload
+    def __getitem__(self, index: slice) -> list[_T]: ...
+
+    def __getitem__(self, index: int | slice) -> _T | list[_T]:
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(len(self)))]
+        item = self._items[index]
+        if item is None:
+            item = self._items[index] = self._convert(self._messages[index])
+        return item
+
+
 def pb_export_limit(limit: ExportLimit) -> import_export_pb2.ExportLimit:
     message = import_export_pb2.ExportLimit()
     if isinstance(limit, DeckIdLimit):
@@ -3,8 +3,13 @@
 
 from __future__ import annotations
 
+import base64
 import re
-from collections.abc import Callable, Iterable, Sequence
+import struct
+import sys
+from array import array
+from collections.abc import Callable, Iterable, Iterator, Sequence
+from itertools import accumulate
 from re import Match
 from typing import TYPE_CHECKING, Any, Union
 
@@ -27,6 +32,8 @@ class DBProxy:
 
     def __init__(self, backend: anki._backend.RustBackend) -> None:
         self._backend = backend
+        # number of times a prepared statement was run after its first use
+        self.prepared_reuses = 0
 
     # Transactions
     ###############
@@ -54,37 +61,72 @@ class DBProxy:
     # Querying
     ################
 
+    # The query methods accept an optional list of ids, which the SQL can
+    # refer to as the bound_ids table:
+    #
+    #   db.list("select id from cards where nid in bound_ids", ids=nids)
+    #
+    # The ids are sent to the backend in binary form, and the SQL does not
+    # change with the ids, so this should be preferred over ids2str() when
+    # the list may be large.
+
     def _query(
         self,
         sql: str,
         *args: ValueForDB,
         first_row_only: bool = False,
+        ids: Iterable[int] | None = None,
         **kwargs: ValueForDB,
     ) -> list[Row]:
         sql, args2 = emulate_named_args(sql, args, kwargs)
         # fetch rows
-        return self._backend.db_query(sql, args2, first_row_only)
+        return self._backend.db_query(
+            sql, args2, first_row_only, ids=encode_id_set(ids)
+        )
 
     # Query shortcuts
     ###################
 
-    def all(self, sql: str, *args: ValueForDB, **kwargs: ValueForDB) -> list[Row]:
-        return self._query(sql, *args, first_row_only=False, **kwargs)
+    def all(
+        self,
+        sql: str,
+        *args: ValueForDB,
+        ids: Iterable[int] | None = None,
+        **kwargs: ValueForDB,
+    ) -> list[Row]:
+        return self._query(sql, *args, first_row_only=False, ids=ids, **kwargs)
 
     def list(
-        self, sql: str, *args: ValueForDB, **kwargs: ValueForDB
+        self,
+        sql: str,
+        *args: ValueForDB,
+        ids: Iterable[int] | None = None,
+        **kwargs: ValueForDB,
     ) -> list[ValueFromDB]:
-        return [x[0] for x in self._query(sql, *args, first_row_only=False, **kwargs)]
+        rows = self._query(sql, *args, first_row_only=False, ids=ids, **kwargs)
+        return [x[0] for x in rows]
 
-    def first(self, sql: str, *args: ValueForDB, **kwargs: ValueForDB) -> Row | None:
-        rows = self._query(sql, *args, first_row_only=True, **kwargs)
+    def first(
+        self,
+        sql: str,
+        *args: ValueForDB,
+        ids: Iterable[int] | None = None,
+        **kwargs: ValueForDB,
+    ) -> Row | None:
+        rows = self._query(sql, *args, first_row_only=True, ids=ids, **kwargs)
         if rows:
             return rows[0]
         else:
             return None
 
-    def scalar(self, sql: str, *args: ValueForDB, **kwargs: ValueForDB) -> ValueFromDB:
-        rows = self._query(sql, *args, first_row_only=True, **kwargs)
+    def scalar(
+        self,
+        sql: str,
+        *args: ValueForDB,
+        ids: Iterable[int] | None = None,
+        **kwargs: ValueForDB,
+    ) -> ValueFromDB:
+        rows = self._query(sql, *args, first_row_only=True, ids=ids, **kwargs)
         if rows:
             return rows[0][0]
         else:
@@ -94,6 +136,91 @@ class DBProxy:
     # with .all()
     execute = all
 
+    # Prepared statements
+    ################
+
+    def prepare(self, sql: str) -> PreparedStatement:
+        """Register SQL with the backend so it can be run repeatedly.
+
+        Each run only sends the statement handle and its arguments, and skips
+        the SQL parsing and named argument handling of the other methods, so
+        this is useful for queries that are run many times in a loop. Only
+        positional arguments are supported.
+
+        Call .close() on the result (or use it as a context manager) when done.
+        """
+        return PreparedStatement(self, sql, self._backend.db_prepare(sql))
+
+    # Columnar results
+    ################
+
+    def columns(
+        self,
+        sql: str,
+        *args: ValueForDB,
+        numpy: bool = False,
+        ids: Iterable[int] | None = None,
+        **kwargs: ValueForDB,
+    ) -> list[Sequence[ValueFromDB]]:
+        """Return the results of a query as one sequence per column.
+
+        Columns that contain only integers or only floats are returned as
+        array('q') or array('d') respectively, without building a tuple for
+        each row. Other columns (text, or ones containing NULLs) are returned
+        as lists. This is intended for analytics over large tables, such as
+        the revlog.
+
+        If numpy is true, the arrays are wrapped in NumPy arrays without
+        copying. NumPy is not a dependency of Anki, so must be installed
+        separately in that case.
+        """
+        sql, args2 = emulate_named_args(sql, args, kwargs)
+        columns = self._backend.db_columns(sql, args2, ids=encode_id_set(ids))
+        if numpy:
+            import numpy as np
+
+            columns = [
+                np.frombuffer(column, dtype=column.typecode)
+                if isinstance(column, array)
+                else column
+                for column in columns
+            ]
+        return columns
+
+    # Streaming
+    ################
+
+    def iterate(
+        self,
+        sql: str,
+        *args: ValueForDB,
+        batch_size: int = 1000,
+        ids: Iterable[int] | None = None,
+        **kwargs: ValueForDB,
+    ) -> Iterator[Row]:
+        """Yield the rows of a query, fetching them from the backend in batches.
+
+        Unlike .all(), only batch_size rows are read from the database and
+        decoded into Python objects at a time, so this should be preferred
+        when walking over large tables. Only select statements can be
+        iterated. As each batch reruns the query, avoid modifying the queried
+        tables until the loop has finished. If the loop is exited early, the
+        remaining rows are never read.
+        """
+        sql, args2 = emulate_named_args(sql, args, kwargs)
+        cursor, rows = self._backend.db_iterate(
+            sql, args2, batch_size, ids=encode_id_set(ids)
+        )
+        try:
+            while True:
+                yield from rows
+                if cursor is None:
+                    return
+                cursor, rows = self._backend.db_fetch(cursor)
+        finally:
+            if cursor is not None:
+                self._backend.db_close(cursor)
+
     # Updates
     ################
 
@@ -105,6 +232,172 @@ class DBProxy:
         self._backend.db_execute_many(sql, list_args)
 
 
+class PreparedStatement:
+    """A query returned by DBProxy.prepare()."""
+
+    def __init__(self, db: DBProxy, sql: str, statement: int) -> None:
+        self.sql = sql
+        self.runs = 0
+        self._db = db
+        self._statement: int | None = statement
+
+    def _run(self, args: Sequence[ValueForDB], first_row_only: bool) -> list[Row]:
+        if self._statement is None:
+            raise Exception("prepared statement has been closed")
+        if self.runs:
+            self._db.prepared_reuses += 1
+        self.runs += 1
+        return self._db._backend.db_run(self._statement, args, first_row_only)
+
+    def all(self, *args: ValueForDB) -> list[Row]:
+        return self._run(args, first_row_only=False)
+
+    def list(self, *args: ValueForDB) -> list[ValueFromDB]:
+        return [x[0] for x in self._run(args, first_row_only=False)]
+
+    def first(self, *args: ValueForDB) -> Row | None:
+        rows = self._run(args, first_row_only=True)
+        if rows:
+            return rows[0]
+        else:
+            return None
+
+    def scalar(self, *args: ValueForDB) -> ValueFromDB:
+        rows = self._run(args, first_row_only=True)
+        if rows:
+            return rows[0][0]
+        else:
+            return None
+
+    execute = all
+
+    def close(self) -> None:
+        if self._statement is not None:
+            self._db._backend.db_finalize(self._statement)
+            self._statement = None
+
+    def __enter__(self) -> PreparedStatement:
+        return self
+
+    def __exit__(self, *args: Any) -> None:
+        self.close()
+
+
+# Binary row transport
+##########################################################################
+
+# Large results are returned by the backend column by column in a compact
+# binary format instead of JSON; see encode_binary_rows() in
+# rslib/src/backend/dbproxy.rs for the layout.
+
+BINARY_ROWS_MAGIC = b"\x00"
+
+_COLUMN_INT = 0
+_COLUMN_DOUBLE = 1
+_COLUMN_STRING = 2
+_COLUMN_MIXED = 3
+
+_VALUE_NULL = 0
+_VALUE_INT = 1
+_VALUE_DOUBLE = 2
+_VALUE_STRING = 3
+_VALUE_BLOB = 4
+
+_u32 = struct.Struct("<I")
+_i64 = struct.Struct("<q")
+_f64 = struct.Struct("<d")
+
+
+def is_binary_rows(data: bytes) -> bool:
+    return data[:1] == BINARY_ROWS_MAGIC
+
+
+def decode_binary_rows(data: bytes) -> list[Row]:
+    columns = decode_binary_columns(data)
+    if not columns:
+        return []
+    return [list(row) for row in zip(*columns)]
+
+
+def decode_binary_columns(data: bytes) -> list[Sequence[ValueFromDB]]:
+    """Decode a binary result into one sequence per column.
+
+    Columns holding only integers or only floats are returned as arrays,
+    which are filled in bulk without creating a Python object per value.
+    Columns holding only strings are decoded with a single call.
+    """
+    view = memoryview(data)
+    (row_count,) = _u32.unpack_from(view, 1)
+    (column_count,) = _u32.unpack_from(view, 5)
+    pos = 9
+    columns: list[Sequence[ValueFromDB]] = []
+    for _ in range(column_count):
+        kind = view[pos]
+        pos += 1
+        if kind in (_COLUMN_INT, _COLUMN_DOUBLE):
+            numbers = array("q" if kind == _COLUMN_INT else "d")
+            end = pos + row_count * 8
+            numbers.frombytes(view[pos:end])
+            if sys.byteorder == "big":
+                numbers.byteswap()
+            columns.append(numbers)
+            pos = end
+        elif kind == _COLUMN_STRING:
+            # lengths are in characters, so the column is decoded in one go
+            # and then sliced
+            lengths = struct.unpack_from(f"<{row_count}I", view, pos)
+            offsets = [0, *accumulate(lengths)]
+            pos += row_count * 4
+            (byte_len,) = _u32.unpack_from(view, pos)
+            pos += 4
+            end = pos + byte_len
+            text = str(view[pos:end], "utf8")
+            columns.append([text[a:b] for a, b in zip(offsets, offsets[1:])])
+            pos = end
+        else:
+            values, pos = _decode_mixed_column(view, pos, row_count)
+            columns.append(values)
+    return columns
+
+
+def _decode_mixed_column(
+    view: memoryview, pos: int, row_count: int
+) -> tuple[list[ValueFromDB], int]:
+    values: list[ValueFromDB] = []
+    for _ in range(row_count):
+        tag = view[pos]
+        pos += 1
+        if tag == _VALUE_NULL:
+            values.append(None)
+        elif tag == _VALUE_INT:
+            values.append(_i64.unpack_from(view, pos)[0])
+            pos += 8
+        elif tag == _VALUE_DOUBLE:
+            values.append(_f64.unpack_from(view, pos)[0])
+            pos += 8
+        else:
+            (length,) = _u32.unpack_from(view, pos)
+            pos += 4
+            end = pos + length
+            if tag == _VALUE_STRING:
+                values.append(str(view[pos:end], "utf8"))
+            else:
+                # the JSON transport represents blobs as a list of ints
+                values.append(list(view[pos:end]))
+            pos = end
+    return values, pos
+
+
+def encode_id_set(ids: Iterable[int] | None) -> str | None:
+    "Encode ids for the backend's bound_ids table, as base64 little-endian i64s."
+    if ids is None:
+        return None
+    numbers = array("q", ids)
+    if sys.byteorder == "big":
+        numbers.byteswap()
+    return base64.b64encode(numbers.tobytes()).decode("ascii")
+
+
 # convert kwargs to list format
 def emulate_named_args(
     sql: str, args: tuple, kwargs: dict[str, Any]
@@ -11,17 +11,23 @@ import shutil
 import threading
 import time
 import unicodedata
+import weakref
 import zipfile
-from collections.abc import Sequence
+from collections import deque
+from collections.abc import Iterable, Sequence
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass
 from io import BufferedWriter
 from typing import Any
-from zipfile import ZipFile
+from zipfile import ZipFile, ZipInfo
 
 from anki import hooks
 from anki.cards import CardId
 from anki.collection import Collection
 from anki.decks import DeckId
-from anki.utils import ids2str, namedtmp, split_fields, strip_html
+from anki.media import MediaManager
+from anki.models import NotetypeDict
+from anki.utils import namedtmp, split_fields, strip_html_list
 
 
 class Exporter:
@@ -62,6 +68,13 @@ class Exporter:
 
         return text
 
+    def processTexts(self, texts: Sequence[str]) -> list[str]:
+        "Like processText(), but strips the HTML of all texts in one go."
+        if self.includeHTML is False:
+            texts = self.stripHTMLList(texts)
+
+        return [self.escapeText(text) for text in texts]
+
     def escapeText(self, text: str) -> str:
         "Escape newlines, tabs, CSS and quotechar."
         # fixme: we should probably quote fields with newlines
@@ -76,14 +89,21 @@ class Exporter:
         return text
 
     def stripHTML(self, text: str) -> str:
+        return self.stripHTMLList([text])[0]
+
+    def stripHTMLList(self, texts: Sequence[str]) -> list[str]:
         # very basic conversion to text
-        s = text
-        s = re.sub(r"(?i)<(br ?/?|div|p)>", " ", s)
-        s = re.sub(r"\[sound:[^]]+\]", "", s)
-        s = strip_html(s)
-        s = re.sub(r"[ \n\t]+", " ", s)
-        s = s.strip()
-        return s
+        stripped = []
+        for s in texts:
+            s = re.sub(r"(?i)<(br ?/?|div|p)>", " ", s)
+            s = re.sub(r"\[sound:[^]]+\]", "", s)
+            stripped.append(s)
+        out = []
+        for s in strip_html_list(stripped):
+            s = re.sub(r"[ \n\t]+", " ", s)
+            s = s.strip()
+            out.append(s)
+        return out
 
     def cardIds(self) -> Any:
         if self.cids is not None:
@@ -113,18 +133,19 @@ class TextCardExporter(Exporter):
 
     def doExport(self, file) -> None:
         ids = sorted(self.cardIds())
-        strids = ids2str(ids)
-
-        def esc(s):
-            # strip off the repeated question in answer if exists
-            s = re.sub("(?si)^.*<hr id=answer>\n*", "", s)
-            return self.processText(s)
 
-        out = ""
+        texts = []
         for cid in ids:
             c = self.col.get_card(cid)
-            out += esc(c.question())
-            out += "\t" + esc(c.answer()) + "\n"
+            for s in (c.question(), c.answer()):
+                # strip off the repeated question in answer if exists
+                texts.append(re.sub("(?si)^.*<hr id=answer>\n*", "", s))
+        texts = self.processTexts(texts)
+
+        out = "".join(
+            f"{question}\t{answer}\n"
+            for question, answer in zip(texts[::2], texts[1::2])
+        )
         file.write(out.encode("utf-8"))
 
 
@@ -147,21 +168,32 @@ class TextNoteExporter(Exporter):
 
     def doExport(self, file: BufferedWriter) -> None:
         cardIds = self.cardIds()
-        data = []
+        notes = []
+        texts: list[str] = []
         for id, flds, tags in self.col.db.execute(
             """
 select guid, flds, tags from notes
 where id in
 (select nid from cards
-where cards.id in %s)"""
-            % ids2str(cardIds)
+where cards.id in bound_ids)""",
+            ids=cardIds,
         ):
+            fields = split_fields(flds)
+            notes.append((id, len(fields), tags))
+            texts.extend(fields)
+        # fields of all notes are processed together
+        texts = self.processTexts(texts)
+
+        data = []
+        start = 0
+        for id, field_count, tags in notes:
             row = []
             # note id
             if self.includeID:
                 row.append(str(id))
             # fields
-            row.extend([self.processText(f) for f in split_fields(flds)])
+            row.extend(texts[start : start + field_count])
+            start += field_count
             # tags
             if self.includeTags:
                 row.append(tags.strip())
@@ -210,7 +242,7 @@ class AnkiExporter(Exporter):
         nids = {}
         data: list[Sequence] = []
         for row in self.src.db.execute(
-            "select * from cards where id in " + ids2str(cids)
+            "select * from cards where id in bound_ids", ids=cids
         ):
             # clear flags
             row = list(row)
@@ -221,9 +253,10 @@ class AnkiExporter(Exporter):
             "insert into cards values (?,?,?,?,?,?,?,?,?,?,?,?,?,?,?,?,?,?)", data
         )
         # notes
-        strnids = ids2str(list(nids.keys()))
         notedata = []
-        for row in self.src.db.all("select * from notes where id in " + strnids):
+        for row in self.src.db.all(
+            "select * from notes where id in bound_ids", ids=nids
+        ):
             # remove system tags if not exporting scheduling info
             if not self.includeSched:
                 row = list(row)
@@ -233,10 +266,14 @@ class AnkiExporter(Exporter):
             "insert into notes values (?,?,?,?,?,?,?,?,?,?,?)", notedata
         )
         # models used by the notes
-        mids = self.dst.db.list("select distinct mid from notes where id in " + strnids)
+        mids = self.dst.db.list(
+            "select distinct mid from notes where id in bound_ids", ids=nids
+        )
         # card history and revlog
         if self.includeSched:
-            data = self.src.db.all("select * from revlog where cid in " + ids2str(cids))
+            data = self.src.db.all(
+                "select * from revlog where cid in bound_ids", ids=cids
+            )
             self.dst.db.executemany(
                 "insert into revlog values (?,?,?,?,?,?,?,?,?)", data
             )
@@ -272,29 +309,17 @@ class AnkiExporter(Exporter):
             if dc["id"] in dconfs:
                 self.dst.decks.update_config(dc)
         # find used media
-        media = {}
+        media: dict[str, bool] = {}
         self.mediaDir = self.src.media.dir()
         if self.includeMedia:
-            for row in notedata:
-                flds = row[6]
-                mid = row[2]
-                for file in self.src.media.files_in_str(mid, flds):
-                    # skip files in subdirs
-                    if file != os.path.basename(file):
-                        continue
-                    media[file] = True
+            index = media_reference_index(self.src)
+            for file in index.files_in_notes(
+                (row[0], row[2], row[6]) for row in notedata
+            ):
+                media[file] = True
             if self.mediaDir:
-                for fname in os.listdir(self.mediaDir):
-                    path = os.path.join(self.mediaDir, fname)
-                    if os.path.isdir(path):
-                        continue
-                    if fname.startswith("_"):
-                        # Scan all models in mids for reference to fname
-                        for m in self.src.models.all():
-                            if int(m["id"]) in mids:
-                                if self._modelHasMedia(m, fname):
-                                    media[fname] = True
-                                    break
+                for file in index.files_in_notetypes(mids, self.mediaDir):
+                    media[file] = True
         self.mediaFiles = list(media.keys())
         self.dst.crt = self.src.crt
         # todo: tags?
@@ -310,20 +335,162 @@ class AnkiExporter(Exporter):
     def removeSystemTags(self, tags: str) -> str:
         return self.src.tags.rem_from_str("marked leech", tags)
 
-    def _modelHasMedia(self, model, fname) -> bool:
-        # First check the styling
-        if fname in model["css"]:
-            return True
-        # If no reference to fname then check the templates as well
-        for t in model["tmpls"]:
-            if fname in t["qfmt"] or fname in t["afmt"]:
-                return True
-        return False
+
+# Media references
+######################################################################
+
+
+class MediaReferenceIndex:
+    """Remembers the media files referenced by each note and notetype, so that
+    repeated exports only need to scan notes and notetypes that have changed.
+
+    Entries are keyed on a note's fields and a notetype's modification time, so
+    edits made after an entry was recorded are picked up on the next lookup."""
+
+    def __init__(self, col: Collection) -> None:
+        self.col = col.weakref()
+        # nid -> (mid, notetype mtime, fields, files)
+        self._notes: dict[int, tuple[int, int, str, list[str]]] = {}
+        # mid -> (notetype mtime, css and templates)
+        self._notetypes: dict[int, tuple[int, str]] = {}
+
+    def files_in_notes(self, notes: Iterable[tuple[int, int, str]]) -> list[str]:
+        """Local files in the media folder referenced by the fields of the
+        provided (nid, mid, flds) rows, in order of first reference."""
+        models: dict[int, NotetypeDict] = {}
+        files: dict[str, bool] = {}
+        for nid, mid, flds in notes:
+            if mid not in models:
+                models[mid] = self.col.models.get(mid)
+            for file in self._files_in_note(nid, models[mid], flds):
+                files[file] = True
+        return list(files)
+
+    def files_in_notetypes(self, mids: Iterable[int], media_folder: str) -> list[str]:
+        """Files in the media folder starting with an underscore that are
+        mentioned in the styling or templates of the provided notetypes."""
+        text = "\0".join(self._notetype_text(mid) for mid in mids)
+        files = []
+        with os.scandir(media_folder) as it:
+            for entry in it:
+                # check the name first, to avoid stat-ing every file
+                if (
+                    entry.name.startswith("_")
+                    and entry.name in text
+                    and not entry.is_dir()
+                ):
+                    files.append(entry.name)
+        return files
+
+    def clear(self) -> None:
+        self._notes.clear()
+        self._notetypes.clear()
+
+    def _files_in_note(self, nid: int, model: NotetypeDict, flds: str) -> list[str]:
+        key = (model["id"], model["mod"], flds)
+        entry = self._notes.get(nid)
+        if entry is not None and entry[:3] == key:
+            return entry[3]
+        files = [
+            file
+            for file in self.col.media._files_in_str(model, flds)
+            # skip files in subdirs
+            if file == os.path.basename(file)
+        ]
+        self._notes[nid] = (*key, files)
+        return files
+
+    def _notetype_text(self, mid: int) -> str:
+        model = self.col.models.get(mid)
+        if not model:
+            return ""
+        entry = self._notetypes.get(mid)
+        if entry is not None and entry[0] == model["mod"]:
+            return entry[1]
+        text = "\0".join(
+            [model["css"]]
+            + [fmt for t in model["tmpls"] for fmt in (t["qfmt"], t["afmt"])]
+        )
+        self._notetypes[mid] = (model["mod"], text)
+        return text
+
+
+_reference_indexes: weakref.WeakKeyDictionary[MediaManager, MediaReferenceIndex] = (
+    weakref.WeakKeyDictionary()
+)
+
+
+def media_reference_index(col: Collection) -> MediaReferenceIndex:
+    "The reference index for col, which is kept for as long as col is open."
+    index = _reference_indexes.get(col.media)
+    if index is None:
+        index = _reference_indexes[col.media] = MediaReferenceIndex(col)
+    return index
 
 
 # Packaged Anki decks
 ######################################################################
 
+MEDIA_EXPORT_WORKERS = min(os.cpu_count() or 1, 8)
+# files larger than this are streamed into the package by the writer, instead
+# of being read into memory ahead of time by a worker
+MEDIA_EXPORT_MAX_BUFFERED_FILE = 16 * 1024 * 1024
+# the chunk size zipfile uses when writing a file from disk
+_ZIP_COPY_CHUNK = 1024 * 8
+
+
+@dataclass
+class MediaExportProgress:
+    files: int
+    total_files: int
+    bytes: int
+    elapsed_secs: float
+
+    def megabytes_per_sec(self) -> float:
+        return self.bytes / 1024 / 1024 / max(self.elapsed_secs, 0.001)
+
+    def files_per_sec(self) -> float:
+        return self.files / max(self.elapsed_secs, 0.001)
+
+
+@dataclass
+class _MediaEntry:
+    info: ZipInfo
+    # None if the file is too large to buffer, and is copied from path instead
+    data: bytes | None
+
+
+def _read_media_entry(path: str, name: str) -> _MediaEntry | None:
+    "Prepare a media file for the package. Safe to call from worker threads."
+    if os.path.isdir(path) or not os.path.exists(path):
+        return None
+    # same as ZipFile.write(), so packages are unchanged
+    info = ZipInfo.from_file(path, name, strict_timestamps=False)
+    if re.search(r"\.svg$", path, re.IGNORECASE):
+        info.compress_type = zipfile.ZIP_DEFLATED
+    else:
+        info.compress_type = zipfile.ZIP_STORED
+    if info.file_size > MEDIA_EXPORT_MAX_BUFFERED_FILE:
+        return _MediaEntry(info, None)
+    with open(path, "rb") as file:
+        data = file.read()
+    # the file may have changed since it was stat-ed
+    info.file_size = len(data)
+    return _MediaEntry(info, data)
+
+
+def _write_media_entry(z: ZipFile, path: str, entry: _MediaEntry) -> None:
+    # written in the same chunks as ZipFile.write(), so compressed entries are
+    # byte-for-byte the same
+    with z.open(entry.info, "w") as dest:
+        if entry.data is None:
+            with open(path, "rb") as src:
+                shutil.copyfileobj(src, dest, _ZIP_COPY_CHUNK)
+        else:
+            view = memoryview(entry.data)
+            for start in range(0, len(view), _ZIP_COPY_CHUNK):
+                dest.write(view[start : start + _ZIP_COPY_CHUNK])
+
 
 class AnkiPackageExporter(AnkiExporter):
     ext = ".apkg"
@@ -366,20 +533,48 @@ class AnkiPackageExporter(AnkiExporter):
         return media
 
     def _exportMedia(self, z: ZipFile, files: list[str], fdir: str) -> dict[str, str]:
+        """Add files to z, named after their position in files. Files are read
+        by a pool of workers, and written in order by the calling thread."""
         media = {}
-        for c, file in enumerate(files):
-            cStr = str(c)
-            file = hooks.media_file_filter(file)
-            mpath = os.path.join(fdir, file)
-            if os.path.isdir(mpath):
-                continue
-            if os.path.exists(mpath):
-                if re.search(r"\.svg$", file, re.IGNORECASE):
-                    z.write(mpath, cStr, zipfile.ZIP_DEFLATED)
-                else:
-                    z.write(mpath, cStr, zipfile.ZIP_STORED)
-                media[cStr] = unicodedata.normalize("NFC", file)
-                hooks.media_files_did_export(c)
+        progress = MediaExportProgress(
+            files=0, total_files=len(files), bytes=0, elapsed_secs=0
+        )
+        start = last_report = time.monotonic()
+        # bounds the number of files held in memory at once
+        lookahead = MEDIA_EXPORT_WORKERS * 4
+        pending: deque[tuple[int, str, str, Future[_MediaEntry | None]]] = deque()
+        with ThreadPoolExecutor(max_workers=MEDIA_EXPORT_WORKERS) as pool:
+            queued = enumerate(files)
+            try:
+                while True:
+                    for c, file in queued:
+                        file = hooks.media_file_filter(file)
+                        mpath = os.path.join(fdir, file)
+                        future = pool.submit(_read_media_entry, mpath, str(c))
+                        pending.append((c, file, mpath, future))
+                        if len(pending) >= lookahead:
+                            break
+                    if not pending:
+                        break
+                    c, file, mpath, future = pending.popleft()
+                    if not (entry := future.result()):
+                        continue
+                    _write_media_entry(z, mpath, entry)
+                    media[str(c)] = unicodedata.normalize("NFC", file)
+                    hooks.media_files_did_export(c)
+
+                    progress.files += 1
+                    progress.bytes += entry.info.file_size
+                    now = time.monotonic()
+                    if now - last_report >= 0.25:
+                        last_report = now
+                        progress.elapsed_secs = now - start
+                        hooks.media_export_did_progress(progress)
+            finally:
+                for *_, future in pending:
+                    future.cancel()
+        progress.elapsed_secs = time.monotonic() - start
+        hooks.media_export_did_progress(progress)
 
         return media
 
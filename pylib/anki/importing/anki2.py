@@ -6,6 +6,7 @@ from __future__ import annotations
 
 import os
 import unicodedata
+from collections.abc import Callable
 from typing import Any
 
 from anki.cards import CardId
@@ -15,11 +16,19 @@ from anki.decks import DeckId, DeckManager
 from anki.importing.base import Importer
 from anki.models import NotetypeId
 from anki.notes import NoteId
-from anki.utils import int_time, join_fields, split_fields, strip_html_media
+from anki.utils import (
+    int_time,
+    join_fields,
+    split_fields,
+    strip_html_media_list,
+)
 
 GUID = 1
 MID = 2
 MOD = 3
+# guids are looked up this many at a time, to stay below SQLite's limit on the
+# number of variables in a statement
+GUID_LOOKUP_CHUNK = 500
 
 
 class V2ImportIntoV1(Exception):
@@ -34,6 +43,8 @@ class Anki2Importer(Importer):
     needMapper = False
     deckPrefix: str | None = None
     allowUpdate = True
+    # if set, import in batches of this many notes; see _importInBatches()
+    batchSize: int | None = None
     src: Collection
     dst: Collection
 
@@ -75,8 +86,11 @@ class Anki2Importer(Importer):
             self.dst.decks.select(id)
         self._prepareTS()
         self._prepareModels()
-        self._importNotes()
-        self._importCards()
+        if self.batchSize:
+            self._importInBatches()
+        else:
+            self._importNotes()
+            self._importCards()
         self._importStaticMedia()
         self._postImport()
         self.dst.optimize()
@@ -84,16 +98,16 @@ class Anki2Importer(Importer):
     # Notes
     ######################################################################
 
-    def _logNoteRow(self, action: str, noteRow: list[str]) -> None:
-        self.log.append(
-            "[{}] {}".format(action, strip_html_media(noteRow[6].replace("\x1f", ", ")))
-        )
+    def _logNoteRows(self, action: str, noteRows: list[list[Any]]) -> None:
+        fields = [noteRow[6].replace("\x1f", ", ") for noteRow in noteRows]
+        for text in strip_html_media_list(fields):
+            self.log.append(f"[{action}] {text}")
 
     def _importNotes(self) -> None:
         # build guid -> (id,mod,mid) hash & map of existing note ids
         self._notes: dict[str, tuple[NoteId, int, NotetypeId]] = {}
         existing = {}
-        for id, guid, mod, mid in self.dst.db.execute(
+        for id, guid, mod, mid in self.dst.db.iterate(
             "select id, guid, mod, mid from notes"
         ):
             self._notes[guid] = (id, mod, mid)
@@ -109,79 +123,35 @@ class Anki2Importer(Importer):
         dupesIdentical = []
         dupesIgnored = []
         total = 0
-        for note in self.src.db.execute("select * from notes"):
+        for note in self.src.db.iterate("select * from notes"):
             total += 1
             # turn the db result into a mutable list
             note = list(note)
-            shouldAdd = self._uniquifyNote(note)
-            if shouldAdd:
-                # ensure id is unique
-                while note[0] in existing:
-                    note[0] += 999
+            action = self._prepareNote(note, usn, lambda id: id in existing)
+            if action == "add":
                 existing[note[0]] = True
-                # bump usn
-                note[4] = usn
-                # update media references in case of dupes
-                note[6] = self._mungeMedia(note[MID], note[6])
                 add.append(note)
                 dirty.append(note[0])
-                # note we have the added the guid
-                self._notes[note[GUID]] = (note[0], note[3], note[MID])
-            else:
-                # a duplicate or changed schema - safe to update?
-                if self.allowUpdate:
-                    oldNid, oldMod, oldMid = self._notes[note[GUID]]
-                    # will update if incoming note more recent
-                    if oldMod < note[MOD]:
-                        # safe if note types identical
-                        if oldMid == note[MID]:
-                            # incoming note should use existing id
-                            note[0] = oldNid
-                            note[4] = usn
-                            note[6] = self._mungeMedia(note[MID], note[6])
-                            update.append(note)
-                            dirty.append(note[0])
-                        else:
-                            dupesIgnored.append(note)
-                            self._ignoredGuids[note[GUID]] = True
-                    else:
-                        dupesIdentical.append(note)
-
-        self.log.append(self.dst.tr.importing_notes_found_in_file(val=total))
-
-        if dupesIgnored:
-            self.log.append(
-                self.dst.tr.importing_notes_skipped_update_due_to_notetype(
-                    val=len(dupesIgnored)
-                )
-            )
-        if update:
-            self.log.append(
-                self.dst.tr.importing_notes_updated_as_file_had_newer(val=len(update))
-            )
-        if add:
-            self.log.append(self.dst.tr.importing_notes_added_from_file(val=len(add)))
-        if dupesIdentical:
-            self.log.append(
-                self.dst.tr.importing_notes_skipped_as_theyre_already_in(
-                    val=len(dupesIdentical),
-                )
-            )
+            elif action == "update":
+                update.append(note)
+                dirty.append(note[0])
+            elif action == "ignored":
+                dupesIgnored.append(note)
+            elif action == "identical":
+                dupesIdentical.append(note)
 
-        self.log.append("")
+        self._logNoteCounts(
+            total, len(dupesIgnored), len(update), len(add), len(dupesIdentical)
+        )
 
         if dupesIgnored:
-            for row in dupesIgnored:
-                self._logNoteRow(self.dst.tr.importing_skipped(), row)
+            self._logNoteRows(self.dst.tr.importing_skipped(), dupesIgnored)
         if update:
-            for row in update:
-                self._logNoteRow(self.dst.tr.importing_updated(), row)
+            self._logNoteRows(self.dst.tr.importing_updated(), update)
         if add:
-            for row in add:
-                self._logNoteRow(self.dst.tr.importing_added(), row)
+            self._logNoteRows(self.dst.tr.importing_added(), add)
         if dupesIdentical:
-            for row in dupesIdentical:
-                self._logNoteRow(self.dst.tr.importing_identical(), row)
+            self._logNoteRows(self.dst.tr.importing_identical(), dupesIdentical)
 
         # export info for calling code
         self.dupes = len(dupesIdentical)
@@ -196,6 +166,67 @@ class Anki2Importer(Importer):
         )
         self.dst.after_note_updates(dirty, mark_modified=False, generate_cards=False)
 
+    def _logNoteCounts(
+        self, total: int, ignored: int, updated: int, added: int, identical: int
+    ) -> None:
+        self.log.append(self.dst.tr.importing_notes_found_in_file(val=total))
+
+        if ignored:
+            self.log.append(
+                self.dst.tr.importing_notes_skipped_update_due_to_notetype(val=ignored)
+            )
+        if updated:
+            self.log.append(
+                self.dst.tr.importing_notes_updated_as_file_had_newer(val=updated)
+            )
+        if added:
+            self.log.append(self.dst.tr.importing_notes_added_from_file(val=added))
+        if identical:
+            self.log.append(
+                self.dst.tr.importing_notes_skipped_as_theyre_already_in(
+                    val=identical,
+                )
+            )
+
+        self.log.append("")
+
+    def _prepareNote(
+        self, note: list[Any], usn: int, idInUse: Callable[[int], bool]
+    ) -> str | None:
+        """Adjust a src note row for the dst collection.
+
+        Returns 'add', 'update', 'identical' (an existing note is not older),
+        'ignored' (the notetype schema changed), or None if updates are
+        disabled and the note already exists."""
+        shouldAdd = self._uniquifyNote(note)
+        if shouldAdd:
+            # ensure id is unique
+            while idInUse(note[0]):
+                note[0] += 999
+            # bump usn
+            note[4] = usn
+            # update media references in case of dupes
+            note[6] = self._mungeMedia(note[MID], note[6])
+            # note we have the added the guid
+            self._notes[note[GUID]] = (note[0], note[3], note[MID])
+            return "add"
+        # a duplicate or changed schema - safe to update?
+        if not self.allowUpdate:
+            return None
+        oldNid, oldMod, oldMid = self._notes[note[GUID]]
+        # will update if incoming note more recent
+        if oldMod >= note[MOD]:
+            return "identical"
+        # safe if note types identical
+        if oldMid != note[MID]:
+            self._ignoredGuids[note[GUID]] = True
+            return "ignored"
+        # incoming note should use existing id
+        note[0] = oldNid
+        note[4] = usn
+        note[6] = self._mungeMedia(note[MID], note[6])
+        return "update"
+
     # determine if note is a duplicate, and adjust mid and/or guid as required
     # returns true if note should be added
     def _uniquifyNote(self, note: list[Any]) -> bool:
@@ -314,7 +345,7 @@ class Anki2Importer(Importer):
         # build map of (guid, ord) -> cid and used id cache
         self._cards: dict[tuple[str, int], CardId] = {}
         existing = {}
-        for guid, ord, cid in self.dst.db.execute(
+        for guid, ord, cid in self.dst.db.iterate(
             "select f.guid, c.ord, c.id from cards c, notes f where c.nid = f.id"
         ):
             existing[cid] = True
@@ -325,7 +356,7 @@ class Anki2Importer(Importer):
         cnt = 0
         usn = self.dst.usn()
         aheadBy = self.src.sched.today - self.dst.sched.today
-        for card in self.src.db.execute(
+        for card in self.src.db.iterate(
             "select f.guid, f.mid, c.* from cards c, notes f where c.nid = f.id"
         ):
             guid = card[0]
@@ -346,44 +377,57 @@ class Anki2Importer(Importer):
             while card[0] in existing:
                 card[0] += 999
             existing[card[0]] = True
-            # update cid, nid, etc
-            card[1] = self._notes[guid][0]
-            card[2] = self._did(card[2])
-            card[4] = int_time()
-            card[5] = usn
-            # review cards have a due date relative to collection
-            if (
-                card[7] in (QUEUE_TYPE_REV, QUEUE_TYPE_DAY_LEARN_RELEARN)
-                or card[6] == CARD_TYPE_REV
-            ):
-                card[8] -= aheadBy
-            # odue needs updating too
-            if card[14]:
-                card[14] -= aheadBy
-            # if odid true, convert card from filtered to normal
-            if card[15]:
-                # odid
-                card[15] = 0
-                # odue
-                card[8] = card[14]
-                card[14] = 0
-                # queue
-                if card[6] == CARD_TYPE_LRN:  # type
-                    card[7] = QUEUE_TYPE_NEW
-                else:
-                    card[7] = card[6]
-                # type
-                if card[6] == CARD_TYPE_LRN:
-                    card[6] = CARD_TYPE_NEW
+            self._convertCard(card, self._notes[guid][0], usn, aheadBy)
             cards.append(card)
-            # we need to import revlog, rewriting card ids and bumping usn
-            for rev in self.src.db.execute("select * from revlog where cid = ?", scid):
-                rev = list(rev)
-                rev[1] = card[0]
-                rev[2] = self.dst.usn()
-                revlog.append(rev)
+            revlog.extend(self._convertRevlog(scid, card[0]))
             cnt += 1
-        # apply
+        self._applyCards(cards, revlog)
+
+    def _convertCard(
+        self, card: list[Any], nid: NoteId, usn: int, aheadBy: int
+    ) -> None:
+        "Update a src card row in place for the dst collection."
+        # update cid, nid, etc
+        card[1] = nid
+        card[2] = self._did(card[2])
+        card[4] = int_time()
+        card[5] = usn
+        # review cards have a due date relative to collection
+        if (
+            card[7] in (QUEUE_TYPE_REV, QUEUE_TYPE_DAY_LEARN_RELEARN)
+            or card[6] == CARD_TYPE_REV
+        ):
+            card[8] -= aheadBy
+        # odue needs updating too
+        if card[14]:
+            card[14] -= aheadBy
+        # if odid true, convert card from filtered to normal
+        if card[15]:
+            # odid
+            card[15] = 0
+            # odue
+            card[8] = card[14]
+            card[14] = 0
+            # queue
+            if card[6] == CARD_TYPE_LRN:  # type
+                card[7] = QUEUE_TYPE_NEW
+            else:
+                card[7] = card[6]
+            # type
+            if card[6] == CARD_TYPE_LRN:
+                card[6] = CARD_TYPE_NEW
+
+    def _convertRevlog(self, scid: int, cid: int) -> list[list[Any]]:
+        "Revlog of src card, rewritten for the dst card id and usn."
+        revlog = []
+        for rev in self.src.db.execute("select * from revlog where cid = ?", scid):
+            rev = list(rev)
+            rev[1] = cid
+            rev[2] = self.dst.usn()
+            revlog.append(rev)
+        return revlog
+
+    def _applyCards(self, cards: list[list[Any]], revlog: list[list[Any]]) -> None:
         self.dst.db.executemany(
             """
 insert or ignore into cards values (?,?,?,?,?,?,?,?,?,?,?,?,?,?,?,?,?,?)""",
@@ -395,6 +439,181 @@ insert or ignore into revlog values (?,?,?,?,?,?,?,?,?)""",
             revlog,
         )
 
+    # Batched import
+    ######################################################################
+    # Rather than mapping every note and card of both collections in memory,
+    # source notes are processed in id order, batchSize at a time, together
+    # with their cards and review history. Guids are looked up through an
+    # indexed temporary table. Each batch is committed on its own, along with
+    # the id of its last note, so running an interrupted import again will
+    # resume after the last completed batch. Only summary counts are logged.
+
+    def _importInBatches(self) -> None:
+        if self.source_needs_upgrade:
+            self.src.upgrade_to_v2_scheduler()
+        self.dst.db.execute(
+            """
+create temp table if not exists import_guids
+(guid text primary key, id integer, mod integer, mid integer)"""
+        )
+        self.dst.db.execute(
+            "insert or replace into temp.import_guids "
+            "select guid, id, mod, mid from notes"
+        )
+        self._ignoredGuids: dict[str, bool] = {}
+        self.added = self.updated = self.dupes = 0
+        self._batchTotal = self._batchIgnored = 0
+        resumeKey = self._resumeKey()
+        lastNid = self.dst.get_config(resumeKey, 0)
+        while True:
+            notes = self.src.db.all(
+                "select * from notes where id > ? order by id limit ?",
+                lastNid,
+                self.batchSize,
+            )
+            if not notes:
+                break
+            lastNid = notes[-1][0]
+            self.dst.db.transact(lambda: self._importBatch(notes, resumeKey, lastNid))
+        self.dst.remove_config(resumeKey)
+        self.dst.db.execute("drop table temp.import_guids")
+        self._logNoteCounts(
+            self._batchTotal,
+            self._batchIgnored,
+            self.updated,
+            self.added,
+            self.dupes,
+        )
+
+    def _resumeKey(self) -> str:
+        "Config key holding the last imported note id of this source."
+        crt, maxMod = self.src.db.first(
+            "select crt, (select max(mod) from notes) from col"
+        )
+        return f"importResume:{crt}:{maxMod}"
+
+    def _importBatch(self, notes: list[Any], resumeKey: str, lastNid: int) -> None:
+        usn = self.dst.usn()
+        # guid -> (id,mod,mid) for the existing notes in this batch
+        self._notes = {}
+        guids = [note[GUID] for note in notes]
+        for start in range(0, len(guids), GUID_LOOKUP_CHUNK):
+            chunk: list[str | None] = list(guids[start : start + GUID_LOOKUP_CHUNK])
+            # padded with nulls, which match nothing, so the sql doesn't change
+            chunk += [None] * (GUID_LOOKUP_CHUNK - len(chunk))
+            for guid, id, mod, mid in self.dst.db.execute(
+                "select guid, id, mod, mid from temp.import_guids where guid in (%s)"
+                % ",".join("?" * GUID_LOOKUP_CHUNK),
+                *chunk,
+            ):
+                self._notes[guid] = (id, mod, mid)
+        # src nid -> guid of notes whose cards should be imported
+        srcNids: dict[NoteId, str] = {}
+        add = []
+        update = []
+        dirty = []
+        # ids taken in dst, checked in bulk for the src ids and individually
+        # for any ids produced by resolving a conflict
+        srcIds = [note[0] for note in notes]
+        usedIds = set(
+            self.dst.db.list("select id from notes where id in bound_ids", ids=srcIds)
+        )
+        checkedIds = set(srcIds)
+
+        def idInUse(id: int) -> bool:
+            if id not in checkedIds:
+                checkedIds.add(id)
+                if self.dst.db.scalar("select 1 from notes where id = ?", id):
+                    usedIds.add(id)
+            return id in usedIds
+
+        for note in notes:
+            self._batchTotal += 1
+            note = list(note)
+            srcNid = note[0]
+            action = self._prepareNote(note, usn, idInUse)
+            if action == "add":
+                usedIds.add(note[0])
+                add.append(note)
+            elif action == "update":
+                update.append(note)
+            elif action == "ignored":
+                self._batchIgnored += 1
+                continue
+            elif action == "identical":
+                self.dupes += 1
+            if note[GUID] in self._ignoredGuids:
+                # the notetype schema changed, so the cards can't be imported
+                continue
+            if action in ("add", "update"):
+                dirty.append(note[0])
+                self.dst.db.execute(
+                    "insert or replace into temp.import_guids values (?,?,?,?)",
+                    note[GUID],
+                    note[0],
+                    note[MOD],
+                    note[MID],
+                )
+            srcNids[srcNid] = note[GUID]
+        self.dst.db.executemany(
+            "insert or replace into notes values (?,?,?,?,?,?,?,?,?,?,?)",
+            add + update,
+        )
+        self.added += len(add)
+        self.updated += len(update)
+        self.dst.after_note_updates(dirty, mark_modified=False, generate_cards=False)
+        self._importBatchCards(srcNids)
+        self.dst.set_config(resumeKey, lastNid)
+
+    def _importBatchCards(self, srcNids: dict[NoteId, str]) -> None:
+        if not srcNids:
+            return
+        dstNids = [self._notes[guid][0] for guid in srcNids.values()]
+        existing = set(
+            tuple(row)
+            for row in self.dst.db.all(
+                "select n.guid, c.ord from cards c, notes n where c.nid = n.id "
+                "and n.id in bound_ids",
+                ids=dstNids,
+            )
+        )
+        srcCards = self.src.db.all(
+            "select * from cards where nid in bound_ids order by id", ids=srcNids
+        )
+        # ids taken in dst, checked in bulk for the src ids and individually
+        # for any ids produced by resolving a conflict
+        srcCids = [card[0] for card in srcCards]
+        usedCids = set(
+            self.dst.db.list("select id from cards where id in bound_ids", ids=srcCids)
+        )
+        checkedCids = set(srcCids)
+
+        def cidInUse(id: int) -> bool:
+            if id not in checkedCids:
+                checkedCids.add(id)
+                if self.dst.db.scalar("select 1 from cards where id = ?", id):
+                    usedCids.add(id)
+            return id in usedCids
+
+        cards = []
+        revlog = []
+        usn = self.dst.usn()
+        aheadBy = self.src.sched.today - self.dst.sched.today
+        for card in srcCards:
+            guid = srcNids[card[1]]
+            if (guid, card[3]) in existing:
+                continue
+            card = list(card)
+            scid = card[0]
+            # ensure the card id is unique
+            while cidInUse(card[0]):
+                card[0] += 999
+            usedCids.add(card[0])
+            self._convertCard(card, self._notes[guid][0], usn, aheadBy)
+            cards.append(card)
+            revlog.extend(self._convertRevlog(scid, card[0]))
+        self._applyCards(cards, revlog)
+
     # Media
     ######################################################################
 
@@ -15,7 +15,6 @@ from anki.importing.base import Importer
 from anki.models import NotetypeId
 from anki.notes import NoteId
 from anki.utils import (
-    field_checksum,
     guid64,
     int_time,
     join_fields,
@@ -52,6 +51,69 @@ class ForeignCard:
         self.lapses = 0
 
 
+# Duplicate lookup
+######################################################################
+
+
+class FirstFieldIndex:
+    """Maps the first field of a notetype's notes to their ids, and keeps the
+    fields of each note, so that duplicates can be found and compared without
+    a query per candidate.
+
+    The index is built with a single query. Notes changed by the importer are
+    passed to update(); refresh() rebuilds the index if the notetype or its
+    notes were changed in any other way."""
+
+    def __init__(self, col: Collection, mid: NotetypeId) -> None:
+        self.col = col
+        self.mid = mid
+        self._ids: dict[str, list[NoteId]] = {}
+        self._fields: dict[NoteId, str] = {}
+        self._fingerprint: tuple | None = None
+
+    def _current_fingerprint(self) -> tuple:
+        return (
+            self.col.models.get(self.mid)["mod"],
+            *self.col.db.first(
+                "select count(), max(id), max(mod) from notes where mid = ?", self.mid
+            ),
+        )
+
+    def refresh(self) -> None:
+        fingerprint = self._current_fingerprint()
+        if fingerprint == self._fingerprint:
+            return
+        self._ids = {}
+        self._fields = {}
+        for id, flds in self.col.db.iterate(
+            "select id, flds from notes where mid = ?", self.mid
+        ):
+            self.add(id, flds)
+        self._fingerprint = fingerprint
+
+    def update(self, changes: dict[NoteId, str | None]) -> None:
+        """Re-index notes that have been added or updated, given their
+        previous first field (None for new notes)."""
+        for id, first_field in changes.items():
+            if first_field is not None:
+                self._ids[first_field].remove(id)
+        for id, flds in self.col.db.all(
+            "select id, flds from notes where id in bound_ids", ids=changes
+        ):
+            self.add(id, flds)
+        self._fingerprint = self._current_fingerprint()
+
+    def ids(self, first_field: str) -> list[NoteId]:
+        return self._ids.get(first_field, [])
+
+    def fields(self, id: NoteId) -> list[str]:
+        return split_fields(self._fields[id])
+
+    def add(self, id: NoteId, flds: str) -> None:
+        self._fields[id] = flds
+        self._ids.setdefault(split_fields(flds)[0], []).append(id)
+
+
 # Base class for CSV and similar text-based imports
 ######################################################################
 
@@ -84,6 +146,7 @@ class NoteImporter(Importer):
         self.mapping = None
         self.tagModified = None
         self._tagsMapped = False
+        self._dupeIndex: FirstFieldIndex | None = None
 
     def run(self) -> None:
         "Import."
@@ -123,14 +186,10 @@ class NoteImporter(Importer):
             if f == "_tags":
                 self._tagsMapped = True
         # gather checks for duplicate comparison
-        csums: dict[str, list[NoteId]] = {}
-        for csum, id in self.col.db.execute(
-            "select csum, id from notes where mid = ?", self.model["id"]
-        ):
-            if csum in csums:
-                csums[csum].append(id)
-            else:
-                csums[csum] = [id]
+        if self._dupeIndex is None or self._dupeIndex.mid != self.model["id"]:
+            self._dupeIndex = FirstFieldIndex(self.col, self.model["id"])
+        dupeIndex = self._dupeIndex
+        dupeIndex.refresh()
         firsts: dict[str, bool] = {}
         fld0idx = self.mapping.index(self.model["flds"][0]["name"])
         self._fmap = self.col.models.field_map(self.model)
@@ -143,6 +202,8 @@ class NoteImporter(Importer):
         self._cards: list[tuple] = []
         dupeCount = 0
         dupes: list[str] = []
+        # id -> previous first field of notes added/updated below
+        indexChanges: dict[NoteId, str | None] = {}
         for n in notes:
             for c, field in enumerate(n.fields):
                 if not self.allowHTML:
@@ -157,7 +218,6 @@ class NoteImporter(Importer):
                     self.col.tr.importing_empty_first_field(val=" ".join(n.fields))
                 )
                 continue
-            csum = field_checksum(fld0)
             # earlier in import?
             if fld0 in firsts and self.importMode != ADD_MODE:
                 # duplicates in source file; log and ignore
@@ -166,48 +226,47 @@ class NoteImporter(Importer):
             firsts[fld0] = True
             # already exists?
             found = False
-            if csum in csums:  # type: ignore[comparison-overlap]
-                # csum is not a guarantee; have to check
-                for id in csums[csum]:  # type: ignore[index]
-                    flds = self.col.db.scalar("select flds from notes where id = ?", id)
-                    sflds = split_fields(flds)
-                    if fld0 == sflds[0]:
-                        # duplicate
+            for id in dupeIndex.ids(fld0):
+                # duplicate
+                found = True
+                if self.importMode == UPDATE_MODE:
+                    sflds = dupeIndex.fields(id)
+                    data = self.updateData(n, id, sflds)
+                    if data:
+                        updates.append(data)
+                        updateLog.append(
+                            self.col.tr.importing_first_field_matched(val=fld0)
+                        )
+                        dupeCount += 1
                         found = True
-                        if self.importMode == UPDATE_MODE:
-                            data = self.updateData(n, id, sflds)
-                            if data:
-                                updates.append(data)
-                                updateLog.append(
-                                    self.col.tr.importing_first_field_matched(val=fld0)
-                                )
-                                dupeCount += 1
-                                found = True
-                        elif self.importMode == IGNORE_MODE:
-                            dupeCount += 1
-                        elif self.importMode == ADD_MODE:
-                            # allow duplicates in this case
-                            if fld0 not in dupes:
-                                # only show message once, no matter how many
-                                # duplicates are in the collection already
-                                updateLog.append(
-                                    self.col.tr.importing_added_duplicate_with_first_field(
-                                        val=fld0,
-                                    )
-                                )
-                                dupes.append(fld0)
-                            found = False
+                        indexChanges[id] = sflds[0]
+                elif self.importMode == IGNORE_MODE:
+                    dupeCount += 1
+                elif self.importMode == ADD_MODE:
+                    # allow duplicates in this case
+                    if fld0 not in dupes:
+                        # only show message once, no matter how many
+                        # duplicates are in the collection already
+                        updateLog.append(
+                            self.col.tr.importing_added_duplicate_with_first_field(
+                                val=fld0,
+                            )
+                        )
+                        dupes.append(fld0)
+                    found = False
             # newly add
             if not found:
                 new_data = self.newData(n)
                 if new_data:
                     new.append(new_data)
+                    indexChanges[new_data[0]] = None
                     # note that we've seen this note once already
                     firsts[fld0] = True
         self.addNew(new)
         self.addUpdates(updates)
         # generate cards + update field cache
         self.col.after_note_updates(self._ids, mark_modified=False)
+        dupeIndex.update(indexChanges)
         # apply scheduling updates
         self.updateCards()
         # we randomize or order here, to ensure that siblings
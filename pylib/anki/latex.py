@@ -3,8 +3,14 @@
 
 from __future__ import annotations
 
+import hashlib
 import html
 import os
+import shutil
+import tempfile
+import threading
+from collections.abc import Iterator, Sequence
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from dataclasses import dataclass
 
 import anki
@@ -13,7 +19,7 @@ from anki import card_rendering_pb2, hooks
 from anki.config import Config
 from anki.models import NotetypeDict
 from anki.template import TemplateRenderContext, TemplateRenderOutput
-from anki.utils import call, is_mac, namedtmp, tmpdir
+from anki.utils import SizeBoundedFolder, call, is_mac, tmpdir
 
 pngCommands = [
     ["latex", "-interaction=nonstopmode", "tmp.tex"],
@@ -36,6 +42,13 @@ svgCommands = [
     ["dvisvgm", "--no-fonts", "--exact", "-Z", "2", "tmp.dvi", "-o", "tmp.svg"],
 ]
 
+# the number of latex jobs render_latex_jobs() runs at once; each job is a
+# chain of external processes, so this bounds the number of tex processes
+LATEX_RENDER_WORKERS = min(os.cpu_count() or 1, 8)
+
+# default size limit of a LatexRenderCache, in bytes
+LATEX_CACHE_MAX_BYTES = 100 * 1024 * 1024
+
 # add standard tex install location to osx
 if is_mac:
     os.environ["PATH"] += ":/usr/texbin:/Library/TeX/texbin"
@@ -65,6 +78,102 @@ class ExtractedLatexOutput:
         )
 
 
+@dataclass
+class LatexRenderJob:
+    "A complete LaTeX document and the media file it should be rendered to."
+
+    filename: str
+    latex: str
+    svg: bool
+
+
+@dataclass
+class LatexRenderResult:
+    filename: str
+    # None if one of the commands failed
+    data: bytes | None
+    failed_command: str | None = None
+    texpath: str = ""
+    log: str = ""
+
+    def error_message(self, col: anki.collection.Collection) -> str | None:
+        if self.failed_command is None:
+            return None
+        return _err_msg(col, self.failed_command, self.texpath, self.log)
+
+
+class LatexRenderCache(SizeBoundedFolder):
+    """A size-bounded folder of previously rendered LaTeX images.
+
+    Entries are named after a hash of the full document (header, body and
+    footer), the output format and the commands used to render it, so a single
+    cache can be shared by every profile. When the folder grows beyond
+    max_bytes, the least recently used entries are removed. It is safe to use
+    from several threads at once."""
+
+    def __init__(self, folder: str, max_bytes: int = LATEX_CACHE_MAX_BYTES) -> None:
+        super().__init__(folder, max_bytes)
+        self.hits = 0
+        self.misses = 0
+
+    def __repr__(self) -> str:
+        return f"<LatexRenderCache {self.folder} hits={self.hits} misses={self.misses}>"
+
+    def get(self, job: LatexRenderJob) -> bytes | None:
+        path = self._path(job)
+        try:
+            with open(path, "rb") as file:
+                data = file.read()
+        except OSError:
+            with self._lock:
+                self.misses += 1
+            return None
+        # mark as recently used
+        self._touch(path)
+        with self._lock:
+            self.hits += 1
+        return data
+
+    def put(self, job: LatexRenderJob, data: bytes) -> None:
+        path = self._path(job)
+        # write to a temporary name first, so readers never see a partial file
+        tmp_path = f"{path}.{threading.get_ident()}.tmp"
+        try:
+            with open(tmp_path, "wb") as file:
+                file.write(data)
+            os.replace(tmp_path, path)
+        except OSError:
+            return
+        self._added(len(data))
+
+    def clear(self) -> None:
+        super().clear()
+        with self._lock:
+            self.hits = self.misses = 0
+
+    def _path(self, job: LatexRenderJob) -> str:
+        commands = svgCommands if job.svg else pngCommands
+        digest = hashlib.sha1()
+        digest.update(repr(commands).encode("utf8"))
+        digest.update(b"\0")
+        digest.update(job.latex.encode("utf8"))
+        ext = "svg" if job.svg else "png"
+        return os.path.join(self.folder, f"{digest.hexdigest()}.{ext}")
+
+
+_render_cache: LatexRenderCache | None = None
+
+
+def set_render_cache(cache: LatexRenderCache | None) -> None:
+    "Use cache for all LaTeX rendering, or disable caching if None."
+    global _render_cache
+    _render_cache = cache
+
+
+def render_cache() -> LatexRenderCache | None:
+    return _render_cache
+
+
 def on_card_did_render(
     output: TemplateRenderOutput, ctx: TemplateRenderContext
 ) -> None:
@@ -118,6 +227,54 @@ def render_latex_returning_errors(
     return html, errors
 
 
+def missing_latex_jobs(
+    text: str,
+    model: NotetypeDict,
+    col: anki.collection.Collection,
+    expand_clozes: bool = False,
+) -> list[LatexRenderJob]:
+    "Return a render job for each LaTeX image in text that is not in the media folder."
+    svg = model.get("latexsvg", False)
+    header = model["latexPre"]
+    footer = model["latexPost"]
+
+    proto = col._backend.extract_latex(text=text, svg=svg, expand_clozes=expand_clozes)
+    return [
+        _latex_job(latex, header, footer, svg)
+        for latex in ExtractedLatexOutput.from_proto(proto).latex
+        if not col.media.have(latex.filename)
+    ]
+
+
+def render_latex_jobs(
+    jobs: Sequence[LatexRenderJob], max_workers: int | None = None
+) -> Iterator[LatexRenderResult]:
+    """Render jobs concurrently, yielding results as they complete.
+
+    Each job runs in its own temporary folder, so jobs do not share any
+    files. Nothing is written to the media folder; that is left to the
+    caller. Closing the iterator early cancels the jobs that have not
+    started yet."""
+    if not jobs:
+        return
+    with ThreadPoolExecutor(max_workers=max_workers or LATEX_RENDER_WORKERS) as pool:
+        futures = [pool.submit(_render_latex_job, job) for job in jobs]
+        try:
+            for future in as_completed(futures):
+                yield future.result()
+        finally:
+            for future in futures:
+                future.cancel()
+
+
+def _latex_job(
+    extracted: ExtractedLatex, header: str, footer: str, svg: bool
+) -> LatexRenderJob:
+    # add header/footer
+    latex = f"{header}\n{extracted.latex_body}\n{footer}"
+    return LatexRenderJob(filename=extracted.filename, latex=latex, svg=svg)
+
+
 def _save_latex_image(
     col: anki.collection.Collection,
     extracted: ExtractedLatex,
@@ -125,52 +282,76 @@ def _save_latex_image(
     footer: str,
     svg: bool,
 ) -> str | None:
-    # add header/footer
-    latex = f"{header}\n{extracted.latex_body}\n{footer}"
+    result = _render_latex_job(_latex_job(extracted, header, footer, svg))
+    if result.data is None:
+        return result.error_message(col)
+    # add to media
+    col.media.write_data(extracted.filename, result.data)
+    return None
+
+
+def _render_latex_job(job: LatexRenderJob) -> LatexRenderResult:
+    cache = _render_cache
+    if cache is not None:
+        if (data := cache.get(job)) is not None:
+            return LatexRenderResult(filename=job.filename, data=data)
+        result = _run_latex_commands(job)
+        if result.data is not None:
+            cache.put(job, result.data)
+        return result
+    return _run_latex_commands(job)
+
 
+def _run_latex_commands(job: LatexRenderJob) -> LatexRenderResult:
     # commands to use
-    if svg:
+    if job.svg:
         latex_cmds = svgCommands
         ext = "svg"
     else:
         latex_cmds = pngCommands
         ext = "png"
 
-    # write into a temp file
-    log = open(namedtmp("latex_log.txt"), "w", encoding="utf8")
-    texpath = namedtmp("tmp.tex")
-    texfile = open(texpath, "w", encoding="utf8")
-    texfile.write(latex)
-    texfile.close()
-    oldcwd = os.getcwd()
-    png_or_svg = namedtmp(f"tmp.{ext}")
-    try:
-        # generate png/svg
-        os.chdir(tmpdir())
+    # write into a temp folder of our own, so that jobs can run in parallel
+    workdir = tempfile.mkdtemp(prefix="latex", dir=tmpdir())
+    texpath = os.path.join(workdir, "tmp.tex")
+    with open(texpath, "w", encoding="utf8") as texfile:
+        texfile.write(job.latex)
+    logpath = os.path.join(workdir, "latex_log.txt")
+
+    # generate png/svg
+    failed_command = None
+    with open(logpath, "w", encoding="utf8") as log:
         for latex_cmd in latex_cmds:
-            if call(latex_cmd, stdout=log, stderr=log):
-                return _err_msg(col, latex_cmd[0], texpath)
-        # add to media
-        with open(png_or_svg, "rb") as file:
-            data = file.read()
-        col.media.write_data(extracted.filename, data)
-        os.unlink(png_or_svg)
-        return None
-    finally:
-        os.chdir(oldcwd)
-        log.close()
-
-
-def _err_msg(col: anki.collection.Collection, type: str, texpath: str) -> str:
+            if call(latex_cmd, stdout=log, stderr=log, cwd=workdir):
+                failed_command = latex_cmd[0]
+                break
+    if failed_command is not None:
+        # keep the folder, as the error message points to the .tex file
+        try:
+            with open(logpath, encoding="utf8") as file:
+                log_text = file.read()
+        except OSError:
+            log_text = ""
+        return LatexRenderResult(
+            filename=job.filename,
+            data=None,
+            failed_command=failed_command,
+            texpath=texpath,
+            log=log_text,
+        )
+
+    with open(os.path.join(workdir, f"tmp.{ext}"), "rb") as file:
+        data = file.read()
+    shutil.rmtree(workdir, ignore_errors=True)
+    return LatexRenderResult(filename=job.filename, data=data)
+
+
+def _err_msg(col: anki.collection.Collection, type: str, texpath: str, log: str) -> str:
     msg = f"{col.tr.media_error_executing(val=type)}<br>"
     msg += f"{col.tr.media_generated_file(val=texpath)}<br>"
-    try:
-        with open(namedtmp("latex_log.txt", remove=False), encoding="utf8") as file:
-            log = file.read()
-        if not log:
-            raise Exception()
+    if log:
         msg += f"<small><pre>{html.escape(log)}</pre></small>"
-    except Exception:
+    else:
         msg += col.tr.media_have_you_installed_latex_and_dvipngdvisvgm()
     return msg
 
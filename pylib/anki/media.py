@@ -12,9 +12,15 @@ from collections.abc import Callable, Sequence
 
 from anki import media_pb2
 from anki._legacy import DeprecatedNamesMixin, deprecated_keywords
+from anki.config import Config
 from anki.consts import *
-from anki.latex import render_latex, render_latex_returning_errors
-from anki.models import NotetypeId
+from anki.latex import (
+    LatexRenderJob,
+    missing_latex_jobs,
+    render_latex,
+    render_latex_jobs,
+)
+from anki.models import NotetypeDict, NotetypeId
 from anki.sound import SoundOrVideoTag
 from anki.template import av_tags_to_native
 from anki.utils import int_time
@@ -135,9 +141,13 @@ class MediaManager(DeprecatedNamesMixin):
     @deprecated_keywords(includeRemote="include_remote")
     def files_in_str(
         self, mid: NotetypeId, string: str, include_remote: bool = False
+    ) -> list[str]:
+        return self._files_in_str(self.col.models.get(mid), string, include_remote)
+
+    def _files_in_str(
+        self, model: NotetypeDict, string: str, include_remote: bool = False
     ) -> list[str]:
         files = []
-        model = self.col.models.get(mid)
         # handle latex
         string = render_latex(string, model, self.col)
         # extract filenames
@@ -186,22 +196,30 @@ class MediaManager(DeprecatedNamesMixin):
     ) -> tuple[int, str] | None:
         """Render any LaTeX that is missing.
 
-        If a progress callback is provided and it returns false, the operation
-        will be aborted.
+        Notes are scanned first, and each missing image is then rendered once,
+        with several renders running at a time. The progress callback receives
+        the number of notes checked, and continues to be called while the
+        images are rendered. If it returns false, the operation will be
+        aborted.
 
         If an error is encountered, returns (note_id, error_message)
         """
         last_progress = time.time()
         checked = 0
-        for nid, mid, flds in self.col.db.execute(
+        render_enabled = self.col.get_config_bool(Config.Bool.RENDER_LATEX)
+        # filename -> job, and the first note that needs it
+        jobs: dict[str, LatexRenderJob] = {}
+        job_nids: dict[str, int] = {}
+        for nid, mid, flds in self.col.db.iterate(
             "select id, mid, flds from notes where flds like '%[%'"
         ):
             model = self.col.models.get(mid)
-            _html, errors = render_latex_returning_errors(
-                flds, model, self.col, expand_clozes=True
-            )
-            if errors:
-                return (nid, "\n".join(errors))
+            for job in missing_latex_jobs(flds, model, self.col, expand_clozes=True):
+                if not render_enabled:
+                    return (nid, self.col.tr.preferences_latex_generation_disabled())
+                if job.filename not in jobs:
+                    jobs[job.filename] = job
+                    job_nids[job.filename] = nid
 
             checked += 1
             elap = time.time() - last_progress
@@ -210,6 +228,22 @@ class MediaManager(DeprecatedNamesMixin):
                 if not progress_cb(checked):
                     return None
 
+        results = render_latex_jobs(list(jobs.values()))
+        try:
+            for result in results:
+                if result.data is None:
+                    err = result.error_message(self.col) or ""
+                    return (job_nids[result.filename], err)
+                self.write_data(result.filename, result.data)
+
+                elap = time.time() - last_progress
+                if elap >= 0.3 and progress_cb is not None:
+                    last_progress = int_time()
+                    if not progress_cb(checked):
+                        return None
+        finally:
+            results.close()
+
         return None
 
     # Legacy
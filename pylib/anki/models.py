@@ -13,6 +13,7 @@ from typing import Any, NewType, Union
 import anki
 import anki.collection
 import anki.notes
+import anki.template
 from anki import notetypes_pb2
 from anki._legacy import DeprecatedNamesMixin, deprecated, print_deprecation_warning
 from anki.collection import OpChanges, OpChangesWithId
@@ -107,12 +108,14 @@ class ModelManager(DeprecatedNamesMixin):
     def _remove_from_cache(self, ntid: NotetypeId) -> None:
         if ntid in self._cache:
             del self._cache[ntid]
+        anki.template.clear_field_filter_cache()
 
     def _get_cached(self, ntid: NotetypeId) -> NotetypeDict | None:
         return self._cache.get(ntid)
 
     def _clear_cache(self) -> None:
         self._cache = {}
+        anki.template.clear_field_filter_cache()
 
     # Listing note types
     #############################################################
@@ -38,6 +38,7 @@ class Note(DeprecatedNamesMixin):
         col: anki.collection.Collection,
         model: NotetypeDict | NotetypeId | None = None,
         id: NoteId | None = None,
+        backend_note: notes_pb2.Note | None = None,
     ) -> None:
         if model and id:
             raise Exception("only model or id should be provided")
@@ -48,6 +49,8 @@ class Note(DeprecatedNamesMixin):
             # existing note
             self.id = id
             self.load()
+        elif backend_note:
+            self._load_from_backend_note(backend_note)
         else:
             # new note for provided notetype
             self._load_from_backend_note(self.col._backend.new_note(notetype_id))
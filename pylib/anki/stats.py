@@ -7,6 +7,7 @@ from __future__ import annotations
 import json
 import random
 import time
+from collections import Counter
 from collections.abc import Sequence
 from typing import Any
 
@@ -637,29 +638,18 @@ group by day order by day)"""
 
     def _ivls(self) -> tuple[list[Any], int]:
         start, end, chunk = self.get_start_end_chunk()
-        lim = "and grp <= %d" % end if end else ""
-        data = [
-            self.col.db.all(
-                f"""
-select ivl / ? as grp, count() from cards
-where did in %s and queue = {QUEUE_TYPE_REV} %s
-group by grp
-order by grp"""
-                % (self._limit(), lim),
-                chunk,
-            )
-        ]
-        return (
-            data
-            + list(
-                self.col.db.first(
-                    f"""
-select count(), avg(ivl), max(ivl) from cards where did in %s and queue = {QUEUE_TYPE_REV}"""
-                    % self._limit()
-                )
-            ),
-            chunk,
+        # a single scan of the intervals provides both the groups and the totals
+        (ivls,) = self.col.db.columns(
+            f"select ivl from cards where did in %s and queue = {QUEUE_TYPE_REV}"
+            % self._limit()
+        )
+        groups = Counter(ivl // chunk for ivl in ivls)
+        data = sorted(
+            (grp, cnt) for grp, cnt in groups.items() if not end or grp <= end
         )
+        if ivls:
+            return ([data, len(ivls), sum(ivls) / len(ivls), max(ivls)], chunk)
+        return ([data, 0, None, None], chunk)
 
     # Eases
     ######################################################################
@@ -22,6 +22,13 @@ Your function should decide if it wants to modify the text by checking
 the filter_name argument, and then return the text whether it has been
 modified or not.
 
+If the filter's output depends only on the field text, field name and the
+side of the card being rendered, it can be registered as pure, so that its
+output is cached instead of being recalculated each time a card is shown:
+
+from anki.template import register_pure_field_filter
+register_pure_field_filter("myfilter")
+
 A Python implementation of the standard filters is currently available in the
 template_legacy.py file, using the legacy addHook() system.
 """
@@ -29,7 +36,9 @@ template_legacy.py file, using the legacy addHook() system.
 from __future__ import annotations
 
 import os.path
-from collections.abc import Sequence
+import threading
+from collections import OrderedDict
+from collections.abc import Generator, Sequence
 from dataclasses import dataclass
 from typing import Any, Union
 
@@ -225,13 +234,11 @@ class TemplateRenderContext:
         try:
             partial = self._partially_render()
         except TemplateError as error:
-            return TemplateRenderOutput(
-                question_text=str(error),
-                answer_text=str(error),
-                question_av_tags=[],
-                answer_av_tags=[],
-            )
+            return _template_error_output(str(error))
+        return self._complete_render(partial)
 
+    def _complete_render(self, partial: PartiallyRenderedCard) -> TemplateRenderOutput:
+        "Apply custom filters and extract AV tags from a partial render."
         self._question_side = True
         qtext = apply_custom_filters(partial.qnodes, self, front_side=None)
         qout = self.col()._backend.extract_av_tags(text=qtext, question_side=True)
@@ -247,8 +254,13 @@ class TemplateRenderContext:
             answer_av_tags=av_tags_to_native(aout.av_tags),
             css=partial.css,
         )
+        return self._finish_render(output, partial.latex_svg)
 
-        self._latex_svg = partial.latex_svg
+    def _finish_render(
+        self, output: TemplateRenderOutput, latex_svg: bool
+    ) -> TemplateRenderOutput:
+        self._question_side = False
+        self._latex_svg = latex_svg
 
         if not self._browser:
             hooks.card_did_render(output, self)
@@ -293,6 +305,64 @@ class TemplateRenderOutput:
         return f"<style>{self.css}</style>{self.answer_text}"
 
 
+def _template_error_output(message: str) -> TemplateRenderOutput:
+    return TemplateRenderOutput(
+        question_text=message,
+        answer_text=message,
+        question_av_tags=[],
+        answer_av_tags=[],
+    )
+
+
+def render_existing_cards(
+    col: anki.collection.Collection,
+    card_ids: Sequence[anki.cards.CardId],
+    browser: bool,
+    batch_size: int,
+) -> Generator[TemplateRenderOutput, None, None]:
+    """Render existing cards, making one backend call per batch of cards.
+
+    The backend finishes rendering cards that have no custom filters left to
+    apply; the rest are completed here, as TemplateRenderContext.render() would.
+    card_did_render is called for each card unless browser is true. Cards that
+    no longer exist are rendered as '(deleted)'."""
+    for start in range(0, len(card_ids), batch_size):
+        batch = card_ids[start : start + batch_size]
+        found = set(
+            col.db.list("select id from cards where id in bound_ids", ids=batch)
+        )
+        existing = [cid for cid in batch if cid in found]
+        rendered = col._backend.render_existing_cards(
+            card_ids=existing, browser=browser
+        )
+        cards = dict(zip(existing, zip(col.get_cards(existing), rendered)))
+        nids = list(dict.fromkeys(card.nid for card, _out in cards.values()))
+        notes = dict(zip(nids, col.get_notes(nids)))
+        for cid in batch:
+            if cid not in cards:
+                yield _template_error_output(col.tr.browsing_row_deleted())
+                continue
+            card, out = cards[cid]
+            note = notes[card.nid]
+            card._note = note
+            ctx = TemplateRenderContext(col, card, note, browser)
+            kind = out.WhichOneof("value")
+            if kind == "error":
+                yield _template_error_output(out.error)
+            elif kind == "partial":
+                partial = PartiallyRenderedCard.from_proto(out.partial)
+                yield ctx._complete_render(partial)
+            else:
+                output = TemplateRenderOutput(
+                    question_text=out.rendered.question.text,
+                    answer_text=out.rendered.answer.text,
+                    question_av_tags=av_tags_to_native(out.rendered.question.av_tags),
+                    answer_av_tags=av_tags_to_native(out.rendered.answer.av_tags),
+                    css=out.rendered.css,
+                )
+                yield ctx._finish_render(output, out.rendered.latex_svg)
+
+
 # legacy
 def templates_for_card(card: anki.cards.Card, browser: bool) -> tuple[str, str]:
     template = card.template()
@@ -305,6 +375,99 @@ def templates_for_card(card: anki.cards.Card, browser: bool) -> tuple[str, str]:
     return question, answer  # type: ignore
 
 
+# default size limit of the field filter cache, in characters of cached text
+FIELD_FILTER_CACHE_MAX_CHARS = 10_000_000
+
+# (filter name, field name, field text, question side)
+FieldFilterCacheKey = tuple[str, str, str, bool]
+
+
+class FieldFilterCache:
+    """A size-bounded cache of the output of pure custom filters.
+
+    Entries are keyed by the filter name, field name, field text and the side
+    of the card being rendered. When the cached text grows beyond max_chars
+    characters, the least recently used entries are removed. It is safe to use
+    from several threads at once."""
+
+    def __init__(self, max_chars: int = FIELD_FILTER_CACHE_MAX_CHARS) -> None:
+        self.max_chars = max_chars
+        self.hits = 0
+        self.misses = 0
+        self._entries: OrderedDict[FieldFilterCacheKey, str] = OrderedDict()
+        self._size = 0
+        self._lock = threading.Lock()
+
+    def __repr__(self) -> str:
+        return (
+            f"<FieldFilterCache entries={len(self)} "
+            f"hits={self.hits} misses={self.misses}>"
+        )
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key: FieldFilterCacheKey) -> str | None:
+        with self._lock:
+            output = self._entries.get(key)
+            if output is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+                self._entries.move_to_end(key)
+            return output
+
+    def put(self, key: FieldFilterCacheKey, output: str) -> None:
+        size = _cache_entry_size(key, output)
+        if size > self.max_chars:
+            return
+        with self._lock:
+            if (previous := self._entries.pop(key, None)) is not None:
+                self._size -= _cache_entry_size(key, previous)
+            self._entries[key] = output
+            self._size += size
+            while self._size > self.max_chars:
+                old_key, old_output = self._entries.popitem(last=False)
+                self._size -= _cache_entry_size(old_key, old_output)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._size = 0
+
+
+def _cache_entry_size(key: FieldFilterCacheKey, output: str) -> int:
+    filter_name, field_name, field_text, _question_side = key
+    return len(filter_name) + len(field_name) + len(field_text) + len(output)
+
+
+_pure_field_filters: set[str] = set()
+_field_filter_cache = FieldFilterCache()
+
+
+def register_pure_field_filter(filter_name: str) -> None:
+    """Cache the output of the custom filter called filter_name.
+
+    Only register a filter if its output depends on nothing but the field
+    text, field name and card side it is given, as it will not be run again
+    until the cache is cleared. The cache is cleared when notes or notetypes
+    are changed."""
+    _pure_field_filters.add(filter_name)
+
+
+def unregister_pure_field_filter(filter_name: str) -> None:
+    _pure_field_filters.discard(filter_name)
+    _field_filter_cache.clear()
+
+
+def field_filter_cache() -> FieldFilterCache:
+    return _field_filter_cache
+
+
+def clear_field_filter_cache() -> None:
+    _field_filter_cache.clear()
+
+
 def apply_custom_filters(
     rendered: TemplateReplacementList,
     ctx: TemplateRenderContext,
@@ -315,10 +478,10 @@ def apply_custom_filters(
     if len(rendered) == 1 and isinstance(rendered[0], str):
         return rendered[0]
 
-    res = ""
+    res: list[str] = []
     for node in rendered:
         if isinstance(node, str):
-            res += node
+            res.append(node)
         else:
             # do we need to inject in FrontSide?
             if node.field_name == "FrontSide" and front_side is not None:
@@ -326,18 +489,40 @@ def apply_custom_filters(
 
             field_text = node.current_text
             for filter_name in node.filters:
-                field_text = hooks.field_filter(
-                    field_text, node.field_name, filter_name, ctx
-                )
-                # legacy hook - the second and fifth argument are no longer used.
-                field_text = hooks.runFilter(
-                    f"fmod_{filter_name}",
-                    field_text,
-                    "",
-                    ctx.note().items(),
-                    node.field_name,
-                    "",
-                )
+                if filter_name in _pure_field_filters:
+                    field_text = _apply_cached_custom_filter(
+                        field_text, node.field_name, filter_name, ctx
+                    )
+                else:
+                    field_text = _apply_custom_filter(
+                        field_text, node.field_name, filter_name, ctx
+                    )
+
+            res.append(field_text)
+    return "".join(res)
 
-            res += field_text
-    return res
+
+def _apply_cached_custom_filter(
+    field_text: str, field_name: str, filter_name: str, ctx: TemplateRenderContext
+) -> str:
+    key = (filter_name, field_name, field_text, ctx.question_side)
+    output = _field_filter_cache.get(key)
+    if output is None:
+        output = _apply_custom_filter(field_text, field_name, filter_name, ctx)
+        _field_filter_cache.put(key, output)
+    return output
+
+
+def _apply_custom_filter(
+    field_text: str, field_name: str, filter_name: str, ctx: TemplateRenderContext
+) -> str:
+    field_text = hooks.field_filter(field_text, field_name, filter_name, ctx)
+    # legacy hook - the second and fifth argument are no longer used.
+    return hooks.runFilter(
+        f"fmod_{filter_name}",
+        field_text,
+        "",
+        ctx.note().items(),
+        field_name,
+        "",
+    )
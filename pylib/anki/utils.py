@@ -12,8 +12,9 @@ import string
 import subprocess
 import sys
 import tempfile
+import threading
 import time
-from collections.abc import Callable, Iterable, Iterator
+from collections.abc import Callable, Iterable, Iterator, Sequence
 from contextlib import contextmanager
 from hashlib import sha1
 from typing import TYPE_CHECKING, Any
@@ -67,6 +68,26 @@ def strip_html_media(txt: str) -> str:
     )
 
 
+def strip_html_list(txts: Sequence[str]) -> Sequence[str]:
+    "Like strip_html(), but processes all the strings in one backend call."
+    import anki.lang
+    from anki.collection import StripHtmlMode
+
+    return anki.lang.current_i18n.strip_html_batch(
+        texts=txts, mode=StripHtmlMode.NORMAL
+    )
+
+
+def strip_html_media_list(txts: Sequence[str]) -> Sequence[str]:
+    "Like strip_html_media(), but processes all the strings in one backend call."
+    import anki.lang
+    from anki.collection import StripHtmlMode
+
+    return anki.lang.current_i18n.strip_html_batch(
+        texts=txts, mode=StripHtmlMode.PRESERVE_MEDIA_FILENAMES
+    )
+
+
 def html_to_text_line(txt: str) -> str:
     import anki.lang
 
@@ -152,6 +173,13 @@ def field_checksum(data: str) -> int:
     return int(checksum(strip_html_media(data).encode("utf-8"))[:8], 16)
 
 
+def field_checksums(fields: Sequence[str]) -> Sequence[int]:
+    "Like field_checksum(), but processes all the fields in one backend call."
+    import anki.lang
+
+    return anki.lang.current_i18n.field_checksums(vals=fields)
+
+
 # Temp files
 ##############################################################################
 
@@ -195,6 +223,77 @@ def namedtmp(name: str, remove: bool = True) -> str:
     return path
 
 
+class SizeBoundedFolder:
+    """A folder of cached files, kept under max_bytes by removing the least
+    recently used files when it grows beyond that. Files are marked as used by
+    updating their modification time. It is safe to use from several threads
+    at once; subclasses can use self._lock for their own state."""
+
+    def __init__(self, folder: str, max_bytes: int) -> None:
+        self.folder = folder
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._size: int | None = None
+        os.makedirs(folder, exist_ok=True)
+
+    def clear(self) -> None:
+        with self._lock:
+            shutil.rmtree(self.folder, ignore_errors=True)
+            os.makedirs(self.folder, exist_ok=True)
+            self._size = 0
+
+    def _touch(self, path: str) -> bool:
+        "Mark the file at path as recently used. False if it does not exist."
+        try:
+            os.utime(path)
+        except OSError:
+            return False
+        return True
+
+    def _added(self, size: int) -> None:
+        "Account for a new file of size bytes, evicting old files if needed."
+        with self._lock:
+            if self._size is None:
+                self._size = self._folder_size()
+            else:
+                self._size += size
+            if self._size > self.max_bytes:
+                self._evict()
+
+    def _entries(self) -> list[tuple[float, int, str]]:
+        "(mtime, size, path) of each cached file."
+        entries = []
+        try:
+            with os.scandir(self.folder) as it:
+                for entry in it:
+                    try:
+                        stat = entry.stat()
+                    except OSError:
+                        continue
+                    entries.append((stat.st_mtime, stat.st_size, entry.path))
+        except OSError:
+            pass
+        return entries
+
+    def _folder_size(self) -> int:
+        return sum(size for _mtime, size, _path in self._entries())
+
+    def _evict(self) -> None:
+        "Remove least recently used entries until under 90% of the limit."
+        entries = sorted(self._entries())
+        size = sum(size for _mtime, size, _path in entries)
+        target = self.max_bytes * 9 // 10
+        for _mtime, entry_size, path in entries:
+            if size <= target:
+                break
+            try:
+                os.unlink(path)
+            except OSError:
+                continue
+            size -= entry_size
+        self._size = size
+
+
 # Cmd invocation
 ##############################################################################
 
@@ -207,6 +306,15 @@ def no_bundled_libs() -> Iterator[None]:
         os.environ["LD_LIBRARY_PATH"] = oldlpath
 
 
+def no_bundled_libs_env() -> dict[str, str]:
+    """A copy of the environment without our bundled libraries, for passing to
+    a subprocess. Unlike no_bundled_libs(), this is safe to use from several
+    threads at once."""
+    env = dict(os.environ)
+    env.pop("LD_LIBRARY_PATH", None)
+    return env
+
+
 def call(argv: list[str], wait: bool = True, **kwargs: Any) -> int:
     "Execute a command. If WAIT, return exit code."
     # ensure we don't open a separate window for forking process on windows
@@ -219,9 +327,9 @@ def call(argv: list[str], wait: bool = True, **kwargs: Any) -> int:
     else:
         info = None
     # run
+    kwargs.setdefault("env", no_bundled_libs_env())
     try:
-        with no_bundled_libs():
-            process = subprocess.Popen(argv, startupinfo=info, **kwargs)
+        process = subprocess.Popen(argv, startupinfo=info, **kwargs)
     except OSError:
         # command not found
         return -1
@@ -0,0 +1,239 @@
+# Copyright: Ankitects Pty Ltd and contributors
+# License: GNU AGPL, version 3 or later; http://www.gnu.org/licenses/agpl.html
+
+"""Ad-hoc benchmarks for the Python layer. These are not run as part of the
+test suite. From the pylib folder, run with:
+
+python -m tests.benchmarks [name ...]
+"""
+
+from __future__ import annotations
+
+import os
+import sys
+import tempfile
+import time
+
+from anki import hooks
+from anki._benchmark import BenchmarkSet, timed
+from anki.collection import Collection
+from anki.exporting import media_reference_index
+from anki.importing import TextImporter
+from anki.template import register_pure_field_filter, unregister_pure_field_filter
+from anki.utils import (
+    field_checksum,
+    field_checksums,
+    ids2str,
+    strip_html_media,
+    strip_html_media_list,
+)
+from tests.shared import getEmptyCol
+from tests.test_find import reference_find_dupes
+
+benchmark = BenchmarkSet()
+
+
+def fill_revlog(col: Collection, count: int) -> None:
+    col.db.executemany(
+        "insert into revlog values (?,?,?,?,?,?,?,?,?)",
+        (
+            (i + 1, i % 5000, -1, 1 + i % 4, i % 365, i % 300, 2500, i % 60000, 1)
+            for i in range(count)
+        ),
+    )
+
+
+@benchmark
+def db_transport() -> None:
+    "Compare the JSON and binary row transports on large revlog queries."
+    col = getEmptyCol()
+    fill_revlog(col, 500_000)
+    backend = col._backend
+
+    def compare(label: str, sql: str) -> None:
+        json = timed(f"json {label}", lambda: backend.db_query(sql, [], False, False))
+        binary = timed(
+            f"binary {label}", lambda: backend.db_query(sql, [], False, True)
+        )
+        print(f"binary speedup: {json / binary:.2f}x")
+
+    compare(
+        "numbers", "select id, cid, ease, ivl, lastIvl, factor, time, type from revlog"
+    )
+    compare("strings", "select 'card ' || cid, printf('%d résumé', ivl) from revlog")
+    col.close(downgrade=False)
+
+
+@benchmark
+def db_id_binding() -> None:
+    "Filter a 500k row revlog by 200k ids, inlined into the SQL and bound."
+    col = getEmptyCol()
+    fill_revlog(col, 500_000)
+    ids = list(range(1, 400_000, 2))
+    inlined = timed(
+        "ids2str",
+        lambda: col.db.list(f"select cid from revlog where id in {ids2str(ids)}"),
+    )
+    bound = timed(
+        "bound ids",
+        lambda: col.db.list("select cid from revlog where id in bound_ids", ids=ids),
+    )
+    print(f"bound speedup: {inlined / bound:.2f}x")
+    col.close(downgrade=False)
+
+
+@benchmark
+def csv_import_dupes() -> None:
+    "Import a 200k row CSV whose first fields match 100k existing notes."
+    col = getEmptyCol()
+    notetype = col.models.current()
+    col.db.executemany(
+        "insert into notes values (?,?,?,?,?,?,?,?,?,?,?)",
+        (
+            (i, f"guid{i}", notetype["id"], 0, -1, "", f"word{i}\x1fold", "", 0, 0, "")
+            for i in range(1, 100_001)
+        ),
+    )
+    col.after_note_updates(
+        col.db.list("select id from notes"), mark_modified=False, generate_cards=False
+    )
+    with tempfile.NamedTemporaryFile("w", suffix=".csv", delete=False) as file:
+        for i in range(1, 200_001):
+            file.write(f"word{i}\tnew\n")
+    importer = TextImporter(col, file.name)
+    importer.initMapping()
+    timed("csv import", importer.run, repeat=1)
+    os.unlink(file.name)
+    col.close(downgrade=False)
+
+
+@benchmark
+def export_media_scan() -> None:
+    "Find the media used by 50k notes in a folder of 200k files."
+    col = getEmptyCol()
+    notetype = col.models.current()
+    col.db.executemany(
+        "insert into notes values (?,?,?,?,?,?,?,?,?,?,?)",
+        (
+            (
+                i,
+                f"guid{i}",
+                notetype["id"],
+                0,
+                -1,
+                "",
+                f'<img src="img{i}.jpg">\x1f[sound:snd{i}.mp3]',
+                "",
+                0,
+                0,
+                "",
+            )
+            for i in range(1, 50_001)
+        ),
+    )
+    media_dir = col.media.dir()
+    for i in range(200_000):
+        name = f"_file{i}.css" if i % 100 == 0 else f"img{i}.jpg"
+        open(os.path.join(media_dir, name), "wb").close()
+    rows = col.db.all("select id, mid, flds from notes")
+    mids = [notetype["id"]]
+    index = media_reference_index(col)
+    timed("first scan", lambda: (index.clear(), index.files_in_notes(rows)), 1)
+    timed("repeat scan", lambda: index.files_in_notes(rows))
+    timed("notetype scan", lambda: index.files_in_notetypes(mids, media_dir))
+    col.close(downgrade=False)
+
+
+@benchmark
+def strip_html_batch() -> None:
+    "Strip and checksum 100k fields, one at a time and in a single call."
+    col = getEmptyCol()
+    fields = [f"<div>field <b>{i}</b><img src='{i}.jpg'></div>" for i in range(100_000)]
+    timed("strip_html_media", lambda: [strip_html_media(f) for f in fields])
+    timed("strip_html_media_list", lambda: strip_html_media_list(fields))
+    timed("field_checksum", lambda: [field_checksum(f) for f in fields])
+    timed("field_checksums", lambda: field_checksums(fields))
+    col.close(downgrade=False)
+
+
+@benchmark
+def find_dupes() -> None:
+    "Find duplicates in the back field of 200k notes."
+    col = getEmptyCol()
+    notetype = col.models.current()
+    col.db.executemany(
+        "insert into notes values (?,?,?,?,?,?,?,?,?,?,?)",
+        (
+            (
+                i,
+                f"guid{i}",
+                notetype["id"],
+                0,
+                -1,
+                "",
+                f"{i}\x1f<b>{i % 50_000}</b>",
+                "",
+                0,
+                0,
+                "",
+            )
+            for i in range(1, 200_001)
+        ),
+    )
+    timed("python", lambda: reference_find_dupes(col, "Back"), repeat=1)
+    timed("backend", lambda: col.find_dupes("Back"), repeat=1)
+    col.close(downgrade=False)
+
+
+@benchmark
+def render_cards() -> None:
+    "Render 10k cards one at a time and in batches."
+    col = getEmptyCol()
+    for i in range(10_000):
+        note = col.newNote()
+        note["Front"] = f"front {i}[sound:{i}.mp3]"
+        note["Back"] = f"<b>back</b> {i}"
+        col.addNote(note)
+    cids = list(col.find_cards(""))
+    timed(
+        "render_output",
+        lambda: [col.get_card(cid).render_output() for cid in cids],
+        repeat=1,
+    )
+    timed("render_cards", lambda: list(col.render_cards(cids)), repeat=1)
+    col.close(downgrade=False)
+
+
+@benchmark
+def pure_field_filter() -> None:
+    "Render 2k cards sharing a field, with a slow custom filter."
+    col = getEmptyCol()
+    notetype = col.models.current()
+    notetype["tmpls"][0]["qfmt"] = "{{slow:Front}}"
+    col.models.save(notetype)
+    for i in range(2_000):
+        note = col.newNote()
+        note["Front"] = f"front {i % 20}"
+        note["Back"] = f"back {i}"
+        col.addNote(note)
+    cids = list(col.find_cards(""))
+
+    def slow_filter(text: str, field: str, filter_name: str, ctx: object) -> str:
+        if filter_name != "slow":
+            return text
+        time.sleep(0.0005)
+        return text.upper()
+
+    hooks.field_filter.append(slow_filter)
+    try:
+        timed("uncached", lambda: list(col.render_cards(cids)), repeat=1)
+        register_pure_field_filter("slow")
+        timed("cached", lambda: list(col.render_cards(cids)), repeat=1)
+    finally:
+        hooks.field_filter.remove(slow_filter)
+        unregister_pure_field_filter("slow")
+    col.close(downgrade=False)
+
+
+if __name__ == "__main__":
+    benchmark.main(sys.argv[1:])
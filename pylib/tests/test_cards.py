@@ -3,6 +3,7 @@
 
 # coding: utf-8
 
+from anki import hooks
 from tests.shared import getEmptyCol
 
 
@@ -93,3 +94,51 @@ def test_gendeck():
     note["Text"] += "{{c4::four}}"
     note.flush()
     assert note.cards()[3].did == newId
+
+
+def test_render_cards():
+    col = getEmptyCol()
+    mm = col.models
+    model = mm.current()
+    model["tmpls"][0]["afmt"] = "{{FrontSide}}<hr id=answer>{{custom:Back}}"
+    mm.save(model)
+    cids = []
+    for i in range(5):
+        note = col.newNote()
+        note["Front"] = f"front {i}[sound:{i}.mp3]"
+        note["Back"] = f"back {i}"
+        col.addNote(note)
+        cids.append(note.cards()[0].id)
+
+    def custom_filter(text: str, field_name: str, filter_name: str, ctx) -> str:
+        return text.upper() if filter_name == "custom" else text
+
+    def assert_matches_single_renders(outputs, browser=False):
+        assert len(outputs) == len(cids)
+        for cid, output in zip(cids, outputs):
+            assert output == col.get_card(cid).render_output(browser=browser)
+
+    hooks.field_filter.append(custom_filter)
+    try:
+        # custom filters are applied in Python
+        outputs = list(col.render_cards(cids, batch_size=2))
+        assert_matches_single_renders(outputs)
+        assert "BACK 0" in outputs[0].answer_text
+        assert_matches_single_renders(list(col.render_cards(cids, browser=True)), True)
+    finally:
+        hooks.field_filter.remove(custom_filter)
+
+    # cards without custom filters are finished by the backend
+    model["tmpls"][0]["afmt"] = "{{FrontSide}}<hr id=answer>{{Back}}"
+    mm.save(model)
+    outputs = list(col.render_cards(cids))
+    assert_matches_single_renders(outputs)
+    assert outputs[0].question_av_tags
+    assert "front 0" in outputs[0].answer_text
+
+    # missing cards don't prevent the rest of the batch from rendering
+    col.remove_notes([col.get_card(cids[1]).nid])
+    outputs = list(col.render_cards(cids, batch_size=3))
+    assert len(outputs) == len(cids)
+    assert outputs[1].question_text == col.tr.browsing_row_deleted()
+    assert "front 2" in outputs[2].question_text
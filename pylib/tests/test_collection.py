@@ -173,3 +173,118 @@ def test_db_named_args(capsys):
 
     # swallow the warning
     _ = capsys.readouterr()
+
+
+def test_db_iterate():
+    col = getEmptyCol()
+    for i in range(5):
+        note = col.newNote()
+        note["Front"] = str(i)
+        col.addNote(note)
+    expected = col.db.all("select id from notes order by id")
+    # rows come back in multiple batches, in order
+    assert list(col.db.iterate("select id from notes order by id", batch_size=2)) == (
+        expected
+    )
+    # arguments are passed through
+    assert list(col.db.iterate("select id from notes where id > ?", 0)) == expected
+    # breaking out early discards the remaining rows
+    for _ in col.db.iterate("select id from notes", batch_size=1):
+        break
+    assert list(col.db.iterate("select id from notes where id < 0")) == []
+
+
+def test_db_binary_rows():
+    col = getEmptyCol()
+    rows = [(i, i / 2, f"tëxt {i}", None if i % 2 else "é") for i in range(1, 1000)]
+    col.db.execute("create table bintest (a int, b real, c text, d text)")
+    col.db.executemany("insert into bintest values (?,?,?,?)", rows)
+    sql = "select * from bintest order by a"
+    # large enough to be sent in binary form, and decoded identically to JSON
+    binary = col._backend.db_query(sql, [], False, True)
+    assert binary == col._backend.db_query(sql, [], False, False)
+    assert binary == [list(row) for row in rows]
+
+
+def test_db_columns():
+    col = getEmptyCol()
+    col.db.execute("create table coltest (a int, b real, c text, d int)")
+    col.db.executemany(
+        "insert into coltest values (?,?,?,?)",
+        [(1, 0.5, "one", None), (2, 1.5, "two", 3)],
+    )
+    a, b, c, d = col.db.columns("select * from coltest order by a")
+    assert a.typecode == "q" and list(a) == [1, 2]
+    assert b.typecode == "d" and list(b) == [0.5, 1.5]
+    assert c == ["one", "two"]
+    assert d == [None, 3]
+    # an empty result still has one entry per column
+    empty = col.db.columns("select a, c from coltest where 0")
+    assert [list(column) for column in empty] == [[], []]
+
+
+def test_db_prepare():
+    col = getEmptyCol()
+    note = col.newNote()
+    note["Front"] = "one"
+    col.addNote(note)
+    with col.db.prepare("select flds from notes where id = ?") as stmt:
+        assert stmt.scalar(note.id) == "one\x1f"
+        assert stmt.scalar(note.id + 1) is None
+        assert stmt.all(note.id) == [["one\x1f"]]
+        assert stmt.runs == 3
+    assert col.db.prepared_reuses == 2
+    assertException(Exception, lambda: stmt.scalar(note.id))
+
+
+def test_db_bound_ids():
+    col = getEmptyCol()
+    nids = []
+    for i in range(5):
+        note = col.newNote()
+        note["Front"] = str(i)
+        col.addNote(note)
+        nids.append(note.id)
+    sql = "select id from notes where id in bound_ids order by id"
+    assert col.db.list(sql, ids=nids[1:3]) == nids[1:3]
+    # the ids are replaced on each query, and can be combined with arguments
+    assert col.db.list(sql, ids=nids[3:]) == nids[3:]
+    sql = "select id from notes where id in bound_ids and id > ?"
+    assert col.db.list(sql, nids[0], ids=nids[:2]) == nids[1:2]
+    assert col.db.scalar("select count() from notes where id in bound_ids", ids=[]) == 0
+    # duplicate ids are fine
+    rows = col.db.iterate("select id from notes where id in bound_ids", ids=nids * 2)
+    assert sorted(row[0] for row in rows) == nids
+    (column,) = col.db.columns("select id from notes where id in bound_ids", ids=nids)
+    assert sorted(column) == nids
+
+
+def test_get_notes_and_cards():
+    col = getEmptyCol()
+    nids = []
+    for i in range(3):
+        note = col.newNote()
+        note["Front"] = str(i)
+        col.addNote(note)
+        nids.append(note.id)
+    notes = col.get_notes(nids)
+    assert len(notes) == 3
+    assert [note["Front"] for note in notes] == ["0", "1", "2"]
+    assert notes[0] is notes[0]
+    cids = [cid for nid in nids for cid in col.card_ids_of_note(nid)]
+    assert [card.nid for card in col.get_cards(cids)] == nids
+    assert [note.id for note in col.iter_notes(nids, batch_size=2)] == nids
+    assert [card.id for card in col.iter_cards(cids, batch_size=2)] == cids
+
+
+def test_browser_rows_for_ids():
+    col = getEmptyCol()
+    note = col.newNote()
+    note["Front"] = "one"
+    col.addNote(note)
+    columns = col.load_browser_card_columns()
+    cid = note.cards()[0].id
+    rows, failed = col.browser_rows_for_ids([cid, 123])
+    assert failed == [123]
+    assert list(rows) == [cid]
+    assert len(rows[cid].cells) == len(columns)
@@ -3,8 +3,10 @@
 
 from __future__ import annotations
 
+import io
 import os
 import tempfile
+import zipfile
 
 from anki.collection import Collection as aopen
 from anki.exporting import *
@@ -102,6 +104,85 @@ def test_export_ankipkg():
     e.exportInto(newname)
 
 
+def test_media_reference_index():
+    col = getEmptyCol()
+    for fname in ("a.mp3", "b.mp3", "_style.css", "_unused.css"):
+        with open(os.path.join(col.media.dir(), fname), "w") as file:
+            file.write("test")
+    note = col.newNote()
+    note["Front"] = "[sound:a.mp3]"
+    col.addNote(note)
+    notetype = note.note_type()
+    index = media_reference_index(col)
+    assert index is media_reference_index(col)
+
+    def note_files():
+        flds = col.db.scalar("select flds from notes where id = ?", note.id)
+        return index.files_in_notes([(note.id, notetype["id"], flds)])
+
+    def notetype_files():
+        return index.files_in_notetypes([notetype["id"]], col.media.dir())
+
+    assert note_files() == ["a.mp3"]
+    assert notetype_files() == []
+    # edits are noticed on the next lookup
+    note["Front"] = "[sound:b.mp3]"
+    col.update_note(note)
+    assert note_files() == ["b.mp3"]
+    notetype = col.models.get(notetype["id"])
+    notetype["css"] += "@import url(_style.css);"
+    col.models.update_dict(notetype)
+    assert notetype_files() == ["_style.css"]
+    # and exports use the index
+    e = AnkiExporter(col)
+    fd, newname = tempfile.mkstemp(prefix="ankitest", suffix=".anki2")
+    os.close(fd)
+    os.unlink(newname)
+    e.exportInto(newname)
+    assert sorted(e.mediaFiles) == ["_style.css", "b.mp3"]
+
+
+def test_export_media_matches_zipfile(monkeypatch):
+    import anki.exporting
+
+    col = getEmptyCol()
+    media_dir = col.media.dir()
+    contents = {
+        "a.mp3": b"sound" * 10,
+        "b.svg": b"<svg>" + b"<path d='M 0 0'/>" * 2000 + b"</svg>",
+        "c.jpg": os.urandom(100_000),
+    }
+    for name, data in contents.items():
+        with open(os.path.join(media_dir, name), "wb") as file:
+            file.write(data)
+    files = ["a.mp3", "missing.jpg", "b.svg", "c.jpg"]
+
+    def legacy_package() -> bytes:
+        buf = io.BytesIO()
+        with zipfile.ZipFile(buf, "w", zipfile.ZIP_DEFLATED) as z:
+            for c, name in enumerate(files):
+                path = os.path.join(media_dir, name)
+                if os.path.exists(path):
+                    if name.endswith(".svg"):
+                        z.write(path, str(c), zipfile.ZIP_DEFLATED)
+                    else:
+                        z.write(path, str(c), zipfile.ZIP_STORED)
+        return buf.getvalue()
+
+    def package() -> tuple[bytes, dict[str, str]]:
+        buf = io.BytesIO()
+        with zipfile.ZipFile(buf, "w", zipfile.ZIP_DEFLATED) as z:
+            media = AnkiPackageExporter(col)._exportMedia(z, files, media_dir)
+        return buf.getvalue(), media
+
+    data, media = package()
+    assert media == {"0": "a.mp3", "2": "b.svg", "3": "c.jpg"}
+    assert data == legacy_package()
+    # large files are streamed rather than buffered, with the same result
+    monkeypatch.setattr(anki.exporting, "MEDIA_EXPORT_MAX_BUFFERED_FILE", 1000)
+    assert package()[0] == legacy_package()
+
+
 @errorsAfterMidnight
 def test_export_anki_due():
     setup1()
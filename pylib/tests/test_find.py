@@ -5,7 +5,9 @@
 import pytest
 
 from anki.browser import BrowserConfig
+from anki.collection import Collection, SearchNode
 from anki.consts import *
+from anki.utils import split_fields, strip_html_media_list
 from tests.shared import getEmptyCol, isNearCutoff
 
 
@@ -312,3 +314,72 @@ def test_findDupes():
     assert not r
     # front isn't dupe
     assert col.find_dupes("Front") == []
+
+
+def reference_find_dupes(
+    col: Collection, field_name: str, search: str = ""
+) -> list[tuple[str, list]]:
+    "The Python implementation that find_dupes() used before it moved to the backend."
+    nids = col.find_notes(
+        col.build_search_string(search, SearchNode(field_name=field_name))
+    )
+    # go through notes
+    vals: dict[str, list[int]] = {}
+    dupes = []
+    fields: dict[int, int] = {}
+
+    def ord_for_mid(mid: int) -> int:
+        if mid not in fields:
+            model = col.models.get(mid)
+            for idx, field in enumerate(model["flds"]):
+                if field["name"].lower() == field_name.lower():
+                    fields[mid] = idx
+                    break
+        return fields[mid]
+
+    found_nids = []
+    found_vals = []
+    for nid, mid, flds in col.db.all(
+        "select id, mid, flds from notes where id in bound_ids", ids=nids
+    ):
+        flds = split_fields(flds)
+        ord = ord_for_mid(mid)
+        if ord is None:
+            continue
+        found_nids.append(nid)
+        found_vals.append(flds[ord])
+    for nid, val in zip(found_nids, strip_html_media_list(found_vals)):
+        # empty does not count as duplicate
+        if not val:
+            continue
+        vals.setdefault(val, []).append(nid)
+        if len(vals[val]) == 2:
+            dupes.append((val, vals[val]))
+    return dupes
+
+
+def test_find_dupes_matches_reference():
+    col = getEmptyCol()
+    backs = ["foo", "<b>foo</b>", "bar", "", "<br>", "a <img src=a.jpg>", "bar", "FOO"]
+    for notetype in ("Basic", "Basic (and reversed card)"):
+        model = col.models.by_name(notetype)
+        assert model
+        for idx, back in enumerate(backs):
+            note = col.new_note(model)
+            note["Front"] = f"{notetype} {idx}"
+            note["Back"] = back
+            col.addNote(note)
+
+    def normalized(dupes: list[tuple[str, list]]) -> list[tuple[str, list]]:
+        return sorted((text, sorted(nids)) for text, nids in dupes)
+
+    for field_name, search in [
+        ("Back", ""),
+        ("back", "bar"),
+        ("Back", "note:Basic"),
+        ("Back", "invalid"),
+        ("Front", ""),
+    ]:
+        assert normalized(col.find_dupes(field_name, search)) == normalized(
+            reference_find_dupes(col, field_name, search)
+        )
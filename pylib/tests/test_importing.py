@@ -96,6 +96,77 @@ def test_apkg():
     assert len(os.listdir(col.media.dir())) == 2
 
 
+def test_anki2_batches():
+    col = getEmptyCol()
+    nids = []
+    for i in range(5):
+        n = col.newNote()
+        n["Front"] = str(i)
+        col.addNote(n)
+        nids.append(n.id)
+    col.close()
+    # importing in batches gives the same result as a normal import
+    dst = getEmptyCol()
+    imp = Anki2Importer(dst, col.path)
+    imp.batchSize = 2
+    imp.run()
+    assert imp.added == 5
+    assert sorted(dst.db.list("select id from notes")) == nids
+    assert dst.card_count() == 5
+    # and importing again finds them all
+    imp = Anki2Importer(dst, col.path)
+    imp.batchSize = 2
+    imp.run()
+    assert imp.added == 0 and imp.dupes == 5
+    assert dst.card_count() == 5
+    # an interrupted import resumes after the last committed note
+    dst = getEmptyCol()
+    imp = Anki2Importer(dst, col.path)
+    imp.batchSize = 2
+    imp._prepareFiles()
+    dst.set_config(imp._resumeKey(), nids[2])
+    imp.src.close(downgrade=False)
+    imp = Anki2Importer(dst, col.path)
+    imp.batchSize = 2
+    imp.run()
+    assert imp.added == 2
+    assert sorted(dst.db.list("select id from notes")) == nids[3:]
+
+
+def test_anki2_batches_changed_schema():
+    col = getEmptyCol()
+    n = col.newNote()
+    n["Front"] = "front"
+    col.addNote(n)
+    col.close()
+    dst = getEmptyCol()
+    imp = Anki2Importer(dst, col.path)
+    imp.batchSize = 2
+    imp.run()
+    assert dst.card_count() == 1
+    # add a template to the source notetype, giving the note a second card
+    col.reopen()
+    mm = col.models
+    m = mm.current()
+    t = mm.new_template("Reverse")
+    t["qfmt"] = "{{Back}}"
+    t["afmt"] = "{{Front}}"
+    mm.add_template(m, t)
+    mm.save(m)
+    n.load()
+    n["Back"] = "back"
+    col.update_note(n)
+    assert col.card_count() == 2
+    col.close()
+    # the note's schema no longer matches, so neither it nor its new card
+    # should be imported
+    imp = Anki2Importer(dst, col.path)
+    imp.batchSize = 2
+    imp.run()
+    assert imp.added == 0
+    assert dst.card_count() == 1
+
+
 def test_anki2_diffmodel_templates():
     # different from the above as this one tests only the template text being
     # changed, not the number of cards/fields
@@ -181,6 +252,22 @@ def test_csv():
     col.close()
 
 
+def test_csv_dupe_index_refresh():
+    col = getEmptyCol()
+    file = str(os.path.join(testDir, "support", "text-2fields.txt"))
+    i = TextImporter(col, file)
+    i.initMapping()
+    i.importMode = 1
+    i.run()
+    assert i.total == 5
+    # notes removed outside the importer must not be reported as duplicates
+    col.remove_notes(col.find_notes(""))
+    i.run()
+    assert i.total == 5
+    assert col.note_count() == 5
+    col.close()
+
+
 def test_csv2():
     col = getEmptyCol()
     mm = col.models
@@ -5,6 +5,7 @@
 
 import os
 import shutil
+import tempfile
 
 from anki.config import Config
 from anki.lang import without_unicode_isolation
@@ -59,3 +60,56 @@ def test_latex():
     col.addNote(note)
     assert len(os.listdir(col.media.dir())) == 2
     assert ".png" in oldcard.question()
+
+
+def test_render_all_latex_errors():
+    col = getEmptyCol()
+    col.set_config_bool(Config.Bool.RENDER_LATEX, True)
+    import anki.latex
+
+    anki.latex.pngCommands[0][0] = "nolatex"
+    try:
+        nids = []
+        for body in ("one", "two", "one"):
+            note = col.newNote()
+            note["Front"] = f"[latex]{body}[/latex]"
+            col.addNote(note)
+            nids.append(note.id)
+        # a failed render is reported against a note that uses it
+        out = col.media.render_all_latex()
+        assert out is not None
+        nid, err = out
+        assert nid in nids
+        assert "executing nolatex" in without_unicode_isolation(err)
+        assert len(os.listdir(col.media.dir())) == 0
+        # nothing is rendered when rendering is disabled
+        col.set_config_bool(Config.Bool.RENDER_LATEX, False)
+        out = col.media.render_all_latex()
+        assert out is not None
+        assert out[0] == nids[0]
+    finally:
+        anki.latex.pngCommands[0][0] = "latex"
+    col.close()
+
+
+def test_latex_render_cache():
+    from anki.latex import LatexRenderCache, LatexRenderJob
+
+    with tempfile.TemporaryDirectory() as folder:
+        cache = LatexRenderCache(folder, max_bytes=250)
+        png = LatexRenderJob(filename="a.png", latex="x", svg=False)
+        svg = LatexRenderJob(filename="a.svg", latex="x", svg=True)
+        assert cache.get(png) is None
+        cache.put(png, b"1" * 100)
+        # keyed on the document and format, not the filename
+        assert cache.get(LatexRenderJob("b.png", "x", False)) == b"1" * 100
+        assert cache.get(svg) is None
+        assert (cache.hits, cache.misses) == (1, 2)
+        # least recently used entries are dropped when the limit is exceeded
+        cache.put(svg, b"2" * 100)
+        for entry in os.listdir(folder):
+            if entry.endswith(".svg"):
+                os.utime(os.path.join(folder, entry), (0, 0))
+        cache.put(LatexRenderJob("c.png", "y", False), b"3" * 100)
+        assert cache.get(svg) is None
+        assert cache.get(png) == b"1" * 100
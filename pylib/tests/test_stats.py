@@ -37,3 +37,18 @@ def test_graphs():
     with open(os.path.join(dir, "test.html"), "w", encoding="UTF-8") as note:
         note.write(rep)
     return
+
+
+def test_ivls():
+    col = getEmptyCol()
+    for ivl in (1, 3, 3, 40):
+        note = col.newNote()
+        note["Front"] = str(ivl)
+        col.addNote(note)
+        col.db.execute(
+            "update cards set type = 2, queue = 2, ivl = ? where nid = ?", ivl, note.id
+        )
+    (ivls, total, avg, max_), chunk = col.stats()._ivls()
+    assert chunk == 1
+    assert ivls == [(1, 1), (3, 2)]
+    assert (total, avg, max_) == (4, 11.75, 40)
@@ -1,6 +1,13 @@
 # Copyright: Ankitects Pty Ltd and contributors
 # License: GNU AGPL, version 3 or later; http://www.gnu.org/licenses/agpl.html
 
+from anki import hooks
+from anki.template import (
+    FieldFilterCache,
+    field_filter_cache,
+    register_pure_field_filter,
+    unregister_pure_field_filter,
+)
 from tests.shared import getEmptyCol
 
 
@@ -16,3 +23,67 @@ def test_deferred_frontside():
     col.addNote(note)
 
     assert "xxtest" in note.cards()[0].answer()
+
+
+def test_pure_field_filter_cache():
+    col = getEmptyCol()
+    m = col.models.current()
+    m["tmpls"][0]["qfmt"] = "{{counted:Front}}"
+    m["tmpls"][0]["afmt"] = "{{counted:Front}} {{counted:Back}}"
+    col.models.save(m)
+
+    note = col.newNote()
+    note["Front"] = "front"
+    note["Back"] = "back"
+    col.addNote(note)
+    card = note.cards()[0]
+
+    calls = []
+
+    def counted(text: str, field_name: str, filter_name: str, ctx) -> str:
+        if filter_name != "counted":
+            return text
+        calls.append((field_name, ctx.question_side))
+        return text.upper()
+
+    hooks.field_filter.append(counted)
+    register_pure_field_filter("counted")
+    try:
+        card.render_output(reload=True)
+        # each side is filtered separately
+        assert len(calls) == 3
+        output = card.render_output(reload=True)
+        assert len(calls) == 3
+        assert output.question_text == "FRONT"
+        assert "FRONT BACK" in output.answer_text
+
+        # changing the note clears the cache
+        note["Back"] = "changed"
+        col.update_note(note)
+        card.render_output(reload=True)
+        assert len(calls) == 6
+
+        # as does changing the notetype
+        col.models.save(col.models.get(m["id"]))
+        card.render_output(reload=True)
+        assert len(calls) == 9
+    finally:
+        hooks.field_filter.remove(counted)
+        unregister_pure_field_filter("counted")
+    assert not field_filter_cache()
+
+
+def test_field_filter_cache_eviction():
+    cache = FieldFilterCache(max_chars=30)
+    cache.put(("f", "Front", "one", True), "ONE")
+    cache.put(("f", "Front", "two", True), "TWO")
+    assert cache.get(("f", "Front", "one", True)) == "ONE"
+    # the least recently used entry is evicted first
+    cache.put(("f", "Front", "three", True), "THREE")
+    assert cache.get(("f", "Front", "two", True)) is None
+    assert cache.get(("f", "Front", "one", True)) == "ONE"
+    assert cache.get(("f", "Front", "three", True)) == "THREE"
+    assert cache.hits == 3 and cache.misses == 1
+    # entries larger than the cache are not stored
+    cache.put(("f", "Front", "x" * 30, True), "X")
+    assert len(cache) == 2
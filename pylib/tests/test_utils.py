@@ -1,10 +1,29 @@
 # Copyright: Ankitects Pty Ltd and contributors
 # License: GNU AGPL, version 3 or later; http://www.gnu.org/licenses/agpl.html
 
-from anki.utils import int_version_to_str
+from anki.utils import (
+    field_checksum,
+    field_checksums,
+    int_version_to_str,
+    strip_html,
+    strip_html_list,
+    strip_html_media,
+    strip_html_media_list,
+)
+from tests.shared import getEmptyCol
 
 
 def test_int_version_to_str():
     assert int_version_to_str(23) == "2.1.23"
     assert int_version_to_str(230900) == "23.09"
     assert int_version_to_str(230901) == "23.09.1"
+
+
+def test_batched_html_stripping():
+    # the backend used for stripping is set up when a collection is opened
+    getEmptyCol()
+    texts = ["<b>one</b>", "two <img src='a.jpg'>", "", "&nbsp;3 &lt; 4"]
+    assert list(strip_html_list(texts)) == [strip_html(t) for t in texts]
+    assert list(strip_html_media_list(texts)) == [strip_html_media(t) for t in texts]
+    assert list(field_checksums(texts)) == [field_checksum(t) for t in texts]
+    assert list(strip_html_list([])) == []
@@ -44,6 +44,12 @@ hooks = [
         args=["count: int"],
         doc="Only used by legacy .apkg exporter. Will be deprecated in the future.",
     ),
+    Hook(
+        name="media_export_did_progress",
+        args=["progress: anki.exporting.MediaExportProgress"],
+        doc="""Called periodically by the legacy .apkg exporter while media files are
+        added to the package, and once when they are done.""",
+    ),
     Hook(
         name="legacy_export_progress",
         args=["progress: str"],
@@ -11,6 +11,11 @@ import sys
 from collections.abc import Callable
 from typing import TYPE_CHECKING, Any, Union, cast
 
+from . import startup_timing
+
+# time as much of startup as possible, if enabled
+startup_timing.start()
+
 if "ANKI_FIRST_RUN" in os.environ:
     from .package import first_run_setup
 
@@ -51,6 +56,7 @@ import argparse
 import builtins
 import cProfile
 import getpass
+import importlib
 import locale
 import tempfile
 import traceback
@@ -119,7 +125,38 @@ import aqt.forms
 
 
 from aqt import addcards, addons, browser, editcurrent, filtered_deck  # isort:skip
-from aqt import stats, about, preferences, mediasync  # isort:skip
+from aqt import about, preferences, mediasync  # isort:skip
+
+# Rarely used modules that are imported on first use, to speed up startup. They
+# can still be accessed as attributes of this package, eg aqt.stats.
+_LAZY_SUBMODULES = {
+    "dbcheck",
+    "debug_console",
+    "emptycards",
+    "exporting",
+    "import_export",
+    "importing",
+    "mediacheck",
+    "stats",
+}
+
+
+# hidden from type checkers, so misspelled attributes are still caught
+if not TYPE_CHECKING:
+
+    def __getattr__(name: str) -> Any:
+        if name in _LAZY_SUBMODULES:
+            return importlib.import_module(f"aqt.{name}")
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+def _lazy_dialog(module: str, name: str) -> Callable[..., Any]:
+    "A dialog creator that imports the dialog's module when first called."
+
+    def creator(*args: Any, **kwargs: Any) -> Any:
+        return getattr(importlib.import_module(module), name)(*args, **kwargs)
+
+    return creator
 
 
 class DialogManager:
@@ -129,8 +166,8 @@ class DialogManager:
         "Browser": [browser.Browser, None],
         "EditCurrent": [editcurrent.EditCurrent, None],
         "FilteredDeckConfigDialog": [filtered_deck.FilteredDeckConfigDialog, None],
-        "DeckStats": [stats.DeckStats, None],
-        "NewDeckStats": [stats.NewDeckStats, None],
+        "DeckStats": [_lazy_dialog("aqt.stats", "DeckStats"), None],
+        "NewDeckStats": [_lazy_dialog("aqt.stats", "NewDeckStats"), None],
         "About": [about.show, None],
         "Preferences": [preferences.Preferences, None],
         "sync_log": [mediasync.MediaSyncDialog, None],
@@ -585,6 +622,8 @@ def _run(argv: list[str] | None = None, exec: bool = True) -> AnkiApp | None:
     global mw
     global profiler
 
+    startup_timing.mark("aqt imported")
+
     if argv is None:
         argv = sys.argv
 
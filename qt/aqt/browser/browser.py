@@ -32,8 +32,6 @@ from anki.utils import is_mac
 from aqt import AnkiQt, gui_hooks
 from aqt.editor import Editor, EditorWebView
 from aqt.errors import show_exception
-from aqt.exporting import ExportDialog as LegacyExportDialog
-from aqt.import_export.exporting import ExportDialog
 from aqt.operations.card import set_card_deck, set_card_flag
 from aqt.operations.collection import redo, undo
 from aqt.operations.note import remove_notes
@@ -1031,6 +1029,9 @@ class Browser(QMainWindow):
     @no_arg_trigger
     @skip_if_selection_is_empty
     def _on_export_notes(self) -> None:
+        from aqt.exporting import ExportDialog as LegacyExportDialog
+        from aqt.import_export.exporting import ExportDialog
+
         if not self.mw.pm.legacy_import_export():
             nids = self.selected_notes()
             ExportDialog(self.mw, nids=nids, parent=self)
@@ -10,8 +10,9 @@ import anki
 import anki.find
 import aqt
 import aqt.forms
-from anki.collection import SearchNode
+from anki.collection import Progress, SearchNode
 from anki.notes import NoteId
+from aqt.progress import ProgressUpdate
 from aqt.qt import *
 from aqt.qt import sip
 
@@ -69,7 +70,7 @@ class FindDuplicatesDialog(QDialog):
                 parent=self.browser,
                 op=lambda col: col.find_dupes(field, search_text),
                 success=self.show_duplicates_report,
-            ).run_in_background()
+            ).with_backend_progress(find_duplicates_progress_update).run_in_background()
 
         search = form.buttonBox.addButton(
             tr.actions_search(), QDialogButtonBox.ButtonRole.ActionRole
@@ -132,3 +133,13 @@ class FindDuplicatesDialog(QDialog):
     def _on_duplicate_clicked(self, link: str) -> None:
         self.browser.search_for(link)
         self.browser.onNote()
+
+
+def find_duplicates_progress_update(progress: Progress, update: ProgressUpdate) -> None:
+    if not progress.HasField("find_duplicates"):
+        return
+    update.label = tr.browsing_find_duplicates()
+    update.max = progress.find_duplicates.total
+    update.value = progress.find_duplicates.current
+    if update.user_wants_abort:
+        update.abort = True
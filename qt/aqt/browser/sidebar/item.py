@@ -86,10 +86,41 @@ class SidebarItem:
         self._row_in_parent: int | None = None
         self._search_matches_self = False
         self._search_matches_child = False
+        self._load_children: Callable[[], None] | None = None
+        self._children_match: Callable[[str], bool] | None = None
 
     def add_child(self, cb: SidebarItem) -> None:
         self.children.append(cb)
         cb._parent_item = self
+        cb._row_in_parent = len(self.children) - 1
+
+    def defer_children(
+        self, load: Callable[[], None], matches: Callable[[str], bool]
+    ) -> None:
+        """Add children only once they are needed, eg when the item is expanded.
+
+        load() should add the children to this item. matches() is passed the
+        lowered search text, and should return True if the deferred children
+        or their descendants would match it."""
+        self._load_children = load
+        self._children_match = matches
+
+    def has_children(self) -> bool:
+        return bool(self.children) or self._load_children is not None
+
+    def has_deferred_children(self) -> bool:
+        return self._load_children is not None
+
+    def deferred_children_match(self, lowered_text: str) -> bool:
+        "True if the deferred children or their descendants would match."
+        return bool(self._children_match and self._children_match(lowered_text))
+
+    def load_children(self) -> None:
+        "Add deferred children, if any."
+        if load := self._load_children:
+            self._load_children = None
+            self._children_match = None
+            load()
 
     def add_simple(
         self,
@@ -131,7 +162,8 @@ class SidebarItem:
         return self._search_matches_self
 
     def search(self, lowered_text: str) -> bool:
-        "True if we or child matched."
+        """True if we or child matched. Deferred children are not searched;
+        SidebarModel.search() adds those that contain a match beforehand."""
         self._search_matches_self = lowered_text in self.name.lower()
         self._search_matches_child = any(
             [child.search(lowered_text) for child in self.children]
@@ -32,7 +32,28 @@ class SidebarModel(QAbstractItemModel):
         return self.createIndex(item._row_in_parent, 0, item)
 
     def search(self, text: str) -> bool:
-        return self.root.search(text.lower())
+        lowered_text = text.lower()
+        self._load_matching_children(self.root, lowered_text)
+        return self.root.search(lowered_text)
+
+    def _load_matching_children(self, item: SidebarItem, lowered_text: str) -> None:
+        "Add the deferred children of items whose subtrees contain a match."
+        if item.deferred_children_match(lowered_text):
+            self._insert_deferred_children(item)
+        for child in item.children:
+            self._load_matching_children(child, lowered_text)
+
+    def _insert_deferred_children(self, item: SidebarItem) -> None:
+        # the callback adds the children directly, so hold them back until
+        # the view has been told how many rows are coming
+        item.load_children()
+        children, item.children = item.children, []
+        if not children:
+            return
+        parent = QModelIndex() if item is self.root else self.index_for_item(item)
+        self.beginInsertRows(parent, 0, len(children) - 1)
+        item.children = children
+        self.endInsertRows()
 
     # Qt API
     ######################################################################
@@ -47,6 +68,26 @@ class SidebarModel(QAbstractItemModel):
     def columnCount(self, parent: QModelIndex = QModelIndex()) -> int:
         return 1
 
+    def hasChildren(self, parent: QModelIndex = QModelIndex()) -> bool:
+        if not parent.isValid():
+            return bool(self.root.children)
+        item: SidebarItem = parent.internalPointer()
+        return item.has_children()
+
+    def canFetchMore(self, parent: QModelIndex) -> bool:
+        if not parent.isValid():
+            return False
+        item: SidebarItem = parent.internalPointer()
+        return item.has_deferred_children()
+
+    def fetchMore(self, parent: QModelIndex) -> None:
+        "Called by Qt when an item with deferred children is expanded."
+        if not parent.isValid():
+            return
+        item: SidebarItem = parent.internalPointer()
+        if item.has_deferred_children():
+            self._insert_deferred_children(item)
+
     def index(
         self, row: int, column: int, parent: QModelIndex = QModelIndex()
     ) -> QModelIndex:
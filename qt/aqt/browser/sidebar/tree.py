@@ -4,7 +4,8 @@ from __future__ import annotations
 
 from collections.abc import Callable, Iterable
 from enum import Enum, auto
-from typing import cast
+from functools import partial
+from typing import Union, cast
 
 import aqt
 import aqt.browser
@@ -68,6 +69,19 @@ class SidebarStage(Enum):
     TAGS = auto()
 
 
+def _tree_nodes_match(
+    nodes: Iterable[Union[TagTreeNode, DeckTreeNode]], lowered_text: str
+) -> bool:
+    "True if the name of any of the nodes or their descendants contains the text."
+    stack = list(nodes)
+    while stack:
+        node = stack.pop()
+        if lowered_text in node.name.lower():
+            return True
+        stack.extend(node.children)
+    return False
+
+
 # fixme: we should have a top-level Sidebar class inheriting from QWidget that
 # handles the treeview, search bar and so on. Currently the treeview embeds the
 # search bar which is wrong, and the layout code is handled in browser.py instead
@@ -768,7 +782,14 @@ class SidebarTreeView(QTreeView):
                 )
                 root.add_child(item)
                 newhead = f"{head + node.name}::"
-                render(item, node.children, newhead)
+                if not node.collapsed:
+                    render(item, node.children, newhead)
+                elif node.children:
+                    # build collapsed subtrees only when they're expanded
+                    item.defer_children(
+                        partial(render, item, node.children, newhead),
+                        partial(_tree_nodes_match, node.children),
+                    )
 
         tree = self.col.tags.tree()
         root = self._section_root(
@@ -822,7 +843,14 @@ class SidebarTreeView(QTreeView):
                 )
                 root.add_child(item)
                 newhead = f"{head + node.name}::"
-                render(item, node.children, newhead)
+                if not node.collapsed:
+                    render(item, node.children, newhead)
+                elif node.children:
+                    # build collapsed subtrees only when they're expanded
+                    item.defer_children(
+                        partial(render, item, node.children, newhead),
+                        partial(_tree_nodes_match, node.children),
+                    )
 
         tree = self.col.decks.deck_tree()
         root = self._section_root(
@@ -1017,6 +1045,10 @@ class SidebarTreeView(QTreeView):
         if self.current_search:
             return
 
+        # the children of collapsed items may not have been added yet
+        for index in self.selectedIndexes():
+            self.model().fetchMore(index)
+
         selected_items = self._selected_items()
         if not any(item.children for item in selected_items):
             return
@@ -1026,13 +1058,18 @@ class SidebarTreeView(QTreeView):
         if any(item.expanded for item in selected_items if item.children):
             menu.addAction(tr.browsing_sidebar_collapse(), lambda: set_expanded(False))
         if any(
-            not c.expanded for i in selected_items for c in i.children if c.children
+            not c.expanded
+            for i in selected_items
+            for c in i.children
+            if c.has_children()
         ):
             menu.addAction(
                 tr.browsing_sidebar_expand_children(),
                 lambda: set_children_expanded(True),
             )
-        if any(c.expanded for i in selected_items for c in i.children if c.children):
+        if any(
+            c.expanded for i in selected_items for c in i.children if c.has_children()
+        ):
             menu.addAction(
                 tr.browsing_sidebar_collapse_children(),
                 lambda: set_children_expanded(False),
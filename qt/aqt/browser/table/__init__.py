@@ -65,6 +65,15 @@ class CellRow:
     def is_stale(self, threshold: float) -> bool:
         return self.refreshed_at < threshold
 
+    @staticmethod
+    def from_backend(row: BrowserRow) -> CellRow:
+        return CellRow(
+            ((cell.text, cell.is_rtl, cell.elide_mode) for cell in row.cells),
+            row.color,
+            row.font_name,
+            row.font_size,
+        )
+
     @staticmethod
     def generic(length: int, cell_text: str) -> CellRow:
         return CellRow(
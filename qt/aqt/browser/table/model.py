@@ -3,6 +3,7 @@
 from __future__ import annotations
 
 import time
+from collections import OrderedDict
 from collections.abc import Callable, Sequence
 from typing import Any
 
@@ -10,27 +11,73 @@ import aqt
 import aqt.browser
 from anki.cards import Card, CardId
 from anki.collection import BrowserColumns as Columns
-from anki.collection import Collection
+from anki.collection import BrowserRow, Collection
 from anki.consts import *
 from anki.errors import BackendError, NotFoundError
 from anki.notes import Note, NoteId
 from aqt import gui_hooks
 from aqt.browser.table import Cell, CellRow, Column, ItemId, SearchContext
 from aqt.browser.table.state import ItemState
+from aqt.operations import QueryOp
 from aqt.qt import *
 from aqt.utils import tr
 
+# the maximum number of rows kept in memory
+ROW_CACHE_SIZE = 10_000
+
+
+class RowCache:
+    """The rows of recently displayed items, dropping the least recently used
+    ones once there are more than max_size."""
+
+    def __init__(self, max_size: int = ROW_CACHE_SIZE) -> None:
+        self.max_size = max_size
+        self._rows: OrderedDict[ItemId, CellRow] = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._rows)
+
+    def __contains__(self, item: ItemId) -> bool:
+        return item in self._rows
+
+    def __getitem__(self, item: ItemId) -> CellRow:
+        return self._rows[item]
+
+    def __setitem__(self, item: ItemId, row: CellRow) -> None:
+        self._rows[item] = row
+        self._rows.move_to_end(item)
+        if len(self._rows) > self.max_size:
+            self._rows.popitem(last=False)
+
+    def get(self, item: ItemId) -> CellRow | None:
+        "Return the row and mark it as recently used."
+        if (row := self._rows.get(item)) is not None:
+            self._rows.move_to_end(item)
+        return row
+
+    def peek(self, item: ItemId) -> CellRow | None:
+        "Return the row without affecting its eviction order."
+        return self._rows.get(item)
+
+    def clear(self) -> None:
+        self._rows.clear()
+
 
 class DataModel(QAbstractTableModel):
     """Data manager for the browser table.
 
     _items -- The card or note ids currently hold and corresponding to the
               table's rows.
-    _rows -- The cached data objects to render items to rows.
+    _rows -- The cached data objects to render items to rows, bounded in size.
     columns -- The data objects of all available columns, used to define the display
                of active columns and list all toggleable columns to the user.
     _block_updates -- If True, serve stale content to avoid hitting the DB.
     _stale_cutoff -- A threshold to decide whether a cached row has gone stale.
+    _prefetch_rows -- If non-zero, missing rows are fetched in the background in
+                      blocks, covering this many rows on either side of the
+                      requested one, and a placeholder is shown in the meantime.
+    _prefetching -- Items whose rows are currently being fetched in the background.
+    _prefetch_generation -- Bumped whenever in-flight prefetches become invalid.
     """
 
     def __init__(
@@ -49,13 +96,16 @@ class DataModel(QAbstractTableModel):
         gui_hooks.browser_did_fetch_columns(self.columns)
         self._state: ItemState = state
         self._items: Sequence[ItemId] = []
-        self._rows: dict[int, CellRow] = {}
+        self._rows = RowCache()
         self._block_updates = False
         self._stale_cutoff = 0.0
         self._on_row_state_will_change = row_state_will_change_callback
         self._on_row_state_changed = row_state_changed_callback
         assert aqt.mw is not None
         self._want_tooltips = aqt.mw.pm.show_browser_table_tooltips()
+        self._prefetch_rows = aqt.mw.pm.browser_table_prefetch_rows()
+        self._prefetching: set[ItemId] = set()
+        self._prefetch_generation = 0
 
     # Row Object Interface
     ######################################################################
@@ -70,12 +120,19 @@ class DataModel(QAbstractTableModel):
         if row := self._rows.get(item):
             if not self._block_updates and row.is_stale(self._stale_cutoff):
                 # need to refresh
+                if self._prefetch_rows:
+                    # keep showing the stale row until the new one arrives
+                    self._prefetch_around(index.row())
+                    return row
                 return self._fetch_row_and_update_cache(index, item, row)
             # return row, even if it's stale
             return row
         if self._block_updates:
             # blank row until we unblock
             return CellRow.placeholder(self.len_columns())
+        if self._prefetch_rows:
+            self._prefetch_around(index.row())
+            return CellRow.placeholder(self.len_columns())
         # missing row, need to build
         return self._fetch_row_and_update_cache(index, item, None)
 
@@ -86,6 +143,16 @@ class DataModel(QAbstractTableModel):
         Then fire callbacks if the row is being deleted or restored.
         """
         new_row = self._fetch_row_from_backend(item)
+        self._update_cache(index, item, old_row, new_row)
+        return new_row
+
+    def _update_cache(
+        self,
+        index: QModelIndex,
+        item: ItemId,
+        old_row: CellRow | None,
+        new_row: CellRow,
+    ) -> None:
         # row state has changed if existence of cached and fetched counterparts differ
         # if the row was previously uncached, it is assumed to have existed
         state_change = (
@@ -98,7 +165,69 @@ class DataModel(QAbstractTableModel):
         self._rows[item] = new_row
         if state_change:
             self._on_row_state_changed(index, not new_row.is_disabled)
-        return self._rows[item]
+
+    def _prefetch_around(self, row: int) -> None:
+        """Fetch the missing or stale rows around row in a single background
+        request."""
+        start = max(0, row - self._prefetch_rows)
+        stop = min(self.len_rows(), row + self._prefetch_rows + 1)
+        wanted: list[tuple[int, ItemId]] = []
+        for row_number in range(start, stop):
+            item = self._items[row_number]
+            if item in self._prefetching:
+                continue
+            cached = self._rows.peek(item)
+            if cached is None or cached.is_stale(self._stale_cutoff):
+                wanted.append((row_number, item))
+        if not wanted:
+            return
+
+        ids = [item for _row_number, item in wanted]
+        self._prefetching.update(ids)
+        generation = self._prefetch_generation
+
+        def on_success(result: tuple[dict[int, BrowserRow], list[int]]) -> None:
+            self._prefetching.difference_update(ids)
+            if generation == self._prefetch_generation:
+                self._on_rows_prefetched(wanted, *result)
+
+        def on_failure(exc: Exception) -> None:
+            self._prefetching.difference_update(ids)
+            # fall back to fetching rows one at a time, which reports errors
+            # on a per-row basis
+            self._prefetch_rows = 0
+            self.redraw_cells()
+
+        assert aqt.mw is not None
+        QueryOp(
+            parent=aqt.mw,
+            op=lambda col: col.browser_rows_for_ids(ids),
+            success=on_success,
+        ).failure(on_failure).run_in_background()
+
+    def _on_rows_prefetched(
+        self,
+        wanted: list[tuple[int, ItemId]],
+        rows: dict[int, BrowserRow],
+        failed_ids: list[int],
+    ) -> None:
+        for row_number, item in wanted:
+            index = self.index(row_number, 0)
+            if item in rows:
+                new_row = CellRow.from_backend(rows[item])
+                gui_hooks.browser_did_fetch_row(
+                    item,
+                    self._state.is_notes_mode(),
+                    new_row,
+                    self._state.active_columns,
+                )
+                self._update_cache(index, item, self._rows.peek(item), new_row)
+            elif item in failed_ids:
+                # fetch individually to get a disabled row with the error
+                self._fetch_row_and_update_cache(index, item, self._rows.peek(item))
+        top_left = self.index(wanted[0][0], 0)
+        bottom_right = self.index(wanted[-1][0], self.len_columns() - 1)
+        self.dataChanged.emit(top_left, bottom_right)  # type: ignore
 
     def _fetch_row_from_backend(self, item: ItemId) -> CellRow:
         try:
@@ -132,6 +261,7 @@ class DataModel(QAbstractTableModel):
 
     def mark_cache_stale(self) -> None:
         self._stale_cutoff = time.time()
+        self._prefetch_generation += 1
 
     def reset(self) -> None:
         self.begin_reset()
@@ -277,11 +407,13 @@ class DataModel(QAbstractTableModel):
             )
         gui_hooks.browser_did_search(context)
         self._items = context.ids
-        self._rows = {}
+        self._rows.clear()
+        self._prefetch_generation += 1
 
     def reverse(self) -> None:
         self.beginResetModel()
         self._items = list(reversed(self._items))
+        self._prefetch_generation += 1
         self.endResetModel()
 
     # Columns
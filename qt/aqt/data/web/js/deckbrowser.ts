@@ -1,10 +1,22 @@
 /* Copyright: Ankitects Pty Ltd and contributors
  * License: GNU AGPL, version 3 or later; http://www.gnu.org/licenses/agpl.html */
 
+/* eslint
+@typescript-eslint/no-unused-vars: "off",
+*/
+
 $(init);
 
 function init() {
-    $("tr.deck").draggable({
+    setupDeckRows($("tr.deck"));
+    $("tr.top-level-drag-row").droppable({
+        drop: handleDropEvent,
+        hoverClass: "drag-hover",
+    });
+}
+
+function setupDeckRows(rows: JQuery) {
+    rows.draggable({
         scroll: false,
 
         // can't use "helper: 'clone'" because of a bug in jQuery 1.5
@@ -14,11 +26,7 @@ function init() {
         delay: 200,
         opacity: 0.7,
     });
-    $("tr.deck").droppable({
-        drop: handleDropEvent,
-        hoverClass: "drag-hover",
-    });
-    $("tr.top-level-drag-row").droppable({
+    rows.droppable({
         drop: handleDropEvent,
         hoverClass: "drag-hover",
     });
@@ -30,3 +38,46 @@ function handleDropEvent(event, ui) {
 
     pycmd("drag:" + draggedDeckId + "," + ontoDeckId);
 }
+
+/* Called by the deck browser instead of reloading the page. `rows` maps deck
+ * ids to the HTML of rows that are new or have changed. `order` lists the ids
+ * of all visible rows in display order, or is null if that has not changed.
+ * Rows that are unchanged and still in place are left untouched. */
+function updateDeckRows(
+    order: number[] | null,
+    rows: Record<string, string>,
+    stats: string,
+): void {
+    const existing = new Map<string, Element>();
+    document.querySelectorAll("tr.deck").forEach((row) => existing.set(row.id, row));
+
+    const updated: Element[] = [];
+    for (const [id, html] of Object.entries(rows)) {
+        const template = document.createElement("template");
+        template.innerHTML = html.trim();
+        const row = template.content.firstElementChild;
+        existing.get(id)?.replaceWith(row);
+        existing.set(id, row);
+        updated.push(row);
+    }
+
+    if (order !== null) {
+        const wanted = new Set(order.map(String));
+        for (const [id, row] of existing) {
+            if (!wanted.has(id)) {
+                row.remove();
+            }
+        }
+        let previous = document.querySelector("tr.top-level-drag-row");
+        for (const id of order) {
+            const row = existing.get(String(id));
+            if (previous.nextElementSibling !== row) {
+                previous.after(row);
+            }
+            previous = row;
+        }
+    }
+
+    setupDeckRows($(updated));
+    document.getElementById("studiedToday").outerHTML = stats;
+}
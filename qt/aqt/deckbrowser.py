@@ -4,6 +4,8 @@
 from __future__ import annotations
 
 import html
+import json
+from collections.abc import Iterable
 from copy import deepcopy
 from dataclasses import dataclass
 from typing import Any
@@ -63,6 +65,114 @@ class RenderDeckNodeContext:
     current_deck_id: DeckId
 
 
+# (deck id, row HTML) of each visible deck, in display order
+DeckRows = list[tuple[DeckId, str]]
+
+
+@dataclass
+class DeckRowsPatch:
+    """The difference between two renders of the deck tree.
+
+    Attributes:
+        order {list[DeckId] | None} -- ids of all visible rows in display order,
+            or None if unchanged
+        changed {dict[DeckId, str]} -- HTML of rows that are new or have changed
+    """
+
+    order: list[DeckId] | None
+    changed: dict[DeckId, str]
+
+
+def render_deck_rows(
+    nodes: Iterable[DeckTreeNode], ctx: RenderDeckNodeContext
+) -> DeckRows:
+    "Render the given decks and their visible descendants, one row per deck."
+    rows: DeckRows = []
+    stack = list(reversed(list(nodes)))
+    while stack:
+        node = stack.pop()
+        rows.append((DeckId(node.deck_id), _render_deck_row(node, ctx)))
+        if not node.collapsed:
+            stack.extend(reversed(node.children))
+    return rows
+
+
+def diff_deck_rows(old: DeckRows, new: DeckRows) -> DeckRowsPatch:
+    old_html = dict(old)
+    order = [did for did, _ in new]
+    return DeckRowsPatch(
+        order=None if order == [did for did, _ in old] else order,
+        changed={did: row for did, row in new if old_html.get(did) != row},
+    )
+
+
+def _render_deck_row(node: DeckTreeNode, ctx: RenderDeckNodeContext) -> str:
+    if node.collapsed:
+        prefix = "+"
+    else:
+        prefix = "−"
+
+    def indent() -> str:
+        return "&nbsp;" * 6 * (node.level - 1)
+
+    if node.deck_id == ctx.current_deck_id:
+        klass = "deck current"
+    else:
+        klass = "deck"
+
+    buf = (
+        "<tr class='%s' id='%d' onclick='if(event.shiftKey) return pycmd(\"select:%d\")'>"
+        % (
+            klass,
+            node.deck_id,
+            node.deck_id,
+        )
+    )
+    # deck link
+    if node.children:
+        collapse = (
+            "<a class=collapse href=# onclick='return pycmd(\"collapse:%d\")'>%s</a>"
+            % (node.deck_id, prefix)
+        )
+    else:
+        collapse = "<span class=collapse></span>"
+    if node.filtered:
+        extraclass = "filtered"
+    else:
+        extraclass = ""
+    buf += """
+
+        <td class=decktd colspan=5>%s%s<a class="deck %s"
+        href=# onclick="return pycmd('open:%d')">%s</a></td>""" % (
+        indent(),
+        collapse,
+        extraclass,
+        node.deck_id,
+        html.escape(node.name),
+    )
+
+    # due counts
+    def nonzeroColour(cnt: int, klass: str) -> str:
+        if not cnt:
+            klass = "zero-count"
+        return f'<span class="{klass}">{cnt}</span>'
+
+    review = nonzeroColour(node.review_count, "review-count")
+    learn = nonzeroColour(node.learn_count, "learn-count")
+
+    buf += ("<td align=end>%s</td>" * 3) % (
+        nonzeroColour(node.new_count, "new-count"),
+        learn,
+        review,
+    )
+    # options
+    buf += (
+        "<td align=center class=opts><a onclick='return pycmd(\"opts:%d\");'>"
+        "<img src='/_anki/imgs/gears.svg' class=gears></a></td></tr>" % node.deck_id
+    )
+    return buf
+
+
 class DeckBrowser:
     _render_data: RenderData
 
@@ -72,9 +182,14 @@ class DeckBrowser:
         self.bottom = BottomBar(mw, mw.bottomWeb)
         self.scrollPos = QPoint(0, 0)
         self._refresh_needed = False
+        # the rows currently on the page, if it can be patched in place
+        self._rendered_rows: DeckRows | None = None
+        self._rendered_upgrade_required = False
 
     def show(self) -> None:
         av_player.stop_and_clear_queue()
+        # another screen may have replaced the page
+        self._rendered_rows = None
         self.web.set_bridge_command(self._linkHandler, self)
         # redraw top bar for theme change
         self.mw.toolbar.redraw()
@@ -180,6 +295,10 @@ class DeckBrowser:
 
     def __renderPage(self, offset: int | None) -> None:
         data = self._render_data
+        if self._can_patch_page(data):
+            self._patch_page(data)
+            return
+        self._rendered_rows = None
         content = DeckBrowserContent(
             tree=self._renderDeckTree(data.tree),
             stats=self._renderStats(),
@@ -196,11 +315,37 @@ class DeckBrowser:
             ],
             context=self,
         )
+        self._rendered_upgrade_required = data.sched_upgrade_required
         self._drawButtons()
         if offset is not None:
             self._scrollToOffset(offset)
         gui_hooks.deck_browser_did_render(self)
 
+    def _can_patch_page(self, data: RenderData) -> bool:
+        # add-ons that alter the content expect a full render
+        return (
+            self._rendered_rows is not None
+            and data.sched_upgrade_required == self._rendered_upgrade_required
+            and not gui_hooks.deck_browser_will_render_content.count()
+            and not self._render_deck_node_overridden()
+        )
+
+    def _patch_page(self, data: RenderData) -> None:
+        "Update only the rows that changed since the last render."
+        assert self._rendered_rows is not None
+        ctx = RenderDeckNodeContext(current_deck_id=data.current_deck_id)
+        rows = render_deck_rows(data.tree.children, ctx)
+        patch = diff_deck_rows(self._rendered_rows, rows)
+        self._rendered_rows = rows
+        self.web.eval(
+            "updateDeckRows({}, {}, {});".format(
+                json.dumps(patch.order),
+                json.dumps(patch.changed),
+                json.dumps(self._renderStats()),
+            )
+        )
+        gui_hooks.deck_browser_did_render(self)
+
     def _scrollToOffset(self, offset: int) -> None:
         self.web.eval("window.scrollTo(0, %d, 'instant');" % offset)
 
@@ -224,81 +369,27 @@ class DeckBrowser:
         buf += self._topLevelDragRow()
 
         ctx = RenderDeckNodeContext(current_deck_id=self._render_data.current_deck_id)
+        if self._render_deck_node_overridden():
+            # the page can't be patched, as the rows of an add-on's
+            # replacement can't be told apart
+            self._rendered_rows = None
+            for child in top.children:
+                buf += self._render_deck_node(child, ctx)
+            return buf
 
-        for child in top.children:
-            buf += self._render_deck_node(child, ctx)
+        rows = render_deck_rows(top.children, ctx)
+        self._rendered_rows = rows
 
-        return buf
+        return buf + "".join(row for _did, row in rows)
 
     def _render_deck_node(self, node: DeckTreeNode, ctx: RenderDeckNodeContext) -> str:
-        if node.collapsed:
-            prefix = "+"
-        else:
-            prefix = "−"
-
-        def indent() -> str:
-            return "&nbsp;" * 6 * (node.level - 1)
+        "Render node and its visible descendants."
+        return "".join(row for _did, row in render_deck_rows([node], ctx))
 
-        if node.deck_id == ctx.current_deck_id:
-            klass = "deck current"
-        else:
-            klass = "deck"
-
-        buf = (
-            "<tr class='%s' id='%d' onclick='if(event.shiftKey) return pycmd(\"select:%d\")'>"
-            % (
-                klass,
-                node.deck_id,
-                node.deck_id,
-            )
-        )
-        # deck link
-        if node.children:
-            collapse = (
-                "<a class=collapse href=# onclick='return pycmd(\"collapse:%d\")'>%s</a>"
-                % (node.deck_id, prefix)
-            )
-        else:
-            collapse = "<span class=collapse></span>"
-        if node.filtered:
-            extraclass = "filtered"
-        else:
-            extraclass = ""
-        buf += """
-
-        <td class=decktd colspan=5>%s%s<a class="deck %s"
-        href=# onclick="return pycmd('open:%d')">%s</a></td>""" % (
-            indent(),
-            collapse,
-            extraclass,
-            node.deck_id,
-            html.escape(node.name),
-        )
-
-        # due counts
-        def nonzeroColour(cnt: int, klass: str) -> str:
-            if not cnt:
-                klass = "zero-count"
-            return f'<span class="{klass}">{cnt}</span>'
-
-        review = nonzeroColour(node.review_count, "review-count")
-        learn = nonzeroColour(node.learn_count, "learn-count")
-
-        buf += ("<td align=end>%s</td>" * 3) % (
-            nonzeroColour(node.new_count, "new-count"),
-            learn,
-            review,
-        )
-        # options
-        buf += (
-            "<td align=center class=opts><a onclick='return pycmd(\"opts:%d\");'>"
-            "<img src='/_anki/imgs/gears.svg' class=gears></a></td></tr>" % node.deck_id
-        )
-        # children
-        if not node.collapsed:
-            for child in node.children:
-                buf += self._render_deck_node(child, ctx)
-        return buf
+    def _render_deck_node_overridden(self) -> bool:
+        "True if an add-on has replaced or wrapped _render_deck_node()."
+        method = self._render_deck_node
+        return getattr(method, "__func__", None) is not _default_render_deck_node
 
     def _topLevelDragRow(self) -> str:
         return "<tr class='top-level-drag-row'><td colspan='6'>&nbsp;</td></tr>"
@@ -436,3 +527,7 @@ class DeckBrowser:
 
         showInfo(tr.scheduling_update_done())
         self.refresh()
+
+
+# the built-in implementation, for detecting add-ons that replace it
+_default_render_deck_node = DeckBrowser._render_deck_node
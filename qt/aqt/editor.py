@@ -16,6 +16,8 @@ import urllib.parse
 import urllib.request
 import warnings
 from collections.abc import Callable
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
 from enum import Enum
 from random import randrange
 from typing import Any, Iterable, Match, cast
@@ -89,6 +91,72 @@ audio = (
 )
 
 
+# limits for downloading the media referenced by pasted HTML
+PASTE_DOWNLOAD_CONNECTIONS = 6
+PASTE_DOWNLOAD_TIMEOUT_SECS = 30
+
+
+@dataclass
+class DownloadedMedia:
+    url: str
+    # name to save the file under, before any extension based on content_type
+    filename: str = ""
+    data: bytes | None = None
+    content_type: str | None = None
+    error: str | None = None
+
+
+def download_media(url: str, client: HttpClient) -> DownloadedMedia:
+    "Fetch a remote or file:// url. Does not touch the GUI or collection."
+    out = DownloadedMedia(url=url)
+    try:
+        if url.lower().startswith("file://"):
+            # urllib doesn't understand percent-escaped utf8, but requires things like
+            # '#' to be escaped.
+            url = urllib.parse.unquote(url)
+            url = url.replace("%", "%25")
+            url = url.replace("#", "%23")
+            req = urllib.request.Request(
+                url, None, {"User-Agent": "Mozilla/5.0 (compatible; Anki)"}
+            )
+            with urllib.request.urlopen(req) as response:
+                out.data = response.read()
+        else:
+            with client.get(url) as response:
+                if response.status_code != 200:
+                    out.error = tr.qt_misc_unexpected_response_code(
+                        val=response.status_code,
+                    )
+                    return out
+                out.data = response.content
+                out.content_type = response.headers.get("content-type")
+    except (urllib.error.URLError, requests.exceptions.RequestException) as e:
+        out.error = tr.editing_an_error_occurred_while_opening(val=str(e))
+        return out
+    # strip off any query string
+    url = re.sub(r"\?.*?$", "", url)
+    out.filename = os.path.basename(urllib.parse.unquote(url))
+    if not out.filename.strip():
+        out.filename = "paste"
+    return out
+
+
+def download_media_concurrently(urls: Iterable[str]) -> list[DownloadedMedia]:
+    """Fetch each distinct url, several at a time over a shared connection pool.
+    Does not touch the GUI or collection."""
+    unique_urls = list(dict.fromkeys(urls))
+    with HttpClient() as client:
+        client.timeout = PASTE_DOWNLOAD_TIMEOUT_SECS
+        adapter = requests.adapters.HTTPAdapter(
+            pool_connections=PASTE_DOWNLOAD_CONNECTIONS,
+            pool_maxsize=PASTE_DOWNLOAD_CONNECTIONS,
+        )
+        client.session.mount("http://", adapter)
+        client.session.mount("https://", adapter)
+        with ThreadPoolExecutor(max_workers=PASTE_DOWNLOAD_CONNECTIONS) as pool:
+            return list(pool.map(lambda url: download_media(url, client), unique_urls))
+
+
 class EditorMode(Enum):
     ADD_CARDS = 0
     EDIT_CURRENT = 1
@@ -956,54 +1024,69 @@ require("anki/ui").loaded.then(() => require("anki/NoteEditor").instances[0].too
         local = url.lower().startswith("file://")
         # fetch it into a temporary folder
         self.mw.progress.start(immediate=not local, parent=self.parentWindow)
-        content_type = None
-        error_msg: str | None = None
         try:
-            if local:
-                # urllib doesn't understand percent-escaped utf8, but requires things like
-                # '#' to be escaped.
-                url = urllib.parse.unquote(url)
-                url = url.replace("%", "%25")
-                url = url.replace("#", "%23")
-                req = urllib.request.Request(
-                    url, None, {"User-Agent": "Mozilla/5.0 (compatible; Anki)"}
-                )
-                with urllib.request.urlopen(req) as response:
-                    filecontents = response.read()
-            else:
-                with HttpClient() as client:
-                    client.timeout = 30
-                    with client.get(url) as response:
-                        if response.status_code != 200:
-                            error_msg = tr.qt_misc_unexpected_response_code(
-                                val=response.status_code,
-                            )
-                            return None
-                        filecontents = response.content
-                        content_type = response.headers.get("content-type")
-        except (urllib.error.URLError, requests.exceptions.RequestException) as e:
-            error_msg = tr.editing_an_error_occurred_while_opening(val=str(e))
-            return None
+            with HttpClient() as client:
+                client.timeout = PASTE_DOWNLOAD_TIMEOUT_SECS
+                download = download_media(url, client)
         finally:
             self.mw.progress.finish()
-            if error_msg:
-                showWarning(error_msg)
-        # strip off any query string
-        url = re.sub(r"\?.*?$", "", url)
-        fname = os.path.basename(urllib.parse.unquote(url))
-        if not fname.strip():
-            fname = "paste"
-        if content_type:
-            fname = self.mw.col.media.add_extension_based_on_mime(fname, content_type)
-
-        return self.mw.col.media.write_data(fname, filecontents)
+        return self._store_downloaded_media([download])[url]
+
+    def _store_downloaded_media(
+        self, downloads: list[DownloadedMedia]
+    ) -> dict[str, str | None]:
+        """Add downloaded files to the media folder, and return the media
+        filename of each url, or None if it failed to download."""
+        fnames: dict[str, str | None] = {}
+        errors = []
+        for download in downloads:
+            if download.data is None:
+                fnames[download.url] = None
+                if download.error and download.error not in errors:
+                    errors.append(download.error)
+                continue
+            fname = download.filename
+            if download.content_type:
+                fname = self.mw.col.media.add_extension_based_on_mime(
+                    fname, download.content_type
+                )
+            fnames[download.url] = self.mw.col.media.write_data(fname, download.data)
+        if errors:
+            showWarning("\n".join(errors))
+        return fnames
+
+    def _pasted_media_urls(self, html: str) -> list[str]:
+        "The distinct remote media urls an external paste would download."
+        if html.find(">") < 0:
+            return []
+        with warnings.catch_warnings():
+            warnings.simplefilter("ignore", UserWarning)
+            doc = BeautifulSoup(html, "html.parser")
+        urls = []
+        for element in doc("img"):
+            if isinstance(element, bs4.Tag):
+                src = element.get("src")
+                if isinstance(src, str) and self.isURL(src):
+                    urls.append(src)
+        return list(dict.fromkeys(urls))
 
     # Paste/drag&drop
     ######################################################################
 
     removeTags = ["script", "iframe", "object", "style"]
 
-    def _pastePreFilter(self, html: str, internal: bool) -> str:
+    def _pastePreFilter(
+        self,
+        html: str,
+        internal: bool,
+        downloaded: dict[str, str | None] | None = None,
+    ) -> str:
+        """Clean up pasted HTML and bring its media into the collection.
+
+        downloaded maps remote urls that have already been fetched to their media
+        filename; any other remote url is downloaded here."""
+        if downloaded is None:
+            downloaded = {}
         # https://anki.tenderapp.com/discussions/ankidesktop/39543-anki-is-replacing-the-character-by-when-i-exit-the-html-edit-mode-ctrlshiftx
         if html.find(">") < 0:
             return html
@@ -1040,8 +1123,9 @@ require("anki/ui").loaded.then(() => require("anki/NoteEditor").instances[0].too
                     tag["src"] = m.group(1)
             # in external pastes, download remote media
             elif isinstance(src, str) and self.isURL(src):
-                fname = self._retrieveURL(src)
-                if fname:
+                if src not in downloaded:
+                    downloaded[src] = self._retrieveURL(src)
+                if fname := downloaded[src]:
                     tag["src"] = fname
             elif isinstance(src, str) and src.startswith("data:image/"):
                 # and convert inlined data
@@ -1051,13 +1135,28 @@ require("anki/ui").loaded.then(() => require("anki/NoteEditor").instances[0].too
         return html
 
     def doPaste(self, html: str, internal: bool, extended: bool = False) -> None:
-        html = self._pastePreFilter(html, internal)
-        if extended:
-            ext = "true"
-        else:
-            ext = "false"
-        self.web.eval(f"pasteHTML({json.dumps(html)}, {json.dumps(internal)}, {ext});")
-        gui_hooks.editor_did_paste(self, html, internal, extended)
+        def paste(downloaded: dict[str, str | None]) -> None:
+            filtered = self._pastePreFilter(html, internal, downloaded)
+            if extended:
+                ext = "true"
+            else:
+                ext = "false"
+            self.web.eval(
+                f"pasteHTML({json.dumps(filtered)}, {json.dumps(internal)}, {ext});"
+            )
+            gui_hooks.editor_did_paste(self, filtered, internal, extended)
+
+        urls = [] if internal else self._pasted_media_urls(html)
+        if not urls:
+            paste({})
+            return
+
+        # fetch all remote media at once in the background, then paste
+        QueryOp(
+            parent=self.parentWindow,
+            op=lambda _col: download_media_concurrently(urls),
+            success=lambda downloads: paste(self._store_downloaded_media(downloads)),
+        ).without_collection().with_progress().run_in_background()
 
     def doDrop(
         self, html: str, internal: bool, extended: bool, cursor_pos: QPoint
@@ -14,7 +14,7 @@ import aqt.main
 from anki import hooks
 from anki.cards import CardId
 from anki.decks import DeckId
-from anki.exporting import Exporter, exporters
+from anki.exporting import Exporter, MediaExportProgress, exporters
 from aqt import gui_hooks
 from aqt.errors import show_exception
 from aqt.qt import *
@@ -168,11 +168,16 @@ class ExportDialog(QDialog):
                 os.unlink(file)
 
             # progress handler: old apkg exporter
-            def exported_media_count(cnt: int) -> None:
+            def exported_media_progress(progress: MediaExportProgress) -> None:
+                label = "{}\n{}".format(
+                    tr.exporting_exported_media_file(count=progress.files),
+                    tr.exporting_media_throughput(
+                        megabytes=f"{progress.megabytes_per_sec():.1f}",
+                        files=f"{progress.files_per_sec():.0f}",
+                    ),
+                )
                 self.mw.taskman.run_on_main(
-                    lambda: self.mw.progress.update(
-                        label=tr.exporting_exported_media_file(count=cnt)
-                    )
+                    lambda: self.mw.progress.update(label=label)
                 )
 
             # progress handler: adaptor for new colpkg importer into old exporting screen.
@@ -188,7 +193,7 @@ class ExportDialog(QDialog):
 
             def on_done(future: Future) -> None:
                 self.mw.progress.finish()
-                hooks.media_files_did_export.remove(exported_media_count)
+                hooks.media_export_did_progress.remove(exported_media_progress)
                 hooks.legacy_export_progress.remove(exported_media)
                 try:
                     # raises if exporter failed
@@ -203,7 +208,7 @@ class ExportDialog(QDialog):
             if self.isVerbatim:
                 gui_hooks.collection_will_temporarily_close(self.mw.col)
             self.mw.progress.start()
-            hooks.media_files_did_export.append(exported_media_count)
+            hooks.media_export_did_progress.append(exported_media_progress)
             hooks.legacy_export_progress.append(exported_media)
 
             self.mw.taskman.run_in_background(do_export, on_done)
@@ -19,14 +19,13 @@ from typing import Any, Literal, TypeVar, cast
 import anki
 import anki.cards
 import anki.sound
+import anki.template
 import aqt
 import aqt.forms
 import aqt.mediasrv
-import aqt.mpv
 import aqt.operations
 import aqt.progress
 import aqt.sound
-import aqt.stats
 import aqt.toolbar
 import aqt.webview
 from anki import hooks
@@ -35,6 +34,7 @@ from anki._legacy import deprecated
 from anki.collection import Collection, Config, OpChanges, UndoStatus
 from anki.decks import DeckDict, DeckId
 from anki.hooks import runHook
+from anki.latex import LatexRenderCache, set_render_cache
 from anki.notes import NoteId
 from anki.sound import AVTag, SoundOrVideoTag
 from anki.utils import (
@@ -47,20 +47,10 @@ from anki.utils import (
     is_win,
     split_fields,
 )
-from aqt import gui_hooks
+from aqt import gui_hooks, startup_timing
 from aqt.addons import DownloadLogEntry, check_and_prompt_for_updates, show_log_to_user
-from aqt.dbcheck import check_db
-from aqt.debug_console import show_debug_console
-from aqt.emptycards import show_empty_cards
 from aqt.flags import FlagManager
-from aqt.import_export.exporting import ExportDialog
-from aqt.import_export.importing import (
-    import_collection_package_op,
-    import_file,
-    prompt_for_file_then_import,
-)
 from aqt.legacy import install_pylib_legacy
-from aqt.mediacheck import check_media_db
 from aqt.mediasync import MediaSyncer
 from aqt.operations import QueryOp
 from aqt.operations.collection import redo, undo
@@ -130,6 +120,7 @@ class MainWebView(AnkiWebView):
 
     def dropEvent(self, event: QDropEvent) -> None:
         import aqt.importing
+        from aqt.import_export.importing import import_file
 
         if self.mw.state != "deckBrowser":
             return super().dropEvent(event)
@@ -211,6 +202,7 @@ class AnkiQt(QMainWindow):
             self.setupUI()
             self.setupAddons(args)
             self.finish_ui_setup()
+            startup_timing.mark("main window set up")
         except Exception:
             showInfo(tr.qt_misc_error_during_startup(val=traceback.format_exc()))
             sys.exit(1)
@@ -241,6 +233,7 @@ class AnkiQt(QMainWindow):
         self.setupThreads()
         self.setupMediaServer()
         self.setupSpellCheck()
+        self.setup_latex_cache()
         self.setupProgress()
         self.setupStyle()
         self.setupMainWindow()
@@ -481,6 +474,8 @@ class AnkiQt(QMainWindow):
     def _start_restore_backup(self, path: str):
         self.restoring_backup = True
 
+        from aqt.import_export.importing import import_collection_package_op
+
         import_collection_package_op(
             self, path, success=self._handle_load_backup_success
         ).failure(self._handle_load_backup_failure).run_in_background()
@@ -509,6 +504,7 @@ class AnkiQt(QMainWindow):
         self.taskman.run_in_background(downgrade, on_done)
 
     def loadProfile(self, onsuccess: Callable | None = None) -> None:
+        startup_timing.mark("profile selected")
         if not self.loadCollection():
             return
 
@@ -605,6 +601,8 @@ class AnkiQt(QMainWindow):
         self.unloadProfile(self.showProfileManager)
 
     def cleanupAndExit(self) -> None:
+        # make sure settings saved in the background are on disk
+        self.pm.flush()
         self.errorHandler.unload()
         self.mediaServer.shutdown()
         # Rust background jobs are not awaited implicitly
@@ -671,10 +669,16 @@ class AnkiQt(QMainWindow):
         # make sure we don't get into an inconsistent state if an add-on
         # has broken the deck browser or the did_load hook
         try:
+            startup_timing.mark("collection opened")
             self.update_undo_actions()
             gui_hooks.collection_did_load(self.col)
             self.apply_collection_options()
             self.moveToState("deckBrowser")
+            if startup_timing.enabled():
+                # runs once the deck list has loaded
+                self.web.evalWithCallback(
+                    "1", lambda _: startup_timing.finish("first render")
+                )
         except Exception:
             # dump error to stderr so it gets picked up by errors.py
             traceback.print_exc()
@@ -871,6 +875,8 @@ class AnkiQt(QMainWindow):
 
         if changes.notetype:
             self.col.models._clear_cache()
+        elif changes.note_text:
+            anki.template.clear_field_filter_cache()
 
     def on_focus_did_change(
         self, new_focus: QWidget | None, _old: QWidget | None
@@ -1057,6 +1063,10 @@ title="{}" {}>{}</button>""".format(
             self.pm.base, "dictionaries"
         )
 
+    def setup_latex_cache(self) -> None:
+        # rendered LaTeX is shared between profiles
+        set_render_cache(LatexRenderCache(os.path.join(self.pm.base, "latex_cache")))
+
     def setupThreads(self) -> None:
         self._mainThread = QThread.currentThread()
         self._background_op_count = 0
@@ -1172,7 +1182,7 @@ title="{}" {}>{}</button>""".format(
 
     def setupKeys(self) -> None:
         globalShortcuts = [
-            ("Ctrl+:", show_debug_console),
+            ("Ctrl+:", self.on_debug_console),
             ("d", lambda: self.moveToState("deckBrowser")),
             ("s", self.onStudyKey),
             ("a", self.onAddCard),
@@ -1338,6 +1348,7 @@ title="{}" {}>{}</button>""".format(
     def handleImport(self, path: str) -> None:
         "Importing triggered via file double-click, or dragging file onto Anki icon."
         import aqt.importing
+        from aqt.import_export.importing import import_file
 
         if not os.path.exists(path):
             # there were instances in the distant past where the received filename was not
@@ -1354,6 +1365,7 @@ title="{}" {}>{}</button>""".format(
     def onImport(self) -> None:
         "Importing triggered via File>Import."
         import aqt.importing
+        from aqt.import_export.importing import prompt_for_file_then_import
 
         if not self.pm.legacy_import_export():
             prompt_for_file_then_import(self)
@@ -1362,6 +1374,7 @@ title="{}" {}>{}</button>""".format(
 
     def onExport(self, did: DeckId | None = None) -> None:
         import aqt.exporting
+        from aqt.import_export.exporting import ExportDialog
 
         if not self.pm.legacy_import_export():
             ExportDialog(self, did=did)
@@ -1678,9 +1691,13 @@ title="{}" {}>{}</button>""".format(
     ##########################################################################
 
     def onCheckDB(self) -> None:
+        from aqt.dbcheck import check_db
+
         check_db(self)
 
     def on_check_media_db(self) -> None:
+        from aqt.mediacheck import check_media_db
+
         gui_hooks.media_check_will_start()
         check_media_db(self)
 
@@ -1704,8 +1721,15 @@ title="{}" {}>{}</button>""".format(
         )
 
     def onEmptyCards(self) -> None:
+        from aqt.emptycards import show_empty_cards
+
         show_empty_cards(self)
 
+    def on_debug_console(self) -> None:
+        from aqt.debug_console import show_debug_console
+
+        show_debug_console()
+
     # System specific code
     ##########################################################################
 
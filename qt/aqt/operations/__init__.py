@@ -276,9 +276,16 @@ class QueryOp(Generic[T]):
                 on_done=on_done,
                 start_label=label,
                 parent=self._parent,
+                uses_collection=self._uses_collection,
             )
         elif self._progress:
-            mw.taskman.with_progress(op, on_done, label=label, parent=self._parent)
+            mw.taskman.with_progress(
+                op,
+                on_done,
+                label=label,
+                parent=self._parent,
+                uses_collection=self._uses_collection,
+            )
         else:
             mw.taskman.run_in_background(
                 op, on_done, uses_collection=self._uses_collection
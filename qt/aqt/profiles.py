@@ -3,11 +3,14 @@
 
 from __future__ import annotations
 
+import atexit
+import hashlib
 import io
 import os
 import pickle
 import random
 import shutil
+import threading
 import traceback
 from enum import Enum
 from pathlib import Path
@@ -124,9 +127,100 @@ class LoadMetaResult:
     loadError: bool
 
 
+# how long the background writer waits for more changes before writing
+PROFILE_WRITE_DELAY_SECS = 0.5
+_SAVE_SQL = "update profiles set data = ? where name = ? collate nocase"
+
+
+class ProfileWriter:
+    """Writes pickled profile data to prefs21.db on a background thread.
+
+    Data saved in quick succession is combined into a single transaction, with
+    only the latest data for each profile being written. The thread has its own
+    database connection, as sqlite connections can't be shared between threads.
+    """
+
+    def __init__(self, path: str) -> None:
+        self._path = path
+        self._pending: dict[str, bytes] = {}
+        self._writing = False
+        self._flush_requested = False
+        self._error: Exception | None = None
+        self._cond = threading.Condition()
+        self._thread = threading.Thread(
+            target=self._run, name="ProfileWriter", daemon=True
+        )
+        self._thread.start()
+
+    def write(self, name: str, data: bytes) -> None:
+        with self._cond:
+            self._pending[name] = data
+            # retry after a failed write
+            self._error = None
+            self._cond.notify_all()
+
+    def flush(self) -> dict[str, bytes]:
+        """Write pending data now, and wait for it to finish. Returns the data
+        that could not be written, which the caller is responsible for."""
+        with self._cond:
+            self._flush_requested = True
+            self._cond.notify_all()
+            while self._thread.is_alive() and (
+                (self._pending and self._error is None) or self._writing
+            ):
+                self._cond.wait()
+            self._flush_requested = False
+            failed, self._pending = self._pending, {}
+            self._error = None
+            return failed
+
+    def _run(self) -> None:
+        try:
+            db = DB(self._path, timeout=10)
+        except Exception as exc:
+            traceback.print_exc()
+            with self._cond:
+                # flush() will hand the data back to be written synchronously
+                self._error = exc
+                self._cond.notify_all()
+            return
+        while True:
+            with self._cond:
+                # after a failure, wait for the next write(), or for flush() to
+                # take over the data
+                self._cond.wait_for(lambda: self._pending and self._error is None)
+                # give further changes a chance to arrive
+                self._cond.wait_for(
+                    lambda: self._flush_requested, timeout=PROFILE_WRITE_DELAY_SECS
+                )
+                batch, self._pending = self._pending, {}
+                self._writing = True
+            error = None
+            try:
+                for name, data in batch.items():
+                    db.execute(_SAVE_SQL, data, name)
+                db.commit()
+            except Exception as exc:
+                traceback.print_exc()
+                error = exc
+                try:
+                    db.rollback()
+                except Exception:
+                    pass
+            with self._cond:
+                self._writing = False
+                if error:
+                    self._error = error
+                    # keep newer data that arrived while writing
+                    self._pending = batch | self._pending
+                self._cond.notify_all()
+
+
 class ProfileManager:
     default_answer_keys = {ease_num: str(ease_num) for ease_num in range(1, 5)}
     last_run_version: int = 0
+    # if true, save() writes to disk in the background; see flush()
+    write_behind = True
 
     def __init__(self, base: Path) -> None:
         "base should be retrieved via ProfileMangager.get_created_base_folder"
@@ -137,6 +231,9 @@ class ProfileManager:
         self.profile: dict | None = None
         self.invalid_profile_provided_on_commandline = False
         self.base = str(base)
+        self._writer: ProfileWriter | None = None
+        # profile name -> hash of the data last saved for it
+        self._saved_hashes: dict[str, bytes] = {}
 
     def setupMeta(self) -> LoadMetaResult:
         # load metadata
@@ -160,6 +257,8 @@ class ProfileManager:
     ######################################################################
 
     def profiles(self) -> list[str]:
+        self.flush()
+
         def names() -> list[str]:
             return self.db.list("select name from profiles where name != '_global'")
 
@@ -211,6 +310,7 @@ class ProfileManager:
     def load(self, name: str) -> bool:
         if name == "_global":
             raise Exception("_global is not a valid name")
+        self.flush()
         data = self.db.scalar(
             "select cast(data as blob) from profiles where name = ? collate nocase",
             name,
@@ -232,12 +332,51 @@ class ProfileManager:
         return True
 
     def save(self) -> None:
-        sql = "update profiles set data = ? where name = ? collate nocase"
-        self.db.execute(sql, self._pickle(self.profile), self.name)
-        self.db.execute(sql, self._pickle(self.meta), "_global")
-        self.db.commit()
+        """Save the current profile and the global settings. With write_behind,
+        the data is written to disk shortly afterwards on a background thread."""
+        changed = False
+        for name, data in (
+            (self.name, self._pickle(self.profile)),
+            ("_global", self._pickle(self.meta)),
+        ):
+            digest = hashlib.sha1(data).digest()
+            key = name.lower()
+            if self._saved_hashes.get(key) == digest:
+                continue
+            self._saved_hashes[key] = digest
+            changed = True
+            if self.write_behind:
+                self._profile_writer().write(name, data)
+            else:
+                self.db.execute(_SAVE_SQL, data, name)
+        if changed and not self.write_behind:
+            self.db.commit()
+
+    def flush(self) -> None:
+        """Wait until data saved in the background has been written. If the
+        background write failed, it is retried here, and any error is raised."""
+        if not self._writer:
+            return
+        if failed := self._writer.flush():
+            self._saved_hashes.clear()
+            for name, data in failed.items():
+                self.db.execute(_SAVE_SQL, data, name)
+            self.db.commit()
+
+    def _profile_writer(self) -> ProfileWriter:
+        if not self._writer:
+            self._writer = ProfileWriter(os.path.join(self.base, "prefs21.db"))
+            # in case the app exits without going through the normal shutdown
+            atexit.register(self.flush)
+        return self._writer
+
+    def _before_direct_write(self) -> None:
+        "Call before modifying the database on this thread."
+        self.flush()
+        self._saved_hashes.clear()
 
     def create(self, name: str) -> None:
+        self._before_direct_write()
         prof = profileConf.copy()
         if self.db.scalar("select 1 from profiles where name = ? collate nocase", name):
             return
@@ -251,6 +390,7 @@ class ProfileManager:
     def remove(self, name: str) -> None:
         path = self.profileFolder(create=False)
         send_to_trash(Path(path))
+        self._before_direct_write()
         self.db.execute("delete from profiles where name = ? collate nocase", name)
         self.db.commit()
 
@@ -281,6 +421,7 @@ class ProfileManager:
                 return
 
         # update name
+        self._before_direct_write()
         self.db.execute(
             "update profiles set name = ? where name = ? collate nocase", name, oldName
         )
@@ -495,8 +636,8 @@ create table if not exists profiles
 
     def setLang(self, code: str) -> None:
         self.meta["defaultLang"] = code
-        sql = "update profiles set data = ? where name = ? collate nocase"
-        self.db.execute(sql, self._pickle(self.meta), "_global")
+        self._before_direct_write()
+        self.db.execute(_SAVE_SQL, self._pickle(self.meta), "_global")
         self.db.commit()
         anki.lang.set_lang(code)
 
@@ -728,6 +869,13 @@ create table if not exists profiles
     def set_show_browser_table_tooltips(self, val: bool) -> None:
         self.profile["browserTableTooltips"] = val
 
+    def browser_table_prefetch_rows(self) -> int:
+        "Rows to fetch in the background around the viewed ones, or 0 to disable."
+        return self.profile.get("browserTablePrefetchRows", 0)
+
+    def set_browser_table_prefetch_rows(self, val: int) -> None:
+        self.profile["browserTablePrefetchRows"] = val
+
     def set_network_timeout(self, timeout_secs: int) -> None:
         self.profile["networkTimeout"] = timeout_secs
 
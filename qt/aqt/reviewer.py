@@ -15,8 +15,9 @@ from typing import Any, Literal, Match, Union, cast
 import aqt
 import aqt.browser
 import aqt.operations
+from anki import cards_pb2
 from anki.cards import Card, CardId
-from anki.collection import Config, OpChanges, OpChangesWithCount
+from anki.collection import Collection, Config, OpChanges, OpChangesWithCount
 from anki.lang import with_collapsed_whitespace
 from anki.scheduler.base import ScheduleCardsAsNew
 from anki.scheduler.v3 import (
@@ -33,6 +34,7 @@ from anki.utils import is_mac
 from aqt import AnkiQt, gui_hooks
 from aqt.browser.card_info import PreviousReviewerCardInfo, ReviewerCardInfo
 from aqt.deckoptions import confirm_deck_then_display_options
+from aqt.operations import QueryOp
 from aqt.operations.card import set_card_flag
 from aqt.operations.note import remove_notes
 from aqt.operations.scheduling import (
@@ -60,6 +62,13 @@ from aqt.utils import (
 )
 
 
+@dataclass
+class _RenderedAhead:
+    # the queue entry the card was built from, to detect changes
+    backend_card: cards_pb2.Card
+    card: Card
+
+
 class RefreshNeeded(Enum):
     NOTE_TEXT = auto()
     QUEUES = auto()
@@ -169,6 +178,10 @@ class Reviewer:
         self._show_question_timer: QTimer | None = None
         self._show_answer_timer: QTimer | None = None
         self.auto_advance_enabled = False
+        # the card expected to follow the current one, and its pre-rendered copy
+        self._next_queued_card: QueuedCards.QueuedCard | None = None
+        self._rendered_ahead: _RenderedAhead | None = None
+        self._render_ahead_generation = 0
         gui_hooks.av_player_did_end_playing.append(self._on_av_player_did_end_playing)
 
     def show(self) -> None:
@@ -199,6 +212,7 @@ class Reviewer:
         gui_hooks.reviewer_will_end()
         self.card = None
         self.auto_advance_enabled = False
+        self._discard_rendered_ahead()
 
     def refresh_if_needed(self) -> None:
         if self._refresh_needed is RefreshNeeded.QUEUES:
@@ -222,6 +236,8 @@ class Reviewer:
         self, changes: OpChanges, handler: object | None, focused: bool
     ) -> bool:
         if handler is not self:
+            # the card may have been rendered with data that has since changed
+            self._discard_rendered_ahead()
             if changes.study_queues:
                 self._refresh_needed = RefreshNeeded.QUEUES
             elif changes.note_text:
@@ -264,13 +280,64 @@ class Reviewer:
 
     def _get_next_v3_card(self) -> None:
         assert isinstance(self.mw.col.sched, V3Scheduler)
-        output = self.mw.col.sched.get_queued_cards()
+        # the second card is the likely successor, for _render_ahead()
+        output = self.mw.col.sched.get_queued_cards(fetch_limit=2)
+        self._next_queued_card = output.cards[1] if len(output.cards) > 1 else None
         if not output.cards:
             return
         self._v3 = V3CardInfo.from_queue(output)
-        self.card = Card(self.mw.col, backend_card=self._v3.top_card().card)
+        backend_card = self._v3.top_card().card
+        self.card = self._take_rendered_ahead(backend_card) or Card(
+            self.mw.col, backend_card=backend_card
+        )
         self.card.start_timer()
 
+    # Rendering ahead
+    ##########################################################################
+
+    def _render_ahead(self) -> None:
+        """Render the card expected to follow the current one in the background,
+        so it can be shown without delay once the current card is answered.
+        Players can also prepare the audio of the current answer and next card."""
+        if self.card:
+            av_player.prepare_tags(self.card.answer_av_tags())
+        queued = self._next_queued_card
+        if queued is None:
+            return
+        if self._rendered_ahead and self._rendered_ahead.backend_card == queued.card:
+            return
+        self._next_queued_card = None
+        generation = self._render_ahead_generation
+        backend_card = queued.card
+
+        def render(col: Collection) -> Card:
+            card = Card(col, backend_card=backend_card)
+            card.render_output()
+            return card
+
+        def on_success(card: Card) -> None:
+            if generation == self._render_ahead_generation:
+                self._rendered_ahead = _RenderedAhead(backend_card, card)
+                av_player.prepare_tags(card.question_av_tags() + card.answer_av_tags())
+
+        # errors will be shown when the card is rendered normally
+        QueryOp(parent=self.mw, op=render, success=on_success).failure(
+            lambda exc: None
+        ).run_in_background()
+
+    def _take_rendered_ahead(self, backend_card: cards_pb2.Card) -> Card | None:
+        """The pre-rendered card, if it matches the card the queue returned.
+        Any other pre-rendered card is stale, and is discarded."""
+        rendered = self._rendered_ahead
+        self._discard_rendered_ahead()
+        if rendered is None or rendered.backend_card != backend_card:
+            return None
+        return rendered.card
+
+    def _discard_rendered_ahead(self) -> None:
+        self._rendered_ahead = None
+        self._render_ahead_generation += 1
+
     def get_scheduling_states(self) -> SchedulingStates:
         return self._v3.states
 
@@ -405,6 +472,7 @@ class Reviewer:
         # user hook
         gui_hooks.reviewer_did_show_question(c)
         self._auto_advance_to_answer_if_enabled()
+        self._render_ahead()
 
     def _auto_advance_to_answer_if_enabled(self) -> None:
         self._clear_auto_advance_timers()
@@ -25,7 +25,7 @@ import aqt
 import aqt.mpv
 import aqt.qt
 from anki.cards import Card
-from anki.sound import AV_REF_RE, AVTag, SoundOrVideoTag
+from anki.sound import AV_REF_RE, AVTag, SoundOrVideoTag, TTSTag
 from anki.utils import is_lin, is_mac, is_win, namedtmp
 from aqt import gui_hooks
 from aqt._macos_helper import macos_helper
@@ -149,6 +149,12 @@ class AVPlayer:
     def __init__(self) -> None:
         self._enqueued: list[AVTag] = []
         self.current_player: Player | None = None
+        # called by prepare_tags(), eg to synthesize text to speech ahead of time
+        self.tag_preparers: list[Callable[[list[AVTag]], None]] = []
+        # best player for each kind of TTS tag, for the players in _cached_players
+        self._tts_player_cache: dict[tuple[Any, ...], Player | None] = {}
+        # (player, voices_version) of each player the cache was built for
+        self._cached_players: list[tuple[Player, int]] = []
 
     def play_tags(self, tags: list[AVTag]) -> None:
         """Clear the existing queue, then start playing provided tags."""
@@ -202,6 +208,11 @@ class AVPlayer:
         self._enqueued.insert(0, SoundOrVideoTag(filename=filename))
         self._play_next_if_idle()
 
+    def prepare_tags(self, tags: list[AVTag]) -> None:
+        "Let players prepare tags that are likely to be played soon."
+        for prepare in self.tag_preparers:
+            prepare(tags)
+
     def toggle_pause(self) -> None:
         if self.current_player:
             self.current_player.toggle_pause()
@@ -215,6 +226,7 @@ class AVPlayer:
         for player in self.players:
             player.shutdown()
         self.players.clear()
+        self.tag_preparers.clear()
 
     def _stop_if_playing(self) -> None:
         if self.current_player:
@@ -250,7 +262,29 @@ class AVPlayer:
         else:
             tooltip(f"no players found for {tag}")
 
+    def clear_player_cache(self) -> None:
+        "Call when the tags a player can handle change, eg after voices are reloaded."
+        self._tts_player_cache.clear()
+
     def _best_player_for_tag(self, tag: AVTag) -> Player | None:
+        if not isinstance(tag, TTSTag):
+            return self._rank_players(tag)
+
+        # TTS players may need to search many voices to rank a tag, so the
+        # result is remembered for tags that differ only in their text, until
+        # the players or their voices change
+        players = [(p, getattr(p, "voices_version", 0)) for p in self.players]
+        if self._cached_players != players:
+            self._cached_players = players
+            self.clear_player_cache()
+        key = (tag.lang, tuple(tag.voices), tag.speed, tuple(tag.other_args))
+        try:
+            return self._tts_player_cache[key]
+        except KeyError:
+            player = self._tts_player_cache[key] = self._rank_players(tag)
+            return player
+
+    def _rank_players(self, tag: AVTag) -> Player | None:
         ranked = []
         for p in self.players:
             rank = p.rank_for_tag(tag)
@@ -960,9 +994,12 @@ def setup_audio(taskman: TaskManager, base_folder: str, media_folder: str) -> No
 
     # tts support
     if is_mac:
-        from aqt.tts import MacTTSPlayer
+        from aqt.tts import MacTTSFilePlayer
 
-        av_player.players.append(MacTTSPlayer(taskman))
+        # the file player writes the audio to disk and plays it with the
+        # players above, so upcoming tags can be synthesized ahead of time
+        av_player.players.append(MacTTSFilePlayer(taskman))
+        _enable_tts_presynthesis(base_folder)
     elif is_win:
         from aqt.tts import WindowsTTSPlayer
 
@@ -974,6 +1011,15 @@ def setup_audio(taskman: TaskManager, base_folder: str, media_folder: str) -> No
             # If Windows 10, ensure it's October 2018 update or later
             if int(platform.version().split(".")[-1]) >= 17763:
                 av_player.players.append(WindowsRTTTSFilePlayer(taskman))
+                _enable_tts_presynthesis(base_folder)
+
+
+def _enable_tts_presynthesis(base_folder: str) -> None:
+    from aqt.tts import TTSCache, presynthesizer, set_tts_cache
+
+    # synthesized audio is shared between profiles
+    set_tts_cache(TTSCache(os.path.join(base_folder, "tts_cache")))
+    av_player.tag_preparers.append(presynthesizer.add)
 
 
 def cleanup_audio() -> None:
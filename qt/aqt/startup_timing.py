@@ -0,0 +1,107 @@
+# Copyright: Ankitects Pty Ltd and contributors
+# License: GNU AGPL, version 3 or later; http://www.gnu.org/licenses/agpl.html
+
+"""Records how long startup takes.
+
+When the ANKI_PROFILE_STARTUP env var is set to a file path, the time taken to
+import each module on the main thread is recorded, along with the time at which
+each phase of startup (profile selection, collection open, first render)
+finished. A report is written to the path once the first screen has been
+rendered.
+
+This module must not import anything from aqt, as it is loaded before the rest
+of the package.
+"""
+
+from __future__ import annotations
+
+import builtins
+import os
+import sys
+import threading
+import time
+from typing import Any
+
+REPORT_PATH = os.environ.get("ANKI_PROFILE_STARTUP")
+# how many of the slowest imports to include in the report
+REPORT_IMPORT_LIMIT = 50
+
+_start = time.perf_counter()
+_original_import = builtins.__import__
+# (module, self secs, cumulative secs) of each module imported so far
+_imports: list[tuple[str, float, float]] = []
+# (phase, secs since start)
+_phases: list[tuple[str, float]] = []
+# for each import in progress, the time spent importing its dependencies
+_nested: list[float] = []
+_written = False
+
+
+def enabled() -> bool:
+    return bool(REPORT_PATH)
+
+
+def start() -> None:
+    "Start timing imports. Does nothing unless profiling is enabled."
+    if enabled():
+        builtins.__import__ = _timed_import
+
+
+def mark(phase: str) -> None:
+    "Record that a phase of startup has finished."
+    if enabled():
+        _phases.append((phase, time.perf_counter() - _start))
+
+
+def finish(phase: str) -> None:
+    "Record the final phase, stop timing imports and write the report."
+    global _written
+    if not enabled() or _written:
+        return
+    mark(phase)
+    builtins.__import__ = _original_import
+    _written = True
+    assert REPORT_PATH
+    with open(REPORT_PATH, "w", encoding="utf8") as file:
+        file.write(report())
+
+
+def report() -> str:
+    lines = ["Phase                                       secs"]
+    for phase, secs in _phases:
+        lines.append(f"{phase:<40} {secs:>8.3f}")
+    lines.append("")
+    lines.append(f"Slowest imports ({len(_imports)} modules imported)")
+    lines.append("Module                                      self    total")
+    slowest = sorted(_imports, key=lambda entry: entry[2], reverse=True)
+    for module, self_secs, total_secs in slowest[:REPORT_IMPORT_LIMIT]:
+        lines.append(f"{module:<40} {self_secs:>8.3f} {total_secs:>8.3f}")
+    return "\n".join(lines) + "\n"
+
+
+def _timed_import(
+    name: str,
+    globals: Any = None,
+    locals: Any = None,
+    fromlist: Any = (),
+    level: int = 0,
+) -> Any:
+    # only first-time, absolute imports on the main thread are timed; anything
+    # else counts towards the importing module
+    if (
+        level
+        or name in sys.modules
+        or threading.current_thread() is not threading.main_thread()
+    ):
+        return _original_import(name, globals, locals, fromlist, level)
+
+    _nested.append(0.0)
+    start = time.perf_counter()
+    try:
+        return _original_import(name, globals, locals, fromlist, level)
+    finally:
+        total = time.perf_counter() - start
+        nested = _nested.pop()
+        if _nested:
+            _nested[-1] += total
+        _imports.append((name, total - nested, total))
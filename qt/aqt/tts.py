@@ -31,6 +31,9 @@ from __future__ import annotations
 import os
 import re
 import subprocess
+import threading
+from collections import deque
+from collections.abc import Callable
 from concurrent.futures import Future
 from dataclasses import dataclass
 from operator import attrgetter
@@ -42,7 +45,7 @@ import aqt
 from anki import hooks
 from anki.collection import TtsVoice as BackendVoice
 from anki.sound import AVTag, TTSTag
-from anki.utils import checksum, is_win, tmpdir
+from anki.utils import SizeBoundedFolder, checksum, is_win, tmpdir
 from aqt import gui_hooks
 from aqt.sound import OnDoneCallback, SimpleProcessPlayer
 from aqt.utils import tooltip, tr
@@ -69,44 +72,89 @@ class TTSVoiceMatch:
     rank: int
 
 
+@dataclass
+class TTSVoiceIndex:
+    "Voices of a player, arranged for voice_for_tag()."
+
+    # (lang, name) -> first voice with that language and name
+    by_name: dict[tuple[str, str], TTSVoice]
+    # lang -> (voice, rank) to use when none of the requested voices exist
+    fallbacks: dict[str, tuple[TTSVoice, int]]
+
+    @classmethod
+    def from_voices(cls, voices: list[TTSVoice]) -> TTSVoiceIndex:
+        by_name: dict[tuple[str, str], TTSVoice] = {}
+        fallbacks: dict[str, tuple[TTSVoice, int]] = {}
+        for voice in voices:
+            by_name.setdefault((voice.lang, voice.name), voice)
+            # the first available voice for the language, with a rank of -100
+            fallbacks.setdefault(voice.lang, (voice, -100))
+        # unless a preferred fallback voice (for example, Apple Samantha) is
+        # available, with a rank of -50
+        for voice in voices:
+            if voice.lang == "en_US" and voice.name.startswith("Apple_Samantha"):
+                fallbacks["en_US"] = (voice, -50)
+                break
+        return cls(by_name=by_name, fallbacks=fallbacks)
+
+
 class TTSPlayer:
     default_rank = 0
     _available_voices: list[TTSVoice] | None = None
+    _voice_index: TTSVoiceIndex | None = None
+    # increased when the voices change, so AVPlayer knows to rank tags again
+    voices_version = 0
 
     def get_available_voices(self) -> list[TTSVoice]:
         return []
 
     def voices(self) -> list[TTSVoice]:
         if self._available_voices is None:
-            self._available_voices = self.get_available_voices()
+            self._set_voices(self.get_available_voices())
+        assert self._available_voices is not None
         return self._available_voices
 
+    def _set_voices(self, voices: list[TTSVoice]) -> None:
+        self._available_voices = voices
+        self._voice_index = TTSVoiceIndex.from_voices(voices)
+        self.voices_version += 1
+
+    def voice_index(self) -> TTSVoiceIndex:
+        voices = self.voices()
+        if self._voice_index is None:
+            # voices were provided without _set_voices(), eg by an add-on
+            self._voice_index = TTSVoiceIndex.from_voices(voices)
+        return self._voice_index
+
     def voice_for_tag(self, tag: TTSTag) -> TTSVoiceMatch | None:
-        avail_voices = self.voices()
+        index = self.voice_index()
 
         rank = self.default_rank
 
         # any requested voices match?
         for requested_voice in tag.voices:
-            for avail in avail_voices:
-                if avail.name == requested_voice and avail.lang == tag.lang:
-                    return TTSVoiceMatch(voice=avail, rank=rank)
+            if voice := index.by_name.get((tag.lang, requested_voice)):
+                return TTSVoiceMatch(voice=voice, rank=rank)
 
             rank -= 1
 
-        # if no requested voices match, use a preferred fallback voice
-        # (for example, Apple Samantha) with rank of -50
-        for avail in avail_voices:
-            if avail.lang == tag.lang:
-                if avail.lang == "en_US" and avail.name.startswith("Apple_Samantha"):
-                    return TTSVoiceMatch(voice=avail, rank=-50)
+        # if no requested voices match, use a fallback voice
+        if fallback := index.fallbacks.get(tag.lang):
+            voice, rank = fallback
+            return TTSVoiceMatch(voice=voice, rank=rank)
+
+        return None
 
-        # if no requested or preferred voices match, we fall back on
-        # the first available voice for the language, with a rank of -100
-        for avail in avail_voices:
-            if avail.lang == tag.lang:
-                return TTSVoiceMatch(voice=avail, rank=-100)
+    # players that write audio to a file before playing it can set this to the
+    # file's extension and define synthesize(tag, voice, path), which writes
+    # the audio for tag to path on a background thread, so that audio for
+    # upcoming cards can be prepared ahead of time
+    synthesized_file_extension: str | None = None
 
+    def presynthesized_file(self, tag: TTSTag, voice: TTSVoice) -> str | None:
+        "The previously synthesized audio for tag, if available."
+        if (cache := tts_cache()) and self.synthesized_file_extension:
+            return cache.get(tag, voice, self.synthesized_file_extension)
         return None
 
     def temp_file_for_tag_and_voice(self, tag: AVTag, voice: TTSVoice) -> str:
@@ -131,6 +179,150 @@ class TTSProcessPlayer(SimpleProcessPlayer, TTSPlayer):
             return None
 
 
+# Pre-synthesis
+##########################################################################
+
+TTS_CACHE_MAX_BYTES = 200 * 1024 * 1024
+TTS_PRESYNTHESIS_WORKERS = 2
+# synthesis requests beyond this are dropped, oldest first
+TTS_PRESYNTHESIS_QUEUE_LIMIT = 20
+
+
+class TTSCache(SizeBoundedFolder):
+    """A size-bounded folder of synthesized audio, kept between sessions.
+
+    Entries are named after a hash of the voice, speed and text. When the
+    folder grows beyond max_bytes, the least recently used entries are removed.
+    It is safe to use from several threads at once."""
+
+    def __init__(self, folder: str, max_bytes: int = TTS_CACHE_MAX_BYTES) -> None:
+        super().__init__(folder, max_bytes)
+
+    def __repr__(self) -> str:
+        return f"<TTSCache {self.folder}>"
+
+    def get(self, tag: TTSTag, voice: TTSVoice, ext: str) -> str | None:
+        path = self._path(tag, voice, ext)
+        if not self._touch(path):
+            return None
+        return path
+
+    def add(
+        self,
+        tag: TTSTag,
+        voice: TTSVoice,
+        ext: str,
+        synthesize: Callable[[str], None],
+    ) -> str:
+        """Call synthesize() with a path to write the audio for tag to, and
+        return the path of the resulting entry."""
+        path = self._path(tag, voice, ext)
+        # write to a temporary name first, so players never see a partial file.
+        # the extension is kept, as some engines choose a format based on it.
+        tmp_path = os.path.join(self.folder, f"partial-{threading.get_ident()}{ext}")
+        try:
+            synthesize(tmp_path)
+            size = os.path.getsize(tmp_path)
+            os.replace(tmp_path, path)
+        finally:
+            if os.path.exists(tmp_path):
+                os.unlink(tmp_path)
+        self._added(size)
+        return path
+
+    def _path(self, tag: TTSTag, voice: TTSVoice, ext: str) -> str:
+        key = f"{type(voice).__name__}-{voice.name}-{voice.lang}-{tag.speed}-"
+        return os.path.join(self.folder, f"{checksum(key + tag.field_text)}{ext}")
+
+
+_cache: TTSCache | None = None
+
+
+def set_tts_cache(cache: TTSCache | None) -> None:
+    "Set the cache used to store audio synthesized ahead of time, or disable it."
+    global _cache
+    _cache = cache
+
+
+def tts_cache() -> TTSCache | None:
+    return _cache
+
+
+@dataclass
+class _SynthesisJob:
+    synthesize: Callable[[TTSTag, TTSVoice, str], None]
+    tag: TTSTag
+    voice: TTSVoice
+    ext: str
+
+
+class TTSPresynthesizer:
+    """Synthesizes audio for tags that are expected to be played soon, a few at
+    a time, so file-based players can start speaking without a delay.
+    Must be used from the main thread."""
+
+    def __init__(self) -> None:
+        self._queue: deque[_SynthesisJob] = deque(maxlen=TTS_PRESYNTHESIS_QUEUE_LIMIT)
+        self._running = 0
+
+    def add(self, tags: list[AVTag]) -> None:
+        if tts_cache() is None:
+            return
+        from aqt.sound import av_player
+
+        for tag in tags:
+            if not isinstance(tag, TTSTag):
+                continue
+            player = av_player._best_player_for_tag(tag)
+            if not isinstance(player, TTSPlayer):
+                continue
+            ext = player.synthesized_file_extension
+            synthesize = getattr(player, "synthesize", None)
+            if not (ext and synthesize):
+                continue
+            if not (match := player.voice_for_tag(tag)):
+                continue
+            if player.presynthesized_file(tag, match.voice):
+                continue
+            job = _SynthesisJob(synthesize, tag, match.voice, ext)
+            if job not in self._queue:
+                self._queue.append(job)
+        self._start_jobs()
+
+    def _start_jobs(self) -> None:
+        assert aqt.mw
+        while self._queue and self._running < TTS_PRESYNTHESIS_WORKERS:
+            job = self._queue.popleft()
+            self._running += 1
+            aqt.mw.taskman.run_in_background(
+                lambda job=job: self._synthesize(job),
+                self._on_done,
+                uses_collection=False,
+            )
+
+    @staticmethod
+    def _synthesize(job: _SynthesisJob) -> None:
+        cache = tts_cache()
+        if cache is None or cache.get(job.tag, job.voice, job.ext):
+            return
+        cache.add(
+            job.tag,
+            job.voice,
+            job.ext,
+            lambda path: job.synthesize(job.tag, job.voice, path),
+        )
+
+    def _on_done(self, future: Future) -> None:
+        self._running -= 1
+        # errors are ignored, as the tag will be synthesized again when played,
+        # which will report them
+        future.exception()
+        self._start_jobs()
+
+
+presynthesizer = TTSPresynthesizer()
+
+
 # tts-voices filter
 ##########################################################################
 
@@ -226,6 +418,9 @@ class MacTTSFilePlayer(MacTTSPlayer):
     "Generates an .aiff file, which is played using av_player."
 
     tmppath = os.path.join(tmpdir(), "tts.aiff")
+    synthesized_file_extension = ".aiff"
+    # the file the last call to _play() produced
+    _output_path = tmppath
 
     def _play(self, tag: AVTag) -> None:
         assert isinstance(tag, TTSTag)
@@ -234,21 +429,13 @@ class MacTTSFilePlayer(MacTTSPlayer):
         voice = match.voice
         assert isinstance(voice, MacVoice)
 
-        default_wpm = 170
-        words_per_min = str(int(default_wpm * tag.speed))
+        if path := self.presynthesized_file(tag, voice):
+            self._output_path = path
+            return
+        self._output_path = self.tmppath
 
         self._process = subprocess.Popen(
-            [
-                "say",
-                "-v",
-                voice.original_name,
-                "-r",
-                words_per_min,
-                "-f",
-                "-",
-                "-o",
-                self.tmppath,
-            ],
+            self._say_args(tag, voice, self.tmppath),
             stdin=subprocess.PIPE,
             stdout=subprocess.DEVNULL,
             stderr=subprocess.DEVNULL,
@@ -259,6 +446,31 @@ class MacTTSFilePlayer(MacTTSPlayer):
         self._process.stdin.close()
         self._wait_for_termination(tag)
 
+    def synthesize(self, tag: TTSTag, voice: TTSVoice, path: str) -> None:
+        assert isinstance(voice, MacVoice)
+        subprocess.run(
+            self._say_args(tag, voice, path),
+            input=tag.field_text.encode("utf8"),
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL,
+            check=True,
+        )
+
+    def _say_args(self, tag: TTSTag, voice: MacVoice, path: str) -> list[str]:
+        default_wpm = 170
+        words_per_min = str(int(default_wpm * tag.speed))
+        return [
+            "say",
+            "-v",
+            voice.original_name,
+            "-r",
+            words_per_min,
+            "-f",
+            "-",
+            "-o",
+            path,
+        ]
+
     def _on_done(self, ret: Future, cb: OnDoneCallback) -> None:
         ret.result()
 
@@ -266,7 +478,7 @@ class MacTTSFilePlayer(MacTTSPlayer):
         from aqt.sound import av_player
 
         av_player.current_player = None
-        av_player.insert_file(self.tmppath)
+        av_player.insert_file(self._output_path)
 
 
 # Windows support
@@ -580,10 +792,13 @@ if is_win:
 
     class WindowsRTTTSFilePlayer(TTSProcessPlayer):
         tmppath = os.path.join(tmpdir(), "tts.wav")
+        synthesized_file_extension = ".wav"
+        # the file the last call to _play() produced
+        _output_path = tmppath
 
         def validated_voices(self) -> list[TTSVoice]:
-            self._available_voices = self._get_available_voices(validate=True)
-            return self._available_voices
+            self._set_voices(self._get_available_voices(validate=True))
+            return self.voices()
 
         @classmethod
         def get_available_voices(cls) -> list[TTSVoice]:
@@ -605,8 +820,17 @@ if is_win:
             self._taskman.run_on_main(
                 lambda: gui_hooks.av_player_did_begin_playing(self, tag)
             )
+            if path := self.presynthesized_file(tag, voice):
+                self._output_path = path
+                return
+            self._output_path = self.tmppath
+            self.synthesize(tag, voice, self.tmppath)
+
+        def synthesize(self, tag: TTSTag, voice: TTSVoice, path: str) -> None:
+            assert aqt.mw
+            assert isinstance(voice, WindowsRTVoice)
             aqt.mw.backend.write_tts_stream(
-                path=self.tmppath,
+                path=path,
                 voice_id=voice.id,
                 speed=tag.speed,
                 text=tag.field_text,
@@ -623,4 +847,4 @@ if is_win:
             from aqt.sound import av_player
 
             av_player.current_player = None
-            av_player.insert_file(self.tmppath)
+            av_player.insert_file(self._output_path)
@@ -0,0 +1,88 @@
+# Copyright: Ankitects Pty Ltd and contributors
+# License: GNU AGPL, version 3 or later; http://www.gnu.org/licenses/agpl.html
+
+"""Ad-hoc benchmarks for the GUI layer. These are not run as part of the
+test suite. From the qt folder, run with:
+
+python -m tests.benchmarks [name ...]
+"""
+
+from __future__ import annotations
+
+import json
+import sys
+
+from anki._benchmark import BenchmarkSet, timed
+from anki.decks import DeckId, DeckTreeNode
+from anki.sound import TTSTag
+from aqt.deckbrowser import RenderDeckNodeContext, diff_deck_rows, render_deck_rows
+from aqt.tts import TTSPlayer, TTSVoice
+
+benchmark = BenchmarkSet()
+
+
+def synthetic_deck_tree(parents: int, children: int) -> DeckTreeNode:
+    "A tree of parents top-level decks, each with children subdecks."
+    top = DeckTreeNode(deck_id=0, level=0)
+    deck_id = 1
+    for i in range(parents):
+        parent = top.children.add(
+            deck_id=deck_id, name=f"Deck {i}", level=1, review_count=i % 7
+        )
+        deck_id += 1
+        for j in range(children):
+            parent.children.add(
+                deck_id=deck_id,
+                name=f"Subdeck {j}",
+                level=2,
+                new_count=j % 20,
+                learn_count=j % 3,
+                review_count=j % 50,
+            )
+            deck_id += 1
+    return top
+
+
+@benchmark
+def deck_browser_render() -> None:
+    "Render a 10k deck tree, then patch it after a few due counts change."
+    top = synthetic_deck_tree(100, 99)
+    ctx = RenderDeckNodeContext(current_deck_id=DeckId(1))
+    timed("render 10k rows", lambda: render_deck_rows(top.children, ctx))
+    old = render_deck_rows(top.children, ctx)
+    for parent in top.children[:10]:
+        parent.review_count += 1
+    new = render_deck_rows(top.children, ctx)
+    timed("diff 10k rows", lambda: diff_deck_rows(old, new))
+    patch = diff_deck_rows(old, new)
+    full_size = sum(len(row) for _did, row in new)
+    patch_size = len(json.dumps(patch.order)) + len(json.dumps(patch.changed))
+    print(f"full page: {full_size} bytes, patch: {patch_size} bytes")
+    print(f"changed rows: {len(patch.changed)}, reordered: {patch.order is not None}")
+
+
+class SyntheticTTSPlayer(TTSPlayer):
+    def get_available_voices(self) -> list[TTSVoice]:
+        return [TTSVoice(name=f"Voice_{i}", lang=f"l{i % 50}_XX") for i in range(1000)]
+
+
+@benchmark
+def tts_voice_lookup() -> None:
+    "Match 10k tags against a player with 1000 voices."
+    player = SyntheticTTSPlayer()
+    tags = [
+        TTSTag(
+            field_text="text",
+            lang=f"l{i % 60}_XX",
+            voices=["Missing", f"Voice_{i % 1000}"],
+            speed=1.0,
+            other_args=[],
+        )
+        for i in range(10_000)
+    ]
+    player.voices()
+    timed("voice_for_tag", lambda: [player.voice_for_tag(tag) for tag in tags])
+
+
+if __name__ == "__main__":
+    benchmark.main(sys.argv[1:])
@@ -0,0 +1,51 @@
+# Copyright: Ankitects Pty Ltd and contributors
+# License: GNU AGPL, version 3 or later; http://www.gnu.org/licenses/agpl.html
+
+import pickle
+from pathlib import Path
+from tempfile import TemporaryDirectory
+
+from anki.db import DB
+from aqt.profiles import ProfileManager, ProfileWriter
+
+
+def saved_profile(base: str, name: str) -> dict:
+    with DB(str(Path(base) / "prefs21.db")) as db:
+        data = db.scalar("select cast(data as blob) from profiles where name = ?", name)
+    return pickle.loads(data)
+
+
+def test_write_behind_save():
+    with TemporaryDirectory() as base:
+        pm = ProfileManager(Path(base))
+        pm.setupMeta()
+        pm.create("test")
+        pm.load("test")
+
+        # a burst of saves is written in the background
+        for i in range(10):
+            pm.profile["counter"] = i
+            pm.save()
+        writer = pm._writer
+        assert writer is not None
+        pm.flush()
+        assert saved_profile(base, "test")["counter"] == 9
+
+        # unchanged data is not queued again
+        pm.save()
+        assert not writer._pending
+
+        # and the background writer is not used when turned off
+        pm.write_behind = False
+        pm.profile["counter"] = 10
+        pm.save()
+        assert saved_profile(base, "test")["counter"] == 10
+
+
+def test_writer_failure_falls_back_to_caller():
+    with TemporaryDirectory() as base:
+        # the database can't be opened, so the writer thread exits
+        writer = ProfileWriter(str(Path(base) / "missing" / "prefs21.db"))
+        writer.write("test", b"data")
+        assert writer.flush() == {"test": b"data"}
+        assert writer.flush() == {}
@@ -0,0 +1,47 @@
+# Copyright: Ankitects Pty Ltd and contributors
+# License: GNU AGPL, version 3 or later; http://www.gnu.org/licenses/agpl.html
+
+import os
+import subprocess
+import sys
+
+# Cumulative time allowed for 'import aqt' in a new interpreter, as reported by
+# -X importtime. It is set well above the usual figure so that slow machines
+# don't fail, and can be changed with ANKI_IMPORT_BUDGET_SECS. If a change needs
+# more, consider whether the new import can be done on first use instead.
+IMPORT_BUDGET_SECS = float(os.environ.get("ANKI_IMPORT_BUDGET_SECS", "5.0"))
+
+
+def run_python(*args: str) -> subprocess.CompletedProcess:
+    return subprocess.run(
+        [sys.executable, *args], capture_output=True, check=True, encoding="utf8"
+    )
+
+
+def test_import_time_budget():
+    # the first run may need to compile bytecode
+    run_python("-c", "import aqt")
+    # lines are in the form 'import time: self [us] | cumulative | package'
+    stderr = run_python("-X", "importtime", "-c", "import aqt").stderr
+    cumulative_us = None
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or line.count("|") != 2:
+            continue
+        _self, cumulative, package = line.split("|")
+        if package.strip() == "aqt":
+            cumulative_us = int(cumulative)
+    assert cumulative_us is not None
+    assert cumulative_us / 1_000_000 < IMPORT_BUDGET_SECS
+
+
+def test_rarely_used_modules_are_lazy():
+    stdout = run_python(
+        "-c",
+        "import sys, aqt; print(sorted(aqt._LAZY_SUBMODULES))\n"
+        "print([m for m in aqt._LAZY_SUBMODULES if f'aqt.{m}' in sys.modules])",
+    ).stdout
+    lazy, loaded = stdout.splitlines()
+    assert lazy != "[]"
+    assert loaded == "[]"
+    # but they can still be reached as attributes
+    run_python("-c", "import aqt; aqt.stats.DeckStats")
@@ -1,12 +1,18 @@
 // Copyright: Ankitects Pty Ltd and contributors
 // License: GNU AGPL, version 3 or later; http://www.gnu.org/licenses/agpl.html
+use anki_proto::card_rendering::FieldChecksumsResponse;
+use anki_proto::card_rendering::StripHtmlBatchRequest;
 use anki_proto::card_rendering::StripHtmlRequest;
+use anki_proto::generic;
 
 use crate::backend::Backend;
+use crate::card_rendering::service::strip_html_batch_proto;
 use crate::card_rendering::service::strip_html_proto;
 use crate::card_rendering::tts;
+use crate::notes::field_checksum;
 use crate::prelude::*;
 use crate::services::BackendCardRenderingService;
+use crate::text::strip_html_preserving_media_filenames;
 
 impl BackendCardRenderingService for Backend {
     fn strip_html(
@@ -16,6 +22,20 @@ impl BackendCardRenderingService for Backend {
         strip_html_proto(input)
     }
 
+    fn strip_html_batch(&self, input: StripHtmlBatchRequest) -> Result<generic::StringList> {
+        strip_html_batch_proto(input)
+    }
+
+    fn field_checksums(&self, input: generic::StringList) -> Result<FieldChecksumsResponse> {
+        Ok(FieldChecksumsResponse {
+            checksums: input
+                .vals
+                .iter()
+                .map(|text| field_checksum(&strip_html_preserving_media_filenames(text)))
+                .collect(),
+        })
+    }
+
     fn all_tts_voices(
         &self,
         input: anki_proto::card_rendering::AllTtsVoicesRequest,
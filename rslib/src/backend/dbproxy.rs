@@ -1,10 +1,13 @@
 // Copyright: Ankitects Pty Ltd and contributors
 // License: GNU AGPL, version 3 or later; http://www.gnu.org/licenses/agpl.html
 
+use std::collections::HashMap;
+
 use anki_proto::ankidroid::sql_value::Data;
 use anki_proto::ankidroid::DbResponse;
 use anki_proto::ankidroid::DbResult as ProtoDbResult;
 use anki_proto::ankidroid::SqlValue as pb_SqlValue;
+use data_encoding::BASE64;
 use rusqlite::params_from_iter;
 use rusqlite::types::FromSql;
 use rusqlite::types::FromSqlError;
@@ -13,6 +16,7 @@ use rusqlite::types::ToSqlOutput;
 use rusqlite::types::ValueRef;
 use rusqlite::OptionalExtension;
 use serde::Deserialize;
+use serde::Deserializer;
 use serde::Serialize;
 
 use crate::ankidroid::db::next_sequence_number;
@@ -27,6 +31,12 @@ pub(super) enum DbRequest {
         sql: String,
         args: Vec<SqlValue>,
         first_row_only: bool,
+        /// If true, large results may be returned in the binary format
+        /// produced by [encode_binary_rows] instead of JSON.
+        #[serde(default)]
+        allow_binary: bool,
+        #[serde(default)]
+        ids: Option<IdSet>,
     },
     Begin,
     Commit,
@@ -35,15 +45,239 @@ pub(super) enum DbRequest {
         sql: String,
         args: Vec<Vec<SqlValue>>,
     },
+    Iterate {
+        sql: String,
+        args: Vec<SqlValue>,
+        batch_size: usize,
+        #[serde(default)]
+        ids: Option<IdSet>,
+    },
+    /// Always returns binary rows, so the frontend can load single-type
+    /// columns straight into arrays.
+    Columns {
+        sql: String,
+        args: Vec<SqlValue>,
+        #[serde(default)]
+        ids: Option<IdSet>,
+    },
+    Prepare {
+        sql: String,
+    },
+    Run {
+        statement: u32,
+        args: Vec<SqlValue>,
+        first_row_only: bool,
+    },
+    Finalize {
+        statement: u32,
+    },
+    Fetch {
+        cursor: u32,
+    },
+    Close {
+        cursor: u32,
+    },
+}
+
+/// Ids sent by the frontend alongside a query, which the query can refer to
+/// as the `bound_ids` table, eg `select * from notes where id in bound_ids`.
+/// Unlike ids that are inlined into the SQL, this keeps the SQL constant, so
+/// the compiled statement can be cached, and SQLite does not need to parse a
+/// very long statement. The ids arrive as a base64 string of little-endian
+/// i64s.
+#[derive(Debug)]
+pub(super) struct IdSet(Vec<i64>);
+
+impl<'de> Deserialize<'de> for IdSet {
+    fn deserialize<D>(deserializer: D) -> std::result::Result<Self, D::Error>
+    where
+        D: Deserializer<'de>,
+    {
+        let text = String::deserialize(deserializer)?;
+        let bytes = BASE64
+            .decode(text.as_bytes())
+            .map_err(serde::de::Error::custom)?;
+        if bytes.len() % 8 != 0 {
+            return Err(serde::de::Error::custom("truncated id set"));
+        }
+        Ok(IdSet(
+            bytes
+                .chunks_exact(8)
+                .map(|chunk| i64::from_le_bytes(chunk.try_into().unwrap()))
+                .collect(),
+        ))
+    }
+}
+
+impl IdSet {
+    /// Replace the contents of the bound_ids table with these ids.
+    fn bind(&self, storage: &SqliteStorage) -> Result<()> {
+        storage.db.execute_batch(
+            "create temporary table if not exists bound_ids \
+             (id integer primary key not null); \
+             savepoint bind_ids; \
+             delete from bound_ids;",
+        )?;
+        let mut stmt = storage
+            .db
+            .prepare_cached("insert or ignore into bound_ids values (?)")?;
+        for id in &self.0 {
+            stmt.execute([id])?;
+        }
+        storage.db.execute_batch("release bind_ids")?;
+        Ok(())
+    }
+}
+
+/// Run `func` with `ids` (if any) in the bound_ids table, emptying the table
+/// again afterwards.
+fn with_bound_ids<T>(
+    storage: &SqliteStorage,
+    ids: Option<&IdSet>,
+    func: impl FnOnce() -> Result<T>,
+) -> Result<T> {
+    let Some(ids) = ids else {
+        return func();
+    };
+    ids.bind(storage)?;
+    let result = func();
+    storage.db.execute("delete from bound_ids", [])?;
+    result
 }
 
 #[derive(Serialize)]
 #[serde(untagged)]
 pub(super) enum DbResult {
     Rows(Vec<Vec<SqlValue>>),
+    /// Rows that should be sent with [encode_binary_rows].
+    #[serde(skip)]
+    BinaryRows {
+        rows: Vec<Vec<SqlValue>>,
+        columns: usize,
+    },
+    Batch {
+        /// None when there are no more rows to fetch.
+        cursor: Option<u32>,
+        rows: Vec<Vec<SqlValue>>,
+    },
+    Statement(u32),
     None,
 }
 
+/// SQL registered by the frontend with a prepare request, so that repeated
+/// runs only need to send a handle and arguments. The compiled statements
+/// live in the connection's statement cache.
+#[derive(Debug, Default)]
+pub(crate) struct PreparedStatements {
+    next_id: u32,
+    sql: HashMap<u32, String>,
+}
+
+impl PreparedStatements {
+    fn prepare(&mut self, storage: &SqliteStorage, sql: String) -> Result<DbResult> {
+        // compile up front, so errors are reported at prepare time
+        storage.db.prepare_cached(&sql)?;
+        let id = self.next_id;
+        self.next_id = self.next_id.wrapping_add(1);
+        self.sql.insert(id, sql);
+        Ok(DbResult::Statement(id))
+    }
+
+    fn sql(&self, id: u32) -> Result<&str> {
+        self.sql
+            .get(&id)
+            .map(String::as_str)
+            .or_invalid("statement has been finalized")
+    }
+
+    fn finalize(&mut self, id: u32) {
+        self.sql.remove(&id);
+    }
+}
+
+/// Select queries whose rows are being handed out to the frontend in
+/// batches. Each batch is read from the database when it is fetched, using
+/// LIMIT/OFFSET on the query, so only one batch is held in memory at a time,
+/// and the first rows are returned without waiting for the rest of the query.
+/// As each batch runs the query again, changes made to the queried tables
+/// while iterating may cause rows to be skipped or repeated.
+#[derive(Debug, Default)]
+pub(crate) struct DbCursors {
+    next_id: u32,
+    cursors: HashMap<u32, DbCursor>,
+}
+
+#[derive(Debug)]
+struct DbCursor {
+    /// The query, wrapped so that it takes a limit and offset after its own
+    /// arguments.
+    sql: String,
+    args: Vec<SqlValue>,
+    ids: Option<IdSet>,
+    offset: usize,
+    batch_size: usize,
+}
+
+impl DbCursors {
+    fn open(
+        &mut self,
+        storage: &SqliteStorage,
+        sql: &str,
+        args: Vec<SqlValue>,
+        ids: Option<IdSet>,
+        batch_size: usize,
+    ) -> Result<DbResult> {
+        if !is_dql(sql) {
+            invalid_input!("only select statements can be iterated");
+        }
+        let id = self.next_id;
+        self.next_id = self.next_id.wrapping_add(1);
+        // the newline ends any trailing comment
+        let sql = sql.trim_end().trim_end_matches(';');
+        self.cursors.insert(
+            id,
+            DbCursor {
+                sql: format!("select * from ({sql}\n) limit ? offset ?"),
+                args,
+                ids,
+                offset: 0,
+                batch_size: batch_size.max(1),
+            },
+        );
+        self.fetch(storage, id)
+    }
+
+    fn fetch(&mut self, storage: &SqliteStorage, id: u32) -> Result<DbResult> {
+        let Some(cursor) = self.cursors.get_mut(&id) else {
+            return Ok(DbResult::Batch {
+                cursor: None,
+                rows: vec![],
+            });
+        };
+        // one extra row is requested, to tell if there are more to come
+        let mut args = cursor.args.clone();
+        args.push(SqlValue::Int(cursor.batch_size as i64 + 1));
+        args.push(SqlValue::Int(cursor.offset as i64));
+        let mut rows = with_bound_ids(storage, cursor.ids.as_ref(), || {
+            db_query(storage, &cursor.sql, &args)
+        })?;
+        let more = rows.len() > cursor.batch_size;
+        rows.truncate(cursor.batch_size);
+        cursor.offset += rows.len();
+        let cursor = if more {
+            Some(id)
+        } else {
+            self.cursors.remove(&id);
+            None
+        };
+        Ok(DbResult::Batch { cursor, rows })
+    }
+
+    fn close(&mut self, id: u32) {
+        self.cursors.remove(&id);
+    }
+}
+
 #[derive(Serialize, Deserialize, Debug)]
 #[serde(untagged)]
 pub(crate) enum SqlValue {
@@ -116,7 +350,10 @@ impl FromSql for SqlValue {
 }
 
 pub(crate) fn db_command_bytes(col: &mut Collection, input: &[u8]) -> Result<Vec<u8>> {
-    serde_json::to_vec(&db_command_bytes_inner(col, input)?).map_err(Into::into)
+    match db_command_bytes_inner(col, input)? {
+        DbResult::BinaryRows { rows, columns } => Ok(encode_binary_rows(&rows, columns)),
+        result => serde_json::to_vec(&result).map_err(Into::into),
+    }
 }
 
 pub(super) fn db_command_bytes_inner(col: &mut Collection, input: &[u8]) -> Result<DbResult> {
@@ -126,13 +363,25 @@ pub(super) fn db_command_bytes_inner(col: &mut Collection, input: &[u8]) -> Resu
             sql,
             args,
             first_row_only,
+            allow_binary,
+            ids,
         } => {
             update_state_after_modification(col, &sql);
-            if first_row_only {
-                db_query_row(&col.storage, &sql, &args)?
-            } else {
-                db_query(&col.storage, &sql, &args)?
-            }
+            let storage = &col.storage;
+            with_bound_ids(storage, ids.as_ref(), || {
+                if first_row_only {
+                    return db_query_row(storage, &sql, &args);
+                }
+                let rows = db_query(storage, &sql, &args)?;
+                let columns = rows.first().map_or(0, Vec::len);
+                Ok(
+                    if allow_binary && rows.len() * columns >= BINARY_ROWS_MIN_CELLS {
+                        DbResult::BinaryRows { rows, columns }
+                    } else {
+                        DbResult::Rows(rows)
+                    },
+                )
+            })?
         }
         DbRequest::Begin => {
             col.storage.begin_trx()?;
@@ -155,6 +404,47 @@ pub(super) fn db_command_bytes_inner(col: &mut Collection, input: &[u8]) -> Resu
             update_state_after_modification(col, &sql);
             db_execute_many(&col.storage, &sql, &args)?
         }
+        DbRequest::Iterate {
+            sql,
+            args,
+            batch_size,
+            ids,
+        } => col
+            .state
+            .db_cursors
+            .open(&col.storage, &sql, args, ids, batch_size)?,
+        DbRequest::Columns { sql, args, ids } => {
+            update_state_after_modification(col, &sql);
+            let storage = &col.storage;
+            with_bound_ids(storage, ids.as_ref(), || {
+                let columns = storage.db.prepare_cached(&sql)?.column_count();
+                let rows = db_query(storage, &sql, &args)?;
+                Ok(DbResult::BinaryRows { rows, columns })
+            })?
+        }
+        DbRequest::Prepare { sql } => col.state.db_statements.prepare(&col.storage, sql)?,
+        DbRequest::Run {
+            statement,
+            args,
+            first_row_only,
+        } => {
+            let sql = col.state.db_statements.sql(statement)?.to_string();
+            update_state_after_modification(col, &sql);
+            if first_row_only {
+                db_query_row(&col.storage, &sql, &args)?
+            } else {
+                DbResult::Rows(db_query(&col.storage, &sql, &args)?)
+            }
+        }
+        DbRequest::Finalize { statement } => {
+            col.state.db_statements.finalize(statement);
+            DbResult::None
+        }
+        DbRequest::Fetch { cursor } => col.state.db_cursors.fetch(&col.storage, cursor)?,
+        DbRequest::Close { cursor } => {
+            col.state.db_cursors.close(cursor);
+            DbResult::None
+        }
     };
     Ok(resp)
 }
@@ -180,13 +470,115 @@ fn is_dql(sql: &str) -> bool {
 pub(crate) fn db_command_proto(col: &mut Collection, input: &[u8]) -> Result<DbResponse> {
     let result = db_command_bytes_inner(col, input)?;
     let proto_resp = match result {
-        DbResult::None => ProtoDbResult { rows: Vec::new() },
-        DbResult::Rows(rows) => rows_to_proto(&rows),
+        DbResult::None | DbResult::Statement(_) => ProtoDbResult { rows: Vec::new() },
+        DbResult::Rows(rows)
+        | DbResult::BinaryRows { rows, .. }
+        | DbResult::Batch { rows, .. } => {
+            rows_to_proto(&rows)
+        }
     };
     let trimmed = trim_and_cache_remaining(col, proto_resp, next_sequence_number());
     Ok(trimmed)
 }
 
+/// Results smaller than this are cheaper to send as JSON.
+const BINARY_ROWS_MIN_CELLS: usize = 1000;
+
+/// Never the first byte of a JSON document.
+const BINARY_ROWS_MAGIC: u8 = 0;
+
+const COLUMN_INT: u8 = 0;
+const COLUMN_DOUBLE: u8 = 1;
+const COLUMN_STRING: u8 = 2;
+const COLUMN_MIXED: u8 = 3;
+
+const VALUE_NULL: u8 = 0;
+const VALUE_INT: u8 = 1;
+const VALUE_DOUBLE: u8 = 2;
+const VALUE_STRING: u8 = 3;
+const VALUE_BLOB: u8 = 4;
+
+/// Encode rows column by column, so that the frontend can decode columns
+/// containing a single type in bulk. All numbers are little endian.
+///
+/// - magic byte, u32 row count, u32 column count
+/// - for each column, a type byte followed by:
+///   - int/double: an i64/f64 for each row
+///   - string: a u32 length in characters for each row, then a u32 byte
+///     length and the concatenated UTF-8, so the frontend can decode the
+///     column in one go and slice it
+///   - mixed: for each row, a value type byte followed by an i64/f64, or a u32
+///     length and bytes for strings/blobs, or nothing for nulls
+fn encode_binary_rows(rows: &[Vec<SqlValue>], columns: usize) -> Vec<u8> {
+    let mut out = Vec::with_capacity(9 + rows.len() * columns * 9);
+    out.push(BINARY_ROWS_MAGIC);
+    out.extend_from_slice(&(rows.len() as u32).to_le_bytes());
+    out.extend_from_slice(&(columns as u32).to_le_bytes());
+    for column in 0..columns {
+        let values = rows.iter().map(|row| &row[column]);
+        if values.clone().all(|v| matches!(v, SqlValue::Int(_))) {
+            out.push(COLUMN_INT);
+            for value in values {
+                if let SqlValue::Int(i) = value {
+                    out.extend_from_slice(&i.to_le_bytes());
+                }
+            }
+        } else if values.clone().all(|v| matches!(v, SqlValue::Double(_))) {
+            out.push(COLUMN_DOUBLE);
+            for value in values {
+                if let SqlValue::Double(d) = value {
+                    out.extend_from_slice(&d.to_le_bytes());
+                }
+            }
+        } else if values.clone().all(|v| matches!(v, SqlValue::String(_))) {
+            out.push(COLUMN_STRING);
+            let mut byte_len = 0;
+            for value in values.clone() {
+                if let SqlValue::String(s) = value {
+                    out.extend_from_slice(&(s.chars().count() as u32).to_le_bytes());
+                    byte_len += s.len();
+                }
+            }
+            out.extend_from_slice(&(byte_len as u32).to_le_bytes());
+            for value in values {
+                if let SqlValue::String(s) = value {
+                    out.extend_from_slice(s.as_bytes());
+                }
+            }
+        } else {
+            out.push(COLUMN_MIXED);
+            for value in values {
+                encode_binary_value(value, &mut out);
+            }
+        }
+    }
+    out
+}
+
+fn encode_binary_value(value: &SqlValue, out: &mut Vec<u8>) {
+    match value {
+        SqlValue::Null => out.push(VALUE_NULL),
+        SqlValue::Int(i) => {
+            out.push(VALUE_INT);
+            out.extend_from_slice(&i.to_le_bytes());
+        }
+        SqlValue::Double(d) => {
+            out.push(VALUE_DOUBLE);
+            out.extend_from_slice(&d.to_le_bytes());
+        }
+        SqlValue::String(s) => {
+            out.push(VALUE_STRING);
+            out.extend_from_slice(&(s.len() as u32).to_le_bytes());
+            out.extend_from_slice(s.as_bytes());
+        }
+        SqlValue::Blob(b) => {
+            out.push(VALUE_BLOB);
+            out.extend_from_slice(&(b.len() as u32).to_le_bytes());
+            out.extend_from_slice(b);
+        }
+    }
+}
+
 pub(super) fn db_query_row(ctx: &SqliteStorage, sql: &str, args: &[SqlValue]) -> Result<DbResult> {
     let mut stmt = ctx.db.prepare_cached(sql)?;
     let columns = stmt.column_count();
@@ -211,7 +603,7 @@ pub(super) fn db_query_row(ctx: &SqliteStorage, sql: &str, args: &[SqlValue]) ->
     Ok(DbResult::Rows(rows))
 }
 
-pub(super) fn db_query(ctx: &SqliteStorage, sql: &str, args: &[SqlValue]) -> Result<DbResult> {
+fn db_query(ctx: &SqliteStorage, sql: &str, args: &[SqlValue]) -> Result<Vec<Vec<SqlValue>>> {
     let mut stmt = ctx.db.prepare_cached(sql)?;
     let columns = stmt.column_count();
 
@@ -226,7 +618,7 @@ pub(super) fn db_query(ctx: &SqliteStorage, sql: &str, args: &[SqlValue]) -> Res
         })?
         .collect();
 
-    Ok(DbResult::Rows(res?))
+    Ok(res?)
 }
 
 pub(super) fn db_execute_many(
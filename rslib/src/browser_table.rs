@@ -275,6 +275,32 @@ impl Collection {
     }
 
     pub fn browser_row_for_id(&mut self, id: i64) -> Result<anki_proto::search::BrowserRow> {
+        let (notes_mode, columns) = self.browser_row_settings()?;
+        RowContext::new(self, id, notes_mode, card_render_required(&columns))?.browser_row(&columns)
+    }
+
+    /// Like [Collection::browser_row_for_id], but for many rows at once. Rows
+    /// that fail to build are reported in `failed_ids` instead of aborting the
+    /// whole batch.
+    pub fn browser_rows_for_ids(&mut self, ids: &[i64]) -> Result<anki_proto::search::BrowserRows> {
+        let (notes_mode, columns) = self.browser_row_settings()?;
+        let with_card_render = card_render_required(&columns);
+        let mut out = anki_proto::search::BrowserRows::default();
+        for &id in ids {
+            match RowContext::new(self, id, notes_mode, with_card_render)
+                .and_then(|context| context.browser_row(&columns))
+            {
+                Ok(row) => {
+                    out.ids.push(id);
+                    out.rows.push(row);
+                }
+                Err(_) => out.failed_ids.push(id),
+            }
+        }
+        Ok(out)
+    }
+
+    fn browser_row_settings(&self) -> Result<(bool, Arc<Vec<Column>>)> {
         let notes_mode = self.get_config_bool(BoolKey::BrowserTableShowNotesMode);
         let columns = Arc::clone(
             self.state
@@ -282,7 +308,7 @@ impl Collection {
                 .as_ref()
                 .or_invalid("Active browser columns not set.")?,
         );
-        RowContext::new(self, id, notes_mode, card_render_required(&columns))?.browser_row(&columns)
+        Ok((notes_mode, columns))
     }
 
     fn get_note_maybe_with_fields(&self, id: NoteId, _with_fields: bool) -> Result<Note> {
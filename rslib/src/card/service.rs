@@ -77,6 +77,24 @@ impl crate::services::CardsService for Collection {
         self.set_card_flag(&to_card_ids(input.card_ids), input.flag)
             .map(Into::into)
     }
+
+    fn get_cards(
+        &mut self,
+        input: anki_proto::cards::CardIds,
+    ) -> error::Result<anki_proto::cards::Cards> {
+        let cards = input
+            .cids
+            .into_iter()
+            .map(|cid| {
+                let cid = CardId(cid);
+                self.storage
+                    .get_card(cid)
+                    .and_then(|opt| opt.or_not_found(cid))
+                    .map(Into::into)
+            })
+            .collect::<error::Result<_>>()?;
+        Ok(anki_proto::cards::Cards { cards })
+    }
 }
 
 impl TryFrom<anki_proto::cards::Card> for Card {
@@ -1,6 +1,9 @@
 // Copyright: Ankitects Pty Ltd and contributors
 // License: GNU AGPL, version 3 or later; http://www.gnu.org/licenses/agpl.html
 
+use std::borrow::Cow;
+
+use anki_i18n::I18n;
 use anki_proto::card_rendering::ExtractClozeForTypingRequest;
 use anki_proto::generic;
 
@@ -9,6 +12,7 @@ use crate::card_rendering::extract_av_tags;
 use crate::card_rendering::strip_av_tags;
 use crate::cloze::extract_cloze_for_typing;
 use crate::collection::Collection;
+use crate::error::AnkiError;
 use crate::error::OrInvalid;
 use crate::error::Result;
 use crate::latex::extract_latex;
@@ -94,6 +98,25 @@ impl crate::services::CardRenderingService for Collection {
             .map(Into::into)
     }
 
+    fn render_existing_cards(
+        &mut self,
+        input: anki_proto::card_rendering::RenderExistingCardsRequest,
+    ) -> Result<anki_proto::card_rendering::RenderExistingCardsResponse> {
+        let cards = input
+            .card_ids
+            .into_iter()
+            .map(|cid| {
+                let value = self.render_existing_card_for_bulk(CardId(cid), input.browser)?;
+                Ok(
+                    anki_proto::card_rendering::render_existing_cards_response::Card {
+                        value: Some(value),
+                    },
+                )
+            })
+            .collect::<Result<_>>()?;
+        Ok(anki_proto::card_rendering::RenderExistingCardsResponse { cards })
+    }
+
     fn render_uncommitted_card(
         &mut self,
         input: anki_proto::card_rendering::RenderUncommittedCardRequest,
@@ -180,6 +203,77 @@ impl crate::services::CardRenderingService for Collection {
     }
 }
 
+impl Collection {
+    /// Render a card for [RenderExistingCards]. Template errors are returned
+    /// with the card instead of failing the whole request.
+    fn render_existing_card_for_bulk(
+        &mut self,
+        cid: CardId,
+        browser: bool,
+    ) -> Result<anki_proto::card_rendering::render_existing_cards_response::card::Value> {
+        use anki_proto::card_rendering::render_existing_cards_response::card::Value;
+
+        let output = match self.render_existing_card(cid, browser, true) {
+            Ok(output) => output,
+            Err(err @ AnkiError::TemplateError { .. }) => {
+                return Ok(Value::Error(err.message(&self.tr)))
+            }
+            Err(err) => return Err(err),
+        };
+        Ok(match render_without_custom_filters(&output, &self.tr) {
+            Some(rendered) => Value::Rendered(rendered),
+            None => Value::Partial(output.into()),
+        })
+    }
+}
+
+/// If none of the nodes have filters that the frontend needs to apply, finish
+/// rendering the card in the same way as the frontend would, by filling in
+/// FrontSide and extracting AV tags.
+fn render_without_custom_filters(
+    output: &RenderCardOutput,
+    tr: &I18n,
+) -> Option<anki_proto::card_rendering::render_existing_cards_response::RenderedCard> {
+    let question = text_without_custom_filters(&output.qnodes, None)?;
+    let (question_text, question_av_tags) = extract_av_tags(question, true, tr);
+    let answer = text_without_custom_filters(&output.anodes, Some(&question_text))?;
+    let (answer_text, answer_av_tags) = extract_av_tags(answer, false, tr);
+    Some(
+        anki_proto::card_rendering::render_existing_cards_response::RenderedCard {
+            question: Some(anki_proto::card_rendering::ExtractAvTagsResponse {
+                text: question_text,
+                av_tags: question_av_tags,
+            }),
+            answer: Some(anki_proto::card_rendering::ExtractAvTagsResponse {
+                text: answer_text,
+                av_tags: answer_av_tags,
+            }),
+            css: output.css.clone(),
+            latex_svg: output.latex_svg,
+        },
+    )
+}
+
+/// The text of the nodes, or None if any replacement has filters left.
+fn text_without_custom_filters(nodes: &[RenderedNode], front_side: Option<&str>) -> Option<String> {
+    let mut out = String::new();
+    for node in nodes {
+        match node {
+            RenderedNode::Text { text } => out.push_str(text),
+            RenderedNode::Replacement {
+                field_name,
+                current_text,
+                filters,
+            } if filters.is_empty() => match front_side {
+                Some(front_side) if field_name == "FrontSide" => out.push_str(front_side),
+                _ => out.push_str(current_text),
+            },
+            RenderedNode::Replacement { .. } => return None,
+        }
+    }
+    Some(out)
+}
+
 fn rendered_nodes_to_proto(
     nodes: Vec<RenderedNode>,
 ) -> Vec<anki_proto::card_rendering::RenderedTemplateNode> {
@@ -227,12 +321,31 @@ impl From<RenderCardOutput> for anki_proto::card_rendering::RenderCardResponse {
 pub(crate) fn strip_html_proto(
     input: anki_proto::card_rendering::StripHtmlRequest,
 ) -> Result<generic::String> {
-    Ok(match input.mode() {
-        anki_proto::card_rendering::strip_html_request::Mode::Normal => strip_html(&input.text),
+    Ok(strip_html_for_mode(input.mode())(&input.text)
+        .to_string()
+        .into())
+}
+
+pub(crate) fn strip_html_batch_proto(
+    input: anki_proto::card_rendering::StripHtmlBatchRequest,
+) -> Result<generic::StringList> {
+    let strip = strip_html_for_mode(input.mode());
+    Ok(generic::StringList {
+        vals: input
+            .texts
+            .iter()
+            .map(|text| strip(text).into_owned())
+            .collect(),
+    })
+}
+
+fn strip_html_for_mode(
+    mode: anki_proto::card_rendering::strip_html_request::Mode,
+) -> fn(&str) -> Cow<'_, str> {
+    match mode {
+        anki_proto::card_rendering::strip_html_request::Mode::Normal => strip_html,
         anki_proto::card_rendering::strip_html_request::Mode::PreserveMediaFilenames => {
-            strip_html_preserving_media_filenames(&input.text)
+            strip_html_preserving_media_filenames
         }
     }
-    .to_string()
-    .into())
 }
@@ -17,6 +17,8 @@ use std::sync::Mutex;
 use anki_i18n::I18n;
 use anki_io::create_dir_all;
 
+use crate::backend::dbproxy::DbCursors;
+use crate::backend::dbproxy::PreparedStatements;
 use crate::browser_table;
 use crate::decks::Deck;
 use crate::decks::DeckId;
@@ -134,6 +136,10 @@ pub struct CollectionState {
     /// True if legacy Python code has executed SQL that has modified the
     /// database, requiring modification time to be bumped.
     pub(crate) modified_by_dbproxy: bool,
+    /// Partially-consumed query results from legacy Python code.
+    pub(crate) db_cursors: DbCursors,
+    /// SQL prepared by legacy Python code for repeated use.
+    pub(crate) db_statements: PreparedStatements,
     /// The modification time at the last backup, so we don't create multiple
     /// identical backups.
     pub(crate) last_backup_modified: Option<TimestampMillis>,
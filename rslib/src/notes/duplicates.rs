@@ -0,0 +1,160 @@
+// Copyright: Ankitects Pty Ltd and contributors
+// License: GNU AGPL, version 3 or later; http://www.gnu.org/licenses/agpl.html
+
+use std::collections::hash_map::Entry;
+use std::collections::HashMap;
+
+use sha1::Digest;
+use sha1::Sha1;
+use unicase::UniCase;
+
+use crate::prelude::*;
+use crate::search::parse_search;
+use crate::search::FieldSearchMode;
+use crate::search::JoinSearches;
+use crate::search::Node;
+use crate::search::SearchNode;
+use crate::text::escape_anki_wildcards_for_search_node;
+use crate::text::strip_html_preserving_media_filenames;
+
+#[derive(Debug, Default, Clone, Copy, PartialEq, Eq)]
+pub struct FindDuplicatesProgress {
+    pub current: usize,
+    pub total: usize,
+}
+
+#[derive(Debug, Clone, PartialEq, Eq)]
+pub struct DuplicateGroup {
+    /// The field content, with HTML stripped.
+    pub text: String,
+    pub note_ids: Vec<NoteId>,
+}
+
+/// Where the notes seen so far with a given field content ended up.
+#[derive(Clone, Copy)]
+enum SeenText {
+    Once(NoteId),
+    /// An index into the returned groups.
+    Duplicated(usize),
+}
+
+impl Collection {
+    /// Group the notes matching `search` by the content of their field named
+    /// `field_name`, ignoring HTML but not media filenames. Only groups with
+    /// more than one note are returned, in the order their second note was
+    /// found. Empty fields are not considered duplicates.
+    ///
+    /// The notes are read one at a time, and only a hash of each field's
+    /// content is kept until a duplicate is found, so memory use does not grow
+    /// with the size of the fields.
+    pub fn find_duplicates(
+        &mut self,
+        field_name: &str,
+        search: &str,
+    ) -> Result<Vec<DuplicateGroup>> {
+        let field_ords = self.field_ords_by_name(field_name)?;
+        let search = SearchBuilder::from_root(Node::Group(parse_search(search)?)).and(
+            SearchNode::SingleField {
+                field: escape_anki_wildcards_for_search_node(field_name),
+                text: "_*".to_string(),
+                mode: FieldSearchMode::Normal,
+            },
+        );
+
+        let mut progress = self.new_progress_handler::<FindDuplicatesProgress>();
+        let guard = self.search_notes_into_table(search)?;
+        let total = guard.notes;
+        let mut incrementor =
+            progress.incrementor(|current| FindDuplicatesProgress { current, total });
+        let mut seen: HashMap<Sha1Hash, SeenText> = HashMap::new();
+        let mut groups: Vec<DuplicateGroup> = vec![];
+        guard.col.storage.for_each_note_in_search(|note| {
+            incrementor.increment()?;
+            let Some(ord) = field_ords.get(&note.notetype_id).copied().flatten() else {
+                return Ok(());
+            };
+            let Some(field) = note.fields().get(ord) else {
+                return Ok(());
+            };
+            let text = strip_html_preserving_media_filenames(field);
+            if text.is_empty() {
+                return Ok(());
+            }
+            let hash: Sha1Hash = Sha1::digest(text.as_bytes()).into();
+            match seen.entry(hash) {
+                Entry::Vacant(entry) => {
+                    entry.insert(SeenText::Once(note.id));
+                }
+                Entry::Occupied(mut entry) => match *entry.get() {
+                    SeenText::Once(first) => {
+                        entry.insert(SeenText::Duplicated(groups.len()));
+                        groups.push(DuplicateGroup {
+                            text: text.into_owned(),
+                            note_ids: vec![first, note.id],
+                        });
+                    }
+                    SeenText::Duplicated(idx) => groups[idx].note_ids.push(note.id),
+                },
+            }
+            Ok(())
+        })?;
+
+        Ok(groups)
+    }
+
+    /// The index of the field called `name` in each notetype, if it has one.
+    /// Names are compared case-insensitively.
+    fn field_ords_by_name(&mut self, name: &str) -> Result<HashMap<NotetypeId, Option<usize>>> {
+        let name = UniCase::new(name);
+        Ok(self
+            .get_all_notetypes()?
+            .into_iter()
+            .map(|nt| {
+                let ord = nt
+                    .fields
+                    .iter()
+                    .position(|field| UniCase::new(field.name.as_str()) == name);
+                (nt.id, ord)
+            })
+            .collect())
+    }
+}
+
+#[cfg(test)]
+mod test {
+    use super::*;
+    use crate::decks::DeckId;
+
+    fn add_basic_note(col: &mut Collection, front: &str, back: &str) -> Result<NoteId> {
+        let nt = col.get_notetype_by_name("Basic")?.unwrap();
+        let mut note = nt.new_note();
+        note.set_field(0, front)?;
+        note.set_field(1, back)?;
+        col.add_note(&mut note, DeckId(1))?;
+        Ok(note.id)
+    }
+
+    #[test]
+    fn finding_duplicates() -> Result<()> {
+        let mut col = Collection::new();
+        let a = add_basic_note(&mut col, "foo", "bar")?;
+        let b = add_basic_note(&mut col, "baz", "<b>bar</b>")?;
+        let c = add_basic_note(&mut col, "quux", "bar")?;
+        add_basic_note(&mut col, "quuux", "nope")?;
+        add_basic_note(&mut col, "empty1", "")?;
+        add_basic_note(&mut col, "empty2", "<br>")?;
+
+        let expected = vec![DuplicateGroup {
+            text: "bar".into(),
+            note_ids: vec![a, b, c],
+        }];
+        // field names are matched case-insensitively
+        assert_eq!(col.find_duplicates("back", "")?, expected);
+        assert_eq!(col.find_duplicates("Back", "bar")?, expected);
+        assert_eq!(col.find_duplicates("Back", "invalid")?, vec![]);
+        assert_eq!(col.find_duplicates("Front", "")?, vec![]);
+        assert_eq!(col.find_duplicates("Missing", "")?, vec![]);
+
+        Ok(())
+    }
+}
@@ -182,6 +182,39 @@ impl crate::services::NotesService for Collection {
         self.get_single_notetype_of_notes(&input.note_ids.into_newtype(NoteId))
             .map(Into::into)
     }
+
+    fn get_notes(
+        &mut self,
+        input: anki_proto::notes::NoteIds,
+    ) -> error::Result<anki_proto::notes::Notes> {
+        let notes = input
+            .note_ids
+            .into_iter()
+            .map(|nid| {
+                let nid = NoteId(nid);
+                self.storage
+                    .get_note(nid)?
+                    .or_not_found(nid)
+                    .map(Into::into)
+            })
+            .collect::<error::Result<_>>()?;
+        Ok(anki_proto::notes::Notes { notes })
+    }
+
+    fn find_duplicates(
+        &mut self,
+        input: anki_proto::notes::FindDuplicatesRequest,
+    ) -> error::Result<anki_proto::notes::FindDuplicatesResponse> {
+        let groups = self
+            .find_duplicates(&input.field_name, &input.search)?
+            .into_iter()
+            .map(|group| anki_proto::notes::find_duplicates_response::Group {
+                text: group.text,
+                note_ids: to_i64s(group.note_ids),
+            })
+            .collect();
+        Ok(anki_proto::notes::FindDuplicatesResponse { groups })
+    }
 }
 
 pub(crate) fn to_note_ids(ids: Vec<i64>) -> Vec<NoteId> {
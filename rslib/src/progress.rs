@@ -13,6 +13,7 @@ use crate::error::AnkiError;
 use crate::error::Result;
 use crate::import_export::ExportProgress;
 use crate::import_export::ImportProgress;
+use crate::notes::duplicates::FindDuplicatesProgress;
 use crate::prelude::Collection;
 use crate::scheduler::fsrs::memory_state::ComputeMemoryProgress;
 use crate::scheduler::fsrs::params::ComputeParamsProgress;
@@ -141,6 +142,7 @@ pub enum Progress {
     ComputeParams(ComputeParamsProgress),
     ComputeRetention(ComputeRetentionProgress),
     ComputeMemory(ComputeMemoryProgress),
+    FindDuplicates(FindDuplicatesProgress),
 }
 
 pub(crate) fn progress_to_proto(
@@ -240,6 +242,12 @@ pub(crate) fn progress_to_proto(
                         .into(),
                 })
             }
+            Progress::FindDuplicates(progress) => {
+                Value::FindDuplicates(anki_proto::collection::progress::FindDuplicates {
+                    current: progress.current as u32,
+                    total: progress.total as u32,
+                })
+            }
         }
     } else {
         Value::None(anki_proto::generic::Empty {})
@@ -321,6 +329,12 @@ impl From<ComputeMemoryProgress> for Progress {
     }
 }
 
+impl From<FindDuplicatesProgress> for Progress {
+    fn from(p: FindDuplicatesProgress) -> Self {
+        Progress::FindDuplicates(p)
+    }
+}
+
 impl Collection {
     pub fn new_progress_handler<P: Into<Progress> + Default + Clone>(
         &self,
@@ -131,6 +131,13 @@ impl crate::services::SearchService for Collection {
     ) -> Result<anki_proto::search::BrowserRow> {
         self.browser_row_for_id(input.val)
     }
+
+    fn browser_rows_for_ids(
+        &mut self,
+        input: anki_proto::search::BrowserRowsForIdsRequest,
+    ) -> Result<anki_proto::search::BrowserRows> {
+        self.browser_rows_for_ids(&input.ids)
+    }
 }
 
 impl From<Option<SortOrderProto>> for SortMode {